@@ -3,10 +3,11 @@ import os
 import logging
 import asyncio
 from contextlib import asynccontextmanager
-from fastapi import FastAPI, UploadFile, File, HTTPException
+from fastapi import FastAPI, UploadFile, File, HTTPException, Query, Header, BackgroundTasks
 from fastapi.concurrency import run_in_threadpool
 from pydantic import BaseModel, Field
-from typing import List, Dict, Any
+from langchain_core.messages import AIMessage
+from typing import List, Dict, Any, Optional
 import uvicorn
 
 logging.basicConfig(level=logging.INFO)
@@ -14,6 +15,18 @@ logger = logging.getLogger(__name__)
 
 from src.cv_parsing_agents import CvParserAgent
 from src.interview_simulator.entretient_version_prod import InterviewProcessor
+from src.matching import get_matcher
+from src.concurrency import get_governor, AdmissionRejected, INTERACTIVE, BATCH
+from src.crew.crew_pool import warm_crew_pools, crew_pool_metrics
+from src.model_residency import get_residency_manager
+from src.inference_scheduler import get_inference_scheduler
+from src.pre_analysis import get_pre_analysis_queue, session_id_for, user_answers, PRE_ANALYSIS_ENABLED
+from src.job_offer import get_job_offer_catalog, canonical_offer
+from src.cv_extraction import CV_ENGINES, CV_EXTRACTION_ENGINE
+from src.model_router import get_model_router
+from src.persistence import get_result_store
+from src.responses import FastJSONResponse, AnalysisResult, InterviewTurnResponse
+from src import profiling
 
 MAX_FILE_SIZE = 10 * 1024 * 1024  # 10MB
 TIMEOUT_SECONDS = 300  # 5 minutes
@@ -42,33 +55,67 @@ async def lifespan(app: FastAPI):
             logger.warning(f"⚠️ CrewAI warning: {e}")
     except Exception as e:
         logger.warning(f"⚠️ Avertissement au démarrage : {e}")
+    get_governor()
+    await run_in_threadpool(warm_crew_pools)
+    await run_in_threadpool(get_result_store().warm_caches)
+    get_residency_manager().start_reaper()
+    get_inference_scheduler()
     logger.info("✅ Application prête")
     yield
     logger.info("🛑 Arrêt de l'application")
+    get_governor().shutdown()
+    get_residency_manager().stop_reaper()
+    get_pre_analysis_queue().stop()
+    get_result_store().close()
+    get_inference_scheduler().shutdown()
+    try:
+        get_matcher().save()
+    except Exception as e:
+        logger.warning(f"⚠️ Sauvegarde de l'index de matching impossible : {e}")
 
 app = FastAPI(
     title="API d'IA pour la RH",
     description="Une API pour le parsing de CV et la simulation d'entretiens.",
     version="1.0.0",
-    lifespan=lifespan
+    lifespan=lifespan,
+    default_response_class=FastJSONResponse
 )
+app.add_middleware(profiling.ProfilingMiddleware)
 
 class InterviewRequest(BaseModel):
     cv_document: Dict[str, Any] = Field(..., example={"candidat": {"nom": "John Doe", "compétences": {"hard_skills": ["Python", "FastAPI"]}}})
-    job_offer: Dict[str, Any] = Field(..., example={"poste": "Développeur Python", "description": "Recherche développeur expérimenté..."})
+    job_offer: Optional[Dict[str, Any]] = Field(None, example={"poste": "Développeur Python", "description": "Recherche développeur expérimenté..."})
+    job_offer_id: Optional[str] = Field(None, description="Offre enregistrée via /job-offers/ ; remplace `job_offer`")
     messages: List[Dict[str, Any]]
     conversation_history: List[Dict[str, Any]]
+    session_id: Optional[str] = Field(None, description="Identifiant de l'entretien ; dérivé du CV et de l'offre si absent")
+
+class AnalysisRequest(BaseModel):
+    conversation_history: List[Dict[str, Any]]
+    job_description: str
+
+class CandidateIndexRequest(BaseModel):
+    candidate_id: str
+    cv_document: Dict[str, Any]
+
+class OfferIndexRequest(BaseModel):
+    offer_id: str
+    job_offer: Dict[str, Any]
+
+class JobOfferRegistration(BaseModel):
+    offer_id: str
+    job_offer: Dict[str, Any] = Field(..., example={"entreprise": "Acme", "poste": "Développeur Python", "description": "Recherche développeur expérimenté..."})
 
 class HealthCheck(BaseModel):
     status: str = Field(default="ok", example="ok")
 
 @app.get("/", tags=["Status"], summary="Vérification de l'état de l'API")
-def read_root() -> HealthCheck:
+async def read_root() -> HealthCheck:
     """Vérifie que l'API est en cours d'exécution."""
     return HealthCheck(status="ok")
 
 @app.get("/health", tags=["Status"], summary="Health check détaillé")
-def health_check():
+async def health_check():
     """Health check pour Cloud Run avec status des modèles"""
     try:
         import torch
@@ -79,7 +126,7 @@ def health_check():
             models_status = {
                 "sentiment_available": analyzer.sentiment_analyzer is not None,
                 "similarity_available": analyzer.similarity_model is not None,
-                "intent_available": analyzer.intent_classifier is not None,
+                "intent_available": analyzer.intent_available,
                 "models_loaded": analyzer.models_loaded
             }
         else:
@@ -90,15 +137,76 @@ def health_check():
             "transformers_available": True,
             "cuda_available": torch.cuda.is_available(),
             "models_status": models_status,
+            "concurrency": get_governor().snapshot(),
             "cache_dir": os.environ.get('TRANSFORMERS_CACHE', 'default')
         }
     except Exception as e:
         logger.error(f"Health check failed: {e}")
         raise HTTPException(status_code=503, detail="Service unhealthy")
 
+@app.get("/metrics/concurrency", tags=["Status"], summary="Utilisation des pools par classe d'endpoints")
+async def concurrency_metrics():
+    """Utilisation en temps réel, exploitable pour les décisions d'autoscaling."""
+    return get_governor().snapshot()
+
+@app.get("/metrics/crews", tags=["Status"], summary="État des pools de crews")
+async def crew_metrics():
+    return crew_pool_metrics()
+
+@app.get("/metrics/inference", tags=["Status"], summary="Budgets de threads et files d'inférence par modèle")
+async def inference_metrics():
+    return get_inference_scheduler().snapshot()
+
+@app.get("/metrics/models", tags=["Status"], summary="Modèles résidents, mémoire et événements de chargement/éviction")
+async def model_metrics():
+    return get_residency_manager().snapshot()
+
+@app.get("/metrics/pre-analysis", tags=["Status"], summary="File de pré-analyse des réponses et cache par tour")
+async def pre_analysis_metrics():
+    return get_pre_analysis_queue().snapshot()
+
+@app.get("/metrics/router", tags=["Status"], summary="Décisions de routage des modèles et issues par palier")
+async def router_metrics():
+    return get_model_router().snapshot()
+
+@app.get("/metrics/persistence", tags=["Status"], summary="Tampon d'écriture différée des résultats")
+async def persistence_metrics():
+    return get_result_store().stats()
+
+@app.get("/metrics/job-offers", tags=["Status"], summary="Catalogue des offres enregistrées")
+async def job_offer_metrics():
+    return get_job_offer_catalog().stats()
+
+def _require_profile_token(token: Optional[str]):
+    if not profiling.profiling_enabled():
+        raise HTTPException(status_code=404, detail="Profilage désactivé (PROFILE_TOKEN non défini)")
+    if not profiling.check_token(token):
+        raise HTTPException(status_code=403, detail="Jeton de profilage invalide")
+
+@app.post("/admin/profiling/arm", tags=["Admin"], summary="Profiler les prochaines requêtes d'un endpoint")
+async def arm_profiling(
+    path_prefix: str = Query(..., example="/simulate-interview/"),
+    count: int = Query(1, ge=1, le=5),
+    x_profile_token: Optional[str] = Header(None)
+):
+    """Alternative à l'en-tête X-Profile-Token quand le client ne peut pas être modifié."""
+    _require_profile_token(x_profile_token)
+    profiling.arm(path_prefix, count)
+    return {"armed": path_prefix, "count": count}
+
+@app.get("/admin/profiling/sessions", tags=["Admin"], summary="Profils enregistrés")
+async def profiling_sessions(x_profile_token: Optional[str] = Header(None)):
+    _require_profile_token(x_profile_token)
+    return {"directory": profiling.PROFILE_DIR, "sessions": profiling.list_sessions()}
+
 @app.post("/parse-cv/", tags=["CV Parsing"], summary="Analyser un CV au format PDF")
-async def parse_cv_endpoint(file: UploadFile = File(...)):
+async def parse_cv_endpoint(
+    file: UploadFile = File(...),
+    engine: str = Query(CV_EXTRACTION_ENGINE, description="`crew` (six agents, plus précis) ou `structured` (un seul appel)")
+):
     """Version sécurisée pour Cloud Run"""
+    if engine not in CV_ENGINES:
+        raise HTTPException(status_code=400, detail=f"Moteur inconnu : {engine} (attendu : {', '.join(CV_ENGINES)})")
     if file.content_type != "application/pdf":
         raise HTTPException(status_code=400, detail="Le fichier doit être au format PDF.")
     
@@ -116,9 +224,9 @@ async def parse_cv_endpoint(file: UploadFile = File(...)):
             temp_path = temp_file.name
         
         logger.info(f"Fichier temporaire créé : {temp_path}")
-        cv_agent = CvParserAgent(pdf_path=temp_path)
+        cv_agent = CvParserAgent(pdf_path=temp_path, engine=engine)
         parsed_data = await asyncio.wait_for(
-            run_in_threadpool(cv_agent.process),
+            get_governor().run(BATCH, cv_agent.process),
             timeout=TIMEOUT_SECONDS
         )
         
@@ -126,8 +234,12 @@ async def parse_cv_endpoint(file: UploadFile = File(...)):
             raise HTTPException(status_code=500, detail="Échec du parsing du CV.")
         
         logger.info("Parsing du CV réussi.")
+        get_result_store().save_cv(parsed_data)
         return parsed_data
         
+    except AdmissionRejected as e:
+        logger.warning(f"Parsing du CV refusé : {e.detail}")
+        raise e.to_http_exception()
     except asyncio.TimeoutError:
         logger.error("Timeout lors du parsing du CV")
         raise HTTPException(status_code=504, detail="Timeout lors du traitement du CV")
@@ -143,33 +255,61 @@ async def parse_cv_endpoint(file: UploadFile = File(...)):
                 logger.warning(f"Erreur lors de la suppression du fichier temporaire : {cleanup_error}")
 
 @app.post("/simulate-interview/", tags=["Simulation d'Entretien"], summary="Gérer une conversation d'entretien")
-async def simulate_interview_endpoint(request: InterviewRequest):
+async def simulate_interview_endpoint(request: InterviewRequest, background_tasks: BackgroundTasks):
     try:
+        if request.job_offer_id:
+            try:
+                # Relecture disque et ré-encodage éventuels : hors de la boucle d'événements
+                offer = await run_in_threadpool(get_job_offer_catalog().get, request.job_offer_id)
+            except KeyError:
+                raise HTTPException(status_code=404, detail=f"Offre inconnue : {request.job_offer_id}")
+        elif request.job_offer:
+            offer = canonical_offer(request.job_offer)
+        else:
+            raise HTTPException(status_code=400, detail="`job_offer` ou `job_offer_id` requis")
+
         logger.info("Création de l'instance InterviewProcessor.")
         processor = InterviewProcessor(
             cv_document=request.cv_document,
-            job_offer=request.job_offer,
+            job_offer=offer,
             conversation_history=request.conversation_history
         )
         
         logger.info("Lancement de la simulation dans un threadpool.")
         ai_response_object = await asyncio.wait_for(
-            run_in_threadpool(processor.run, messages=request.messages),
+            get_governor().run(INTERACTIVE, processor.run, messages=request.messages),
             timeout=TIMEOUT_SECONDS
         )
         
         final_text_response = ""
-        if isinstance(ai_response_object.get('messages'), list) and ai_response_object['messages']:
-            last_message = ai_response_object['messages'][-1]
-            if hasattr(last_message, 'content'):
-                final_text_response = last_message.content       
-        
+        # Dernier AIMessage non vide produit par ce tour : les messages d'entrée (historique et
+        # messages du client) sont ignorés et l'état LangGraph complet n'est jamais renvoyé
+        input_count = len(request.conversation_history) + len(request.messages)
+        for message in reversed((ai_response_object.get('messages') or [])[input_count:]):
+            content = getattr(message, 'content', None)
+            if isinstance(message, AIMessage) and isinstance(content, str) and content.strip():
+                final_text_response = content
+                break
+
         if not final_text_response:
-            final_text_response = str(ai_response_object)
-        
+            logger.error("Aucune réponse de l'IA dans l'état retourné par le graphe")
+            raise HTTPException(status_code=502, detail="Réponse vide du modèle")
+
         logger.info(f"Simulation terminée. Réponse extraite : '{final_text_response[:100]}...'")
-        return {"response": final_text_response}
-        
+        if PRE_ANALYSIS_ENABLED:
+            # Après l'envoi de la réponse : le rapport final ne fera plus que relire ces résultats
+            session_id = request.session_id or session_id_for(processor.cv.content_hash, offer.content_hash)
+            background_tasks.add_task(
+                get_pre_analysis_queue().submit, session_id,
+                user_answers(request.conversation_history + request.messages), offer.description
+            )
+        return FastJSONResponse(InterviewTurnResponse(response=final_text_response))
+
+    except HTTPException:
+        raise
+    except AdmissionRejected as e:
+        logger.warning(f"Tour d'entretien refusé : {e.detail}")
+        raise e.to_http_exception()
     except asyncio.TimeoutError:
         logger.error("Timeout lors de la simulation d'entretien")
         raise HTTPException(status_code=504, detail="Timeout lors de la simulation")
@@ -177,6 +317,112 @@ async def simulate_interview_endpoint(request: InterviewRequest):
         logger.error(f"Erreur interne dans /simulate-interview/: {e}", exc_info=True)
         raise HTTPException(status_code=500, detail=f"Erreur interne du serveur : {str(e)}")
 
+@app.post("/analyze-interview/", tags=["Simulation d'Entretien"], summary="Analyse ML d'un entretien (réponse allégée)")
+async def analyze_interview_endpoint(
+    request: AnalysisRequest,
+    include_transcript: bool = Query(False, description="Inclure la transcription et les extraits de réponses"),
+    include_raw_scores: bool = Query(False, description="Inclure toutes les listes de scores par tour")
+):
+    """Label dominant par tour et couverture des exigences ; le reste seulement sur demande."""
+    from src.deep_learning_analyzer import MultiModelInterviewAnalyzer
+
+    def analyse():
+        analysis = MultiModelInterviewAnalyzer().run_full_analysis(
+            request.conversation_history, request.job_description, include_transcript=include_transcript
+        )
+        return AnalysisResult.from_analysis(
+            analysis, include_transcript=include_transcript, include_raw_scores=include_raw_scores
+        )
+
+    try:
+        result = await asyncio.wait_for(get_governor().run(BATCH, analyse), timeout=TIMEOUT_SECONDS)
+        return FastJSONResponse(result)
+    except AdmissionRejected as e:
+        raise e.to_http_exception()
+    except asyncio.TimeoutError:
+        raise HTTPException(status_code=504, detail="Timeout lors de l'analyse")
+    except Exception as e:
+        logger.error(f"Erreur lors de l'analyse de l'entretien : {e}", exc_info=True)
+        raise HTTPException(status_code=500, detail=f"Erreur interne du serveur : {str(e)}")
+
+@app.post("/job-offers/", tags=["Offres"], summary="Enregistrer une offre d'emploi")
+async def register_job_offer_endpoint(request: JobOfferRegistration):
+    """
+    Normalise l'offre, encode ses exigences, la persiste et l'indexe pour le
+    matching. Les tours d'entretien la référencent ensuite par `job_offer_id`.
+    """
+    def register():
+        offer = get_job_offer_catalog().register(request.offer_id, request.job_offer)
+        get_matcher().index_offers({request.offer_id: offer.data})
+        return offer
+
+    try:
+        offer = await get_governor().run(BATCH, register)
+        return offer.to_dict()
+    except AdmissionRejected as e:
+        raise e.to_http_exception()
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        logger.error(f"Erreur lors de l'enregistrement de l'offre : {e}", exc_info=True)
+        raise HTTPException(status_code=500, detail=f"Erreur interne du serveur : {str(e)}")
+
+@app.get("/job-offers/{offer_id}", tags=["Offres"], summary="Offre enregistrée")
+async def get_job_offer_endpoint(offer_id: str):
+    try:
+        offer = await run_in_threadpool(get_job_offer_catalog().get, offer_id)
+    except KeyError:
+        raise HTTPException(status_code=404, detail=f"Offre inconnue : {offer_id}")
+    return {**offer.to_dict(), "job_offer": offer.data}
+
+@app.post("/matching/candidates/", tags=["Matching"], summary="Indexer un CV parsé")
+async def index_candidate_endpoint(request: CandidateIndexRequest):
+    try:
+        matcher = get_matcher()
+        await get_governor().run(BATCH, matcher.index_candidates, {request.candidate_id: request.cv_document})
+        return {"candidate_id": request.candidate_id, "indexed": True, "stats": matcher.stats()}
+    except AdmissionRejected as e:
+        raise e.to_http_exception()
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        logger.error(f"Erreur lors de l'indexation du candidat : {e}", exc_info=True)
+        raise HTTPException(status_code=500, detail=f"Erreur interne du serveur : {str(e)}")
+
+@app.post("/matching/offers/", tags=["Matching"], summary="Indexer une offre d'emploi")
+async def index_offer_endpoint(request: OfferIndexRequest):
+    try:
+        matcher = get_matcher()
+        await get_governor().run(BATCH, matcher.index_offers, {request.offer_id: request.job_offer})
+        return {"offer_id": request.offer_id, "indexed": True, "stats": matcher.stats()}
+    except AdmissionRejected as e:
+        raise e.to_http_exception()
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        logger.error(f"Erreur lors de l'indexation de l'offre : {e}", exc_info=True)
+        raise HTTPException(status_code=500, detail=f"Erreur interne du serveur : {str(e)}")
+
+@app.get("/matching/offers/{offer_id}/candidates", tags=["Matching"], summary="Meilleurs candidats pour une offre")
+async def top_candidates_endpoint(offer_id: str, k: int = Query(10, ge=1, le=1000)):
+    try:
+        results = await get_governor().run(INTERACTIVE, get_matcher().top_candidates_for_offer, offer_id, k)
+    except AdmissionRejected as e:
+        raise e.to_http_exception()
+    except KeyError:
+        raise HTTPException(status_code=404, detail=f"Offre inconnue : {offer_id}")
+    return {"offer_id": offer_id, "candidates": [{"candidate_id": i, "score": round(s, 4)} for i, s in results]}
+
+@app.get("/matching/candidates/{candidate_id}/offers", tags=["Matching"], summary="Meilleures offres pour un candidat")
+async def top_offers_endpoint(candidate_id: str, k: int = Query(10, ge=1, le=1000)):
+    try:
+        results = await get_governor().run(INTERACTIVE, get_matcher().top_offers_for_candidate, candidate_id, k)
+    except AdmissionRejected as e:
+        raise e.to_http_exception()
+    except KeyError:
+        raise HTTPException(status_code=404, detail=f"Candidat inconnu : {candidate_id}")
+    return {"candidate_id": candidate_id, "offers": [{"offer_id": i, "score": round(s, 4)} for i, s in results]}
+
 if __name__ == "__main__":
     port = int(os.environ.get("PORT", 8080))
     uvicorn.run(app, host="0.0.0.0", port=port)
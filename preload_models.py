@@ -1,66 +1,28 @@
 import os
 import sys
 import logging
-from pathlib import Path
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
-def preload_transformers_models():
-    """Pré-charge les modèles Transformers"""
+def bake_models():
+    """Télécharge les modèles du registre (une seule fois chacun) et les écrit en safetensors"""
     try:
-        from transformers import pipeline, AutoTokenizer, AutoModel
-        
-        logger.info("=== Pré-chargement des modèles Transformers ===")
-        models_to_preload = [
-            {
-                "name": "astrosbd/french_emotion_camembert",
-                "task": "text-classification",
-                "description": "Sentiment analysis français"
-            },
-            {
-                "name": "joeddav/xlm-roberta-large-xnli", 
-                "task": "zero-shot-classification",
-                "description": "Classification zero-shot multilingue"
-            }
-        ]
-        
-        for model_info in models_to_preload:
-            try:
-                logger.info(f"Téléchargement: {model_info['name']} ({model_info['description']})")
-                tokenizer = AutoTokenizer.from_pretrained(model_info["name"])
-                model = AutoModel.from_pretrained(model_info["name"])
-                pipe = pipeline(model_info["task"], model=model_info["name"], device=-1)
-                logger.info(f"✅ {model_info['name']} pré-chargé avec succès")
-                
-            except Exception as e:
-                logger.error(f"❌ Erreur lors du pré-chargement de {model_info['name']}: {e}")
-                continue
-                
-    except ImportError as e:
-        logger.error(f"Transformers non disponible: {e}")
-        return False
-    
-    return True
+        from src.model_registry import bake_models as bake, MODEL_BAKE_DIR
 
-def preload_sentence_transformers():
-    """Pré-charge les modèles Sentence Transformers"""
-    try:
-        from sentence_transformers import SentenceTransformer
-        logger.info("=== Pré-chargement Sentence Transformers ===")
-        model_name = 'all-MiniLM-L6-v2'
-        logger.info(f"Téléchargement: {model_name}")
-        model = SentenceTransformer(model_name)
-        test_sentence = "Test de fonctionnement"
-        embedding = model.encode(test_sentence)
-        logger.info(f"✅ {model_name} pré-chargé avec succès (embedding shape: {embedding.shape})")
+        logger.info(f"=== Bake des modèles dans {MODEL_BAKE_DIR} ===")
+        manifest = bake(MODEL_BAKE_DIR)
+        for key, entry in manifest["models"].items():
+            logger.info(
+                f"✅ {key}: {entry['name']} ({entry['bytes'] / 1e6:.0f} Mo, "
+                f"chargement attendu {entry['expected_load_seconds']}s)"
+            )
         return True
-        
+
     except ImportError as e:
-        logger.error(f"Sentence Transformers non disponible: {e}")
-        return False
-    except Exception as e:
-        logger.error(f"❌ Erreur lors du pré-chargement Sentence Transformers: {e}")
+        logger.error(f"Dépendances ML non disponibles: {e}")
         return False
 
 def preload_torch():
@@ -81,35 +43,22 @@ def preload_torch():
         logger.error(f"PyTorch non disponible: {e}")
         return False
 
-def verify_model_cache():
-    """Vérifie que les modèles sont bien en cache"""
-    cache_dir = os.environ.get('TRANSFORMERS_CACHE', '/app/model_cache')
-    cache_path = Path(cache_dir)
-    
-    if cache_path.exists():
-        cached_models = list(cache_path.rglob("*"))
-        logger.info(f"📁 Cache modèles: {len(cached_models)} fichiers dans {cache_dir}")
-        model_dirs = [d for d in cache_path.iterdir() if d.is_dir()]
-        for model_dir in model_dirs[:5]: 
-            logger.info(f"  - {model_dir.name}")
-            
-        return len(cached_models) > 0
-    else:
-        logger.warning(f"❌ Répertoire de cache non trouvé: {cache_dir}")
-        return False
+def verify_baked_models():
+    """Vérifie le manifeste : présence, taille et hash de chaque fichier"""
+    from src.model_registry import verify_manifest, MODEL_BAKE_DIR
+    return verify_manifest(MODEL_BAKE_DIR, check_hashes=True)
 
 def main():
     """Fonction principale de pré-chargement"""
     logger.info("🚀 Début du pré-chargement des modèles ML")
     
     success_count = 0
-    total_steps = 4
     steps = [
         ("PyTorch", preload_torch),
-        ("Transformers", preload_transformers_models), 
-        ("Sentence Transformers", preload_sentence_transformers),
-        ("Vérification cache", verify_model_cache)
+        ("Bake des modèles", bake_models),
+        ("Vérification du manifeste", verify_baked_models)
     ]
+    total_steps = len(steps)
     
     for step_name, step_func in steps:
         logger.info(f"\n--- {step_name} ---")
@@ -123,11 +72,11 @@ def main():
             logger.error(f"❌ Erreur critique dans {step_name}: {e}")
     logger.info(f"\n🎯 Pré-chargement terminé: {success_count}/{total_steps} étapes réussies")
     
-    if success_count >= 2:  
-        logger.info("✅ Pré-chargement suffisant pour fonctionner")
+    if success_count == total_steps:
+        logger.info("✅ Modèles pré-cuits, chargement hors ligne au runtime")
         return 0
     else:
-        logger.error("❌ Pré-chargement insuffisant - risque de problèmes au runtime")
+        logger.error("❌ Bake incomplet - les modèles seraient téléchargés au démarrage")
         return 1
 
 if __name__ == "__main__":
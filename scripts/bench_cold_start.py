@@ -0,0 +1,66 @@
+"""
+Temps de démarrage à froid de MultiModelInterviewAnalyzer avec et sans modèles pré-cuits.
+
+Chaque mesure est faite dans un processus neuf (imports compris) :
+
+    python scripts/bench_cold_start.py --bake-dir /app/models [--hub-cache /tmp/hf-empty] [--runs 3]
+
+Sans bake, les modèles sont chargés depuis le cache du Hub (`--hub-cache`, vide
+pour reproduire le téléchargement d'un démarrage Cloud Run).
+"""
+import os
+import sys
+import json
+import argparse
+import statistics
+import subprocess
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+PROBE = """
+import time, json
+started = time.perf_counter()
+from src.deep_learning_analyzer import MultiModelInterviewAnalyzer
+imported = time.perf_counter()
+analyzer = MultiModelInterviewAnalyzer()
+loaded = time.perf_counter()
+print(json.dumps({"import": imported - started, "load": loaded - imported, "ok": analyzer.models_loaded}))
+"""
+
+
+def measure(env_overrides, runs):
+    env = dict(os.environ, PYTHONPATH=ROOT, **env_overrides)
+    samples = []
+    for _ in range(runs):
+        output = subprocess.run(
+            [sys.executable, "-c", PROBE], cwd=ROOT, env=env, capture_output=True, text=True, check=True
+        ).stdout.strip().splitlines()[-1]
+        samples.append(json.loads(output))
+    return {
+        "import_s": round(statistics.median(s["import"] for s in samples), 2),
+        "load_s": round(statistics.median(s["load"] for s in samples), 2),
+        "models_loaded": all(s["ok"] for s in samples),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--bake-dir", default=os.getenv("MODEL_BAKE_DIR", "/app/models"))
+    parser.add_argument("--hub-cache", default=os.getenv("HF_HOME", "/tmp/hf"))
+    parser.add_argument("--runs", type=int, default=3)
+    args = parser.parse_args()
+
+    without = measure({
+        "MODEL_BAKE_DIR": "/nonexistent",
+        "HF_HOME": args.hub_cache,
+        "TRANSFORMERS_CACHE": args.hub_cache,
+        "SENTENCE_TRANSFORMERS_HOME": args.hub_cache,
+    }, args.runs)
+    with_bake = measure({"MODEL_BAKE_DIR": args.bake_dir, "HF_HUB_OFFLINE": "1", "TRANSFORMERS_OFFLINE": "1"}, args.runs)
+
+    print(f"Sans bake : {without}")
+    print(f"Avec bake : {with_bake}")
+
+
+if __name__ == "__main__":
+    main()
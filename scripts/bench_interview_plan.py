@@ -0,0 +1,93 @@
+"""
+Tokens du prompt système et latence par tour : prompt complet (CV + description
+bruts) contre plan d'entretien pré-calculé.
+
+Usage :
+    python scripts/bench_interview_plan.py [--cv scripts/fixtures/cvs/camille_martin.json] [--turns 5]
+
+Le plan est généré une fois (temps affiché), puis les premiers tours de chaque
+entretien de référence sont rejoués avec les deux prompts. Nécessite
+OPENAI_API_KEY (la sortie structurée du planificateur n'est pas simulée par le
+serveur factice).
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import statistics
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from langchain_core.messages import SystemMessage, HumanMessage, AIMessage
+
+from src.tokens import count_tokens
+from src.cv_document import canonical_cv
+from src.interview_simulator.interview_plan import generate_plan, render_plan
+from src.interview_simulator.entretient_version_prod import InterviewProcessor, INTERVIEW_TEMPERATURE
+from src.model_router import get_model_router, chat_model, INTERVIEW_TURN
+
+FIXTURES = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+
+
+def to_messages(conversation):
+    return [HumanMessage(content=m["content"]) if m["role"] == "user" else AIMessage(content=m["content"])
+            for m in conversation]
+
+
+def turn_latencies(llm, system_prompt, conversation, turns):
+    samples = []
+    for cut in range(1, min(turns, len(conversation)) + 1):
+        history = to_messages(conversation[:cut])
+        if not isinstance(history[-1], HumanMessage):
+            continue
+        started = time.perf_counter()
+        llm.invoke([SystemMessage(content=system_prompt)] + history)
+        samples.append(time.perf_counter() - started)
+    return samples
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--cv", default=os.path.join(FIXTURES, "cvs", "camille_martin.json"))
+    parser.add_argument("--interviews", default=os.path.join(FIXTURES, "interviews.json"))
+    parser.add_argument("--turns", type=int, default=5)
+    args = parser.parse_args()
+    os.chdir(ROOT)  # les prompts sont lus en chemins relatifs
+
+    with open(args.cv, "r", encoding="utf-8") as f:
+        cv_document = json.load(f)
+    with open(args.interviews, "r", encoding="utf-8") as f:
+        interviews = json.load(f)
+
+    cv = canonical_cv(cv_document)
+    # Même modèle pour les deux prompts : celui du palier par défaut des tours d'entretien
+    llm = chat_model(get_model_router().default_tier(INTERVIEW_TURN), INTERVIEW_TEMPERATURE)
+    for interview in interviews:
+        job_offer = {"entreprise": "Acme", "poste": "Développeur Python backend",
+                     "description": interview["job_description"]}
+        processor = InterviewProcessor(cv_document, job_offer, [])
+
+        full_prompt = processor.system_prompt_template.format(
+            entreprise=job_offer["entreprise"], poste=job_offer["poste"],
+            description=job_offer["description"], cv=cv.formatted
+        )
+        started = time.perf_counter()
+        plan = generate_plan(cv, job_offer)
+        plan_seconds = time.perf_counter() - started
+        with open(os.path.join(ROOT, "prompts", "rag_prompt_plan.txt"), encoding="utf-8") as f:
+            plan_prompt = f.read().format(entreprise=job_offer["entreprise"], poste=job_offer["poste"],
+                                          plan=render_plan(plan))
+
+        full_latency = turn_latencies(llm, full_prompt, interview["conversation"], args.turns)
+        plan_latency = turn_latencies(llm, plan_prompt, interview["conversation"], args.turns)
+        print(
+            f"{interview['name']}: prompt système {count_tokens(full_prompt)} -> {count_tokens(plan_prompt)} tokens "
+            f"| plan généré en {plan_seconds:.1f}s ({len(plan.questions)} questions) "
+            f"| latence médiane par tour {statistics.median(full_latency):.2f}s -> {statistics.median(plan_latency):.2f}s"
+        )
+
+
+if __name__ == "__main__":
+    main()
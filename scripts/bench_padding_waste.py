@@ -0,0 +1,79 @@
+"""
+Coût en tokens de l'analyse de sentiment / d'intention, avant et après
+ChunkedTextPreprocessor.
+
+Avant : configuration d'origine, pipelines appelés avec `batch_size=1` (une
+passe par réponse, donc aucun padding) et sans troncature : une réponse de plus
+de 512 tokens fait échouer l'appel. Après : découpage en fenêtres et batches
+triés par longueur. La ligne « batché sans tri » (ordre d'arrivée, troncature
+à 512 tokens) montre le padding qu'ajouterait un batching naïf ; ce n'est pas
+la configuration d'origine.
+
+Usage :
+    python scripts/bench_padding_waste.py [conversations.json] [--batch-size 16]
+
+Le fichier optionnel contient une liste de conversations (liste de messages
+{"role", "content"}). Sans fichier, un jeu synthétique de réponses est utilisé.
+"""
+import os
+import sys
+import json
+import random
+import argparse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from transformers import AutoTokenizer
+
+from src.text_preprocessing import ChunkedTextPreprocessor, padding_waste
+
+SENTIMENT_MODEL = "astrosbd/french_emotion_camembert"
+
+PHRASES = [
+    "J'ai travaillé trois ans sur des pipelines de données en Python.",
+    "Oui.",
+    "Je suis très motivé par ce poste.",
+    "Sur ce projet j'ai mis en place une API FastAPI, des tests et un déploiement continu sur Cloud Run.",
+    "Honnêtement je ne suis pas sûr de bien comprendre la question.",
+]
+
+
+def synthetic_answers(n=200, seed=0):
+    rng = random.Random(seed)
+    return [" ".join(rng.choice(PHRASES) for _ in range(rng.choice([1, 2, 5, 20, 80]))) for _ in range(n)]
+
+
+def load_answers(path):
+    with open(path, "r", encoding="utf-8") as f:
+        conversations = json.load(f)
+    return [m["content"] for conv in conversations for m in conv if m.get("role") == "user"]
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("conversations", nargs="?")
+    parser.add_argument("--batch-size", type=int, default=16)
+    args = parser.parse_args()
+
+    answers = load_answers(args.conversations) if args.conversations else synthetic_answers()
+    tokenizer = AutoTokenizer.from_pretrained(SENTIMENT_MODEL)
+    preprocessor = ChunkedTextPreprocessor(tokenizer, batch_size=args.batch_size)
+
+    specials = tokenizer.num_special_tokens_to_add(pair=False)
+    raw_lengths = [len(ids) + specials for ids in preprocessor.tokenize(answers)]
+    too_long = sum(1 for n in raw_lengths if n > preprocessor.max_length)
+    baseline = padding_waste(raw_lengths, 1, bucketed=False)
+    naive = padding_waste([min(n, preprocessor.max_length) for n in raw_lengths], args.batch_size, bucketed=False)
+
+    chunk_lengths = [len(c.input_ids) + specials for c in preprocessor.chunk(answers)]
+    after = padding_waste(chunk_lengths, args.batch_size, bucketed=True)
+    passes = lambda n, size: -(-n // size)
+
+    print(f"Réponses : {len(answers)} | > {preprocessor.max_length} tokens : {too_long} | fenêtres après : {len(chunk_lengths)}")
+    print(f"Avant (batch_size=1)  : {passes(len(raw_lengths), 1)} passes, {baseline}"
+          f"{f' ; {too_long} réponses en échec' if too_long else ''}")
+    print(f"Batché sans tri       : {passes(len(raw_lengths), args.batch_size)} passes, {naive}")
+    print(f"Après                 : {passes(len(chunk_lengths), args.batch_size)} passes, {after}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,60 @@
+"""
+Taille (tokens) et latence du rapport avant / après l'encodage compact de l'analyse.
+
+Usage :
+    python scripts/bench_report_payload.py [--fixtures scripts/fixtures/interviews.json] [--with-llm]
+
+L'analyse ML est calculée avec MultiModelInterviewAnalyzer sur chaque entretien
+de référence. Avec --with-llm, le crew de rapport est lancé sur les deux
+payloads (nécessite OPENAI_API_KEY, ou OPENAI_BASE_URL vers le serveur factice).
+"""
+import os
+import sys
+import json
+import time
+import argparse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.tokens import count_tokens
+from src.report_payload import encode_analysis_for_report
+
+DEFAULT_FIXTURES = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures", "interviews.json")
+
+
+def run_report(payload: str) -> float:
+    from src.crew.crew_pool import get_crew_pool, REPORT_CREW
+
+    with get_crew_pool(REPORT_CREW).lease() as lease:
+        started = time.perf_counter()
+        lease.crew.kickoff(inputs={"structured_analysis_data": payload})
+        return time.perf_counter() - started
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--fixtures", default=DEFAULT_FIXTURES)
+    parser.add_argument("--with-llm", action="store_true")
+    args = parser.parse_args()
+
+    from src.deep_learning_analyzer import MultiModelInterviewAnalyzer
+    analyzer = MultiModelInterviewAnalyzer()
+
+    with open(args.fixtures, "r", encoding="utf-8") as f:
+        interviews = json.load(f)
+
+    for interview in interviews:
+        analysis = analyzer.run_full_analysis(interview["conversation"], interview["job_description"])
+        before = json.dumps(analysis, indent=2)
+        after = encode_analysis_for_report(analysis)
+        line = (
+            f"{interview['name']}: tokens {count_tokens(before)} -> {count_tokens(after)} "
+            f"| caractères {len(before)} -> {len(after)}"
+        )
+        if args.with_llm:
+            line += f" | latence rapport {run_report(before):.1f}s -> {run_report(after):.1f}s"
+        print(line)
+
+
+if __name__ == "__main__":
+    main()
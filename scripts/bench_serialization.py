@@ -0,0 +1,107 @@
+"""
+Temps de sérialisation et taille de la réponse d'analyse sur de gros entretiens.
+
+Usage :
+    python scripts/bench_serialization.py [--fixtures scripts/fixtures/interviews.json] [--repeat 10] [--runs 50]
+
+Les sorties de `run_full_analysis` sont synthétiques (scores aléatoires, même
+structure que les pipelines) pour isoler la sérialisation des modèles.
+`--repeat` duplique chaque conversation pour simuler des entretiens plus longs.
+Compare l'encodage par défaut de FastAPI (jsonable_encoder + json) à
+FastJSONResponse, sur la sortie complète puis sur les réponses allégées.
+"""
+import os
+import sys
+import json
+import time
+import random
+import argparse
+import statistics
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fastapi.encoders import jsonable_encoder
+
+from src.intent_engines import INTENT_LABELS
+from src.deep_learning_analyzer import split_sentences
+from src.responses import AnalysisResult, dumps_bytes, orjson
+
+DEFAULT_FIXTURES = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures", "interviews.json")
+EMOTION_LABELS = ["joy", "sadness", "anger", "fear", "surprise", "love", "neutral"]
+
+
+def _scores(rng, n):
+    raw = [rng.random() for _ in range(n)]
+    total = sum(raw)
+    return [r / total for r in raw]
+
+
+def synthetic_analysis(conversation, job_description, rng):
+    answers = [m["content"] for m in conversation if m["role"] == "user"]
+    sentiments = [
+        [{"label": label, "score": score} for label, score in zip(EMOTION_LABELS, _scores(rng, len(EMOTION_LABELS)))]
+        for _ in answers
+    ]
+    intents = []
+    for answer in answers:
+        pairs = sorted(zip(INTENT_LABELS, _scores(rng, len(INTENT_LABELS))), key=lambda p: -p[1])
+        intents.append({"sequence": answer, "labels": [p[0] for p in pairs], "scores": [p[1] for p in pairs]})
+    requirements = [
+        {"requirement": r, "best_answer": rng.choice(answers), "turn": rng.randrange(len(answers)), "score": round(rng.random(), 3)}
+        for r in split_sentences(job_description)
+    ]
+    return {
+        "overall_similarity_score": 0.61,
+        "requirement_coverage": {"aggregate_score": 0.61, "coverage_ratio": 0.5, "requirements": requirements},
+        "sentiment_analysis": sentiments,
+        "intent_analysis": intents,
+        "raw_transcript": conversation,
+        "models_status": {"sentiment_available": True, "similarity_available": True, "intent_available": True,
+                          "intent_engine": "zero-shot", "models_loaded": True},
+    }
+
+
+def default_fastapi(content):
+    return json.dumps(jsonable_encoder(content), ensure_ascii=False, allow_nan=False,
+                      separators=(",", ":")).encode("utf-8")
+
+
+def measure(encode, runs):
+    samples, size = [], 0
+    for _ in range(runs):
+        started = time.perf_counter()
+        size = len(encode())
+        samples.append(time.perf_counter() - started)
+    return statistics.median(samples) * 1000, size / 1024
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--fixtures", default=DEFAULT_FIXTURES)
+    parser.add_argument("--repeat", type=int, default=10)
+    parser.add_argument("--runs", type=int, default=50)
+    args = parser.parse_args()
+
+    with open(args.fixtures, "r", encoding="utf-8") as f:
+        interviews = json.load(f)
+
+    rng = random.Random(0)
+    print(f"orjson : {'oui' if orjson else 'non (repli json)'}")
+    for interview in interviews:
+        conversation = interview["conversation"] * args.repeat
+        analysis = synthetic_analysis(conversation, interview["job_description"], rng)
+        variants = {
+            "complet, défaut FastAPI": lambda: default_fastapi(analysis),
+            "complet, FastJSONResponse": lambda: dumps_bytes(analysis),
+            "allégé": lambda: dumps_bytes(AnalysisResult.from_analysis(analysis)),
+            "allégé + scores bruts": lambda: dumps_bytes(AnalysisResult.from_analysis(analysis, include_raw_scores=True)),
+            "allégé + transcription": lambda: dumps_bytes(AnalysisResult.from_analysis(analysis, include_transcript=True)),
+        }
+        print(f"\n{interview['name']} x{args.repeat} ({len(conversation)} messages)")
+        for name, encode in variants.items():
+            ms, kb = measure(encode, args.runs)
+            print(f"  {name:<28} {ms:8.2f} ms  {kb:9.1f} Ko")
+
+
+if __name__ == "__main__":
+    main()
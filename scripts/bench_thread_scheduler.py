@@ -0,0 +1,100 @@
+"""
+Débit et latence de run_full_analysis selon la concurrence et le réglage des threads.
+
+Usage :
+    python scripts/bench_thread_scheduler.py [--concurrency 1,2,4,8] [--intra auto,1,2] [--pin] [--requests 16]
+
+Pour chaque niveau de concurrence, compare :
+  - torch par défaut (pas d'ordonnanceur, threads intra-op = tous les cœurs, modèles en série) ;
+  - l'ordonnanceur avec budgets automatiques (`auto`) ou un nombre fixe de threads intra-op
+    (réglage global de torch, appliqué une fois avant chaque configuration) ;
+  - avec --pin, les mêmes réglages avec épinglage des files sur des cœurs disjoints.
+Les modèles sont chargés une fois ; chaque configuration rejoue `--requests`
+analyses des entretiens de référence.
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import statistics
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import torch
+
+from src.inference_scheduler import InferenceScheduler, available_cores, configure_interop_threads
+from src.deep_learning_analyzer import MultiModelInterviewAnalyzer
+
+DEFAULT_FIXTURES = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures", "interviews.json")
+
+
+def run_config(analyzer, interviews, concurrency, requests):
+    latencies = []
+
+    def one(index):
+        interview = interviews[index % len(interviews)]
+        started = time.perf_counter()
+        analyzer.run_full_analysis(interview["conversation"], interview["job_description"], include_transcript=False)
+        latencies.append(time.perf_counter() - started)
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        list(pool.map(one, range(requests)))
+    elapsed = time.perf_counter() - started
+    latencies.sort()
+    return {
+        "throughput": requests / elapsed,
+        "p50": statistics.median(latencies),
+        "p95": latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--fixtures", default=DEFAULT_FIXTURES)
+    parser.add_argument("--concurrency", default="1,2,4,8")
+    parser.add_argument("--intra", default="auto,1,2")
+    parser.add_argument("--pin", action="store_true")
+    parser.add_argument("--requests", type=int, default=16)
+    args = parser.parse_args()
+
+    with open(args.fixtures, "r", encoding="utf-8") as f:
+        interviews = json.load(f)
+
+    configure_interop_threads()
+    cores = available_cores()
+    default_threads = torch.get_num_threads()
+    inline = InferenceScheduler(enabled=False)
+    analyzer = MultiModelInterviewAnalyzer(scheduler=inline)
+    # Chauffe : chargement des modèles et premier passage
+    run_config(analyzer, interviews, 1, len(interviews))
+    print(f"{cores} cœurs, threads torch par défaut : {default_threads}\n")
+    print(f"{'concurrence':>11} {'réglage':<22} {'analyses/s':>10} {'p50 (s)':>8} {'p95 (s)':>8}")
+
+    for concurrency in [int(c) for c in args.concurrency.split(",")]:
+        configs = [("torch par défaut", inline)]
+        for intra in args.intra.split(","):
+            fixed = None if intra == "auto" else int(intra)
+            for pin in ([False, True] if args.pin else [False]):
+                name = f"ordonnanceur {intra}" + (" épinglé" if pin else "")
+                configs.append((name, InferenceScheduler(
+                    models=analyzer.model_keys, cores=cores, concurrency=concurrency,
+                    pin=pin, intra_op_threads=fixed
+                )))
+
+        for name, scheduler in configs:
+            torch.set_num_threads(default_threads)
+            scheduler.apply_thread_settings()
+            analyzer.scheduler = scheduler
+            result = run_config(analyzer, interviews, concurrency, args.requests)
+            print(f"{concurrency:>11} {name:<22} {result['throughput']:>10.2f} {result['p50']:>8.2f} {result['p95']:>8.2f}"
+                  f"  (threads torch : {torch.get_num_threads()})")
+            if scheduler is not inline:
+                scheduler.shutdown()
+        print()
+
+
+if __name__ == "__main__":
+    main()
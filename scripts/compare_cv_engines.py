@@ -0,0 +1,182 @@
+"""
+Extraction de CV : crew (six agents) contre appel unique à sortie structurée.
+
+Usage :
+    python scripts/compare_cv_engines.py [--cvs scripts/fixtures/cvs] [--runs 1]
+
+Chaque CV de référence est un couple `<nom>.txt` (ou `<nom>.pdf`) et
+`<nom>.json` (profil attendu, même format que /parse-cv/). Le jeu fourni varie
+la longueur (un CV senior dépasse le seuil du modèle rapide), la langue (un CV
+en anglais), la mise en page (texte extrait d'un PDF à deux colonnes) et la
+présence de projets. Pour chaque moteur :
+latence, tokens (prompt + complétion, d'après les métadonnées d'usage) et
+exactitude par champ :
+  - informations personnelles : égalité après normalisation (casse, espaces, chiffres du téléphone) ;
+  - compétences, projets (titres), formations (diplômes) : F1 sur les ensembles ;
+  - expériences : F1 sur les couples (poste, entreprise), puis exactitude des dates des expériences appariées.
+Nécessite OPENAI_API_KEY.
+"""
+import os
+import re
+import sys
+import json
+import time
+import argparse
+import statistics
+import unicodedata
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from src.cv_document import canonical_cv
+from src.cv_parsing_agents import CvParserAgent
+from src.cv_extraction import Candidat, extraction_messages
+from src.model_router import get_model_router, chat_model, CV_EXTRACTION
+from src.tokens import count_tokens
+
+DEFAULT_FIXTURES = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures", "cvs")
+
+
+def normalize(value) -> str:
+    text = unicodedata.normalize("NFKD", str(value or "")).encode("ascii", "ignore").decode()
+    return re.sub(r"\s+", " ", text).strip().casefold()
+
+
+def f1(predicted, expected) -> float:
+    predicted, expected = set(filter(None, predicted)), set(filter(None, expected))
+    if not predicted and not expected:
+        return 1.0
+    overlap = len(predicted & expected)
+    if not overlap:
+        return 0.0
+    precision, recall = overlap / len(predicted), overlap / len(expected)
+    return 2 * precision * recall / (precision + recall)
+
+
+def field_scores(predicted: dict, expected: dict) -> dict:
+    scores = {}
+    info_p = predicted.get("informations_personnelles", {}) or {}
+    info_e = expected.get("informations_personnelles", {}) or {}
+    for key in ("nom", "email", "localisation"):
+        scores[key] = float(normalize(info_p.get(key)) == normalize(info_e.get(key)))
+    digits = lambda v: re.sub(r"\D", "", str(v or ""))
+    scores["numero_de_telephone"] = float(digits(info_p.get("numero_de_telephone")) == digits(info_e.get("numero_de_telephone")))
+
+    skills_p = predicted.get("compétences", {}) or {}
+    skills_e = expected.get("compétences", {}) or {}
+    for key in ("hard_skills", "soft_skills"):
+        scores[key] = f1(map(normalize, skills_p.get(key, [])), map(normalize, skills_e.get(key, [])))
+
+    exp_key = lambda e: (normalize(e.get("Poste")), normalize(e.get("Entreprise")))
+    experiences_p = {exp_key(e): e for e in predicted.get("expériences", []) or [] if isinstance(e, dict)}
+    experiences_e = {exp_key(e): e for e in expected.get("expériences", []) or [] if isinstance(e, dict)}
+    scores["expériences"] = f1(experiences_p, experiences_e)
+    matched = [(experiences_p[k], experiences_e[k]) for k in experiences_p.keys() & experiences_e.keys()]
+    scores["dates"] = (
+        statistics.mean(
+            float(normalize(p.get(d)) == normalize(e.get(d))) for p, e in matched for d in ("start_date", "end_date")
+        ) if matched else 0.0
+    )
+
+    titles = lambda projects: [normalize(p.get("title")) for group in ("professional", "personal")
+                               for p in (projects or {}).get(group, []) or [] if isinstance(p, dict)]
+    scores["projets"] = f1(titles(predicted.get("projets")), titles(expected.get("projets")))
+    degrees = lambda formations: [normalize(f.get("degree")) for f in formations or [] if isinstance(f, dict)]
+    scores["formations"] = f1(degrees(predicted.get("formations")), degrees(expected.get("formations")))
+    return scores
+
+
+def run_crew(cv_text: str):
+    from src.crew.crew_pool import analyse_cv
+    started = time.perf_counter()
+    output = analyse_cv(cv_text)
+    seconds = time.perf_counter() - started
+    usage = getattr(output, "token_usage", None)
+    tokens = (getattr(usage, "prompt_tokens", 0), getattr(usage, "completion_tokens", 0))
+    profile = CvParserAgent(pdf_path=None).parse_crew_output(output, cv_text)
+    return profile, seconds, tokens
+
+
+def run_structured(cv_text: str):
+    # Même prompt, même schéma et même routage que extract_cv_structured ; include_raw donne l'usage en tokens
+    messages = extraction_messages(cv_text)
+    decision = get_model_router().route(CV_EXTRACTION, sum(count_tokens(m.content) for m in messages))
+    extractor = chat_model(decision.tier, 0.0).with_structured_output(Candidat, include_raw=True)
+    started = time.perf_counter()
+    output = extractor.invoke(messages)
+    seconds = time.perf_counter() - started
+    if output.get("parsing_error") is not None:
+        raise RuntimeError(output["parsing_error"])
+    usage = getattr(output["raw"], "usage_metadata", None) or {}
+    tokens = (usage.get("input_tokens", 0), usage.get("output_tokens", 0))
+    profile = canonical_cv({"candidat": output["parsed"].dict(by_alias=True)}).to_dict()
+    return profile, seconds, tokens
+
+
+def load_fixtures(directory: str):
+    from src.config import load_pdf
+    fixtures = []
+    for name in sorted(os.listdir(directory)):
+        stem, ext = os.path.splitext(name)
+        if ext not in (".txt", ".pdf"):
+            continue
+        path = os.path.join(directory, name)
+        if ext == ".pdf":
+            text = load_pdf(path)
+        else:
+            with open(path, "r", encoding="utf-8") as f:
+                text = f.read()
+        with open(os.path.join(directory, stem + ".json"), "r", encoding="utf-8") as f:
+            expected = json.load(f)
+        fixtures.append((stem, text, expected.get("candidat", expected)))
+    return fixtures
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--cvs", default=DEFAULT_FIXTURES)
+    parser.add_argument("--runs", type=int, default=1)
+    args = parser.parse_args()
+    os.chdir(ROOT)
+
+    fixtures = load_fixtures(args.cvs)
+    engines = {"crew": run_crew, "structured": run_structured}
+    totals = {engine: {"seconds": [], "prompt": [], "completion": [], "scores": []} for engine in engines}
+
+    for name, text, expected in fixtures:
+        print(f"{name} : {count_tokens(text)} tokens")
+        for engine, run in engines.items():
+            for _ in range(args.runs):
+                try:
+                    profile, seconds, (prompt_tokens, completion_tokens) = run(text)
+                except Exception as e:
+                    print(f"{name} [{engine}] échec : {e}")
+                    continue
+                scores = field_scores(profile["candidat"], expected)
+                totals[engine]["seconds"].append(seconds)
+                totals[engine]["prompt"].append(prompt_tokens)
+                totals[engine]["completion"].append(completion_tokens)
+                totals[engine]["scores"].append(scores)
+                print(f"{name} [{engine}] {seconds:.1f}s, {prompt_tokens}+{completion_tokens} tokens, "
+                      f"exactitude moyenne {statistics.mean(scores.values()):.2f}")
+
+    print(f"\n{'moteur':<11} {'latence méd. (s)':>16} {'tokens prompt':>13} {'tokens compl.':>13} {'exactitude':>10}")
+    for engine, total in totals.items():
+        if not total["seconds"]:
+            continue
+        accuracy = statistics.mean(statistics.mean(s.values()) for s in total["scores"])
+        print(f"{engine:<11} {statistics.median(total['seconds']):>16.1f} {statistics.mean(total['prompt']):>13.0f} "
+              f"{statistics.mean(total['completion']):>13.0f} {accuracy:>10.2f}")
+
+    print("\nExactitude par champ :")
+    fields = next((list(t["scores"][0]) for t in totals.values() if t["scores"]), [])
+    for field in fields:
+        row = "  ".join(
+            f"{engine} {statistics.mean(s[field] for s in total['scores']):.2f}"
+            for engine, total in totals.items() if total["scores"]
+        )
+        print(f"  {field:<20} {row}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,114 @@
+"""
+Serveur LLM factice compatible OpenAI (/v1/chat/completions) avec injection de latence.
+
+Permet de tester ResilientLLM (deadlines, retries, hedging, disjoncteur) et de
+faire tourner l'API sans clé réelle :
+
+    python scripts/fake_llm_server.py --port 8765 --latency-ms 300 --slow-rate 0.05 --slow-ms 20000
+    OPENAI_BASE_URL=http://127.0.0.1:8765/v1 OPENAI_API_KEY=fake uvicorn main:app
+
+Les paramètres peuvent aussi être modifiés à chaud via POST /admin/config.
+"""
+import os
+import time
+import uuid
+import random
+import asyncio
+import argparse
+from typing import Any, Dict
+
+import uvicorn
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse
+
+CONFIG: Dict[str, float] = {
+    "latency_ms": float(os.getenv("FAKE_LLM_LATENCY_MS", "200")),
+    "jitter_ms": float(os.getenv("FAKE_LLM_JITTER_MS", "50")),
+    "slow_rate": float(os.getenv("FAKE_LLM_SLOW_RATE", "0")),
+    "slow_ms": float(os.getenv("FAKE_LLM_SLOW_MS", "15000")),
+    "error_rate": float(os.getenv("FAKE_LLM_ERROR_RATE", "0")),
+}
+STATS = {"requests": 0, "slow": 0, "errors": 0}
+
+CANNED_REPLY = (
+    "D'accord, je vois. Racontez-moi un peu votre dernier projet et les technologies que vous avez utilisées."
+)
+CANNED_JSON_REPLY = (
+    '{"candidat": {"informations_personnelles": {"nom": "Jean Test", "email": "jean@test.fr", '
+    '"numero_de_telephone": "0600000000", "localisation": "Paris"}, '
+    '"compétences": {"hard_skills": ["Python"], "soft_skills": ["Rigueur"]}, '
+    '"expériences": [], "projets": {"professional": [], "personal": []}, "formations": []}}'
+)
+
+app = FastAPI(title="Fake LLM")
+
+
+def _estimate_tokens(payload: Dict[str, Any]) -> int:
+    text = "".join(str(m.get("content", "")) for m in payload.get("messages", []))
+    return max(1, len(text) // 4)
+
+
+@app.post("/v1/chat/completions")
+async def chat_completions(request: Request):
+    payload = await request.json()
+    STATS["requests"] += 1
+
+    delay = CONFIG["latency_ms"] + random.uniform(0, CONFIG["jitter_ms"])
+    if random.random() < CONFIG["slow_rate"]:
+        STATS["slow"] += 1
+        delay = CONFIG["slow_ms"]
+    await asyncio.sleep(delay / 1000)
+
+    if random.random() < CONFIG["error_rate"]:
+        STATS["errors"] += 1
+        return JSONResponse(status_code=503, content={"error": {"message": "injected failure", "type": "server_error"}})
+
+    prompt = " ".join(str(m.get("content", "")) for m in payload.get("messages", []))
+    content = CANNED_JSON_REPLY if "candidat" in prompt and "JSON" in prompt else CANNED_REPLY
+    prompt_tokens = _estimate_tokens(payload)
+    completion_tokens = len(content) // 4
+    return {
+        "id": f"chatcmpl-{uuid.uuid4().hex}",
+        "object": "chat.completion",
+        "created": int(time.time()),
+        "model": payload.get("model", "fake"),
+        "choices": [{
+            "index": 0,
+            "message": {"role": "assistant", "content": content},
+            "finish_reason": "stop",
+        }],
+        "usage": {
+            "prompt_tokens": prompt_tokens,
+            "completion_tokens": completion_tokens,
+            "total_tokens": prompt_tokens + completion_tokens,
+        },
+    }
+
+
+@app.post("/admin/config")
+async def update_config(values: Dict[str, float]):
+    CONFIG.update({k: float(v) for k, v in values.items() if k in CONFIG})
+    return CONFIG
+
+
+@app.get("/admin/stats")
+async def stats():
+    return {"config": CONFIG, "stats": STATS}
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    for key in CONFIG:
+        parser.add_argument(f"--{key.replace('_', '-')}", type=float, default=None)
+    args = parser.parse_args()
+    for key in CONFIG:
+        value = getattr(args, key)
+        if value is not None:
+            CONFIG[key] = value
+    uvicorn.run(app, host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+"""
+Accord entre le moteur d'intention par embeddings et le zero-shot XLM-R actuel.
+
+Usage :
+    python scripts/intent_agreement_report.py [--fixtures scripts/fixtures/interviews.json]
+                                              [--train-head intent_head.npz]
+
+Les labels zero-shot servent de référence ; les résultats de repli (`unknown`,
+`error`) sont comptés dans une colonne « hors labels » et exclus de
+l'entraînement. Avec --train-head, une tête linéaire
+est distillée sur la première moitié des réponses (labels zero-shot) puis
+évaluée sur la seconde ; le fichier produit s'utilise via INTENT_HEAD_PATH.
+"""
+import os
+import sys
+import json
+import argparse
+from collections import Counter
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+
+from src.deep_learning_analyzer import MultiModelInterviewAnalyzer, sentence_embedding_cache
+from src.intent_engines import (
+    INTENT_LABELS, ZERO_SHOT_ENGINE, EmbeddingIntentClassifier,
+    train_linear_head, save_linear_head
+)
+
+DEFAULT_FIXTURES = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures", "interviews.json")
+OTHER = "hors labels"  # unknown / error : modèle indisponible ou réponse en échec
+
+
+def bucket(label):
+    return label if label in INTENT_LABELS else OTHER
+
+
+def report(name, reference, predicted):
+    reference, predicted = [bucket(r) for r in reference], [bucket(p) for p in predicted]
+    agreement = np.mean([r == p for r, p in zip(reference, predicted)]) if reference else 0.0
+    print(f"\n== {name} : accord {agreement:.1%} sur {len(reference)} réponses")
+    confusion = Counter(zip(reference, predicted))
+    labels = INTENT_LABELS + [OTHER]
+    width = max(len(label) for label in labels)
+    print(" " * (width + 2) + " | ".join(f"P{i}" for i in range(len(labels))))
+    for i, label in enumerate(labels):
+        row = " | ".join(f"{confusion[(label, other)]:>2}" for other in labels)
+        print(f"{label:<{width}}  {row}   (P{i})")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--fixtures", default=DEFAULT_FIXTURES)
+    parser.add_argument("--train-head")
+    args = parser.parse_args()
+
+    with open(args.fixtures, "r", encoding="utf-8") as f:
+        interviews = json.load(f)
+    answers = list(dict.fromkeys(
+        m["content"] for interview in interviews for m in interview["conversation"] if m["role"] == "user"
+    ))
+
+    analyzer = MultiModelInterviewAnalyzer(intent_engine=ZERO_SHOT_ENGINE)
+    messages = [{"role": "user", "content": a} for a in answers]
+    reference = [r["labels"][0] for r in analyzer.classify_candidate_intent(messages)]
+
+    vectors = analyzer.embed_answers(answers)
+    # Classifieur local sans tête : le singleton partagé par l'analyseur n'est pas modifié
+    prototypes = EmbeddingIntentClassifier.from_encoder(
+        lambda texts: sentence_embedding_cache.encode(analyzer.similarity_model, texts), head_path=None
+    )
+    report("Prototypes", reference, [r["labels"][0] for r in prototypes.classify_vectors(answers, vectors)])
+
+    if args.train_head:
+        labelled = [i for i, label in enumerate(reference) if label in INTENT_LABELS]
+        if not labelled:
+            print("\nAucune réponse étiquetée par le zero-shot : tête non entraînée")
+            return
+        split = max(1, len(labelled) // 2)
+        train, held_out = labelled[:split], labelled[split:]
+        targets = [INTENT_LABELS.index(reference[i]) for i in train]
+        head = train_linear_head(vectors[train], targets, len(INTENT_LABELS))
+        save_linear_head(args.train_head, head, INTENT_LABELS)
+        classifier = EmbeddingIntentClassifier(prototypes.prototypes, INTENT_LABELS, head=head)
+        predicted = classifier.classify_vectors([answers[i] for i in held_out], vectors[held_out])
+        report("Tête linéaire (validation)", [reference[i] for i in held_out], [r["labels"][0] for r in predicted])
+        print(f"\nTête sauvegardée dans {args.train_head}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,264 @@
+"""
+Test d'endurance : trafic mixte /parse-cv/ + /simulate-interview/ contre le serveur
+LLM factice, avec détection de fuites de ressources.
+
+    python scripts/soak_test.py --duration 4h --concurrency 4 [--parse-ratio 0.3]
+
+Lance le serveur LLM factice et l'API (uvicorn) dans des sous-processus, l'API
+avec un TMPDIR dédié. Toutes les `--sample-interval` secondes, relève pour le
+processus de l'API : RSS, descripteurs ouverts, threads, et fichiers/octets sous
+son TMPDIR. Après la période de chauffe, la croissance de chaque métrique
+(médiane du dernier quart - médiane du premier quart) est comparée à son seuil :
+le script sort en erreur si l'une d'elles le dépasse.
+
+Avec --api-url et --api-pid, le trafic vise une API déjà lancée (le serveur
+factice n'est alors pas démarré, --tmp-dir indique le répertoire à surveiller).
+Linux uniquement (lecture de /proc).
+"""
+import os
+import sys
+import json
+import time
+import random
+import signal
+import argparse
+import tempfile
+import statistics
+import subprocess
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+FIXTURES = os.path.join(ROOT, "scripts", "fixtures", "interviews.json")
+
+DEFAULT_THRESHOLDS = {
+    "rss_mb": 150.0,
+    "fds": 20,
+    "threads": 10,
+    "tmp_files": 20,
+    "tmp_mb": 50.0,
+}
+
+CV_DOCUMENT = {
+    "candidat": {
+        "informations_personnelles": {"nom": "Jean Test", "email": "jean@test.fr", "localisation": "Paris"},
+        "compétences": {"hard_skills": ["Python", "FastAPI", "SQL"], "soft_skills": ["Rigueur"]},
+        "expériences": [{"Poste": "Développeur backend", "Entreprise": "Acme",
+                         "responsabilités": ["API REST", "Déploiement Cloud Run"]}],
+        "projets": {"professional": [], "personal": []},
+        "formations": [],
+    }
+}
+
+
+def parse_duration(value: str) -> float:
+    units = {"s": 1, "m": 60, "h": 3600}
+    if value[-1] in units:
+        return float(value[:-1]) * units[value[-1]]
+    return float(value)
+
+
+def minimal_pdf(text: str) -> bytes:
+    """PDF d'une page contenant `text`, suffisant pour PyPDFLoader."""
+    stream = f"BT /F1 12 Tf 72 720 Td ({text}) Tj ET".encode("latin-1")
+    objects = [
+        b"<< /Type /Catalog /Pages 2 0 R >>",
+        b"<< /Type /Pages /Kids [3 0 R] /Count 1 >>",
+        b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] /Contents 4 0 R "
+        b"/Resources << /Font << /F1 5 0 R >> >> >>",
+        b"<< /Length " + str(len(stream)).encode() + b" >>\nstream\n" + stream + b"\nendstream",
+        b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>",
+    ]
+    out = bytearray(b"%PDF-1.4\n")
+    offsets = []
+    for number, body in enumerate(objects, start=1):
+        offsets.append(len(out))
+        out += f"{number} 0 obj\n".encode() + body + b"\nendobj\n"
+    xref = len(out)
+    out += f"xref\n0 {len(objects) + 1}\n0000000000 65535 f \n".encode()
+    out += b"".join(f"{offset:010d} 00000 n \n".encode() for offset in offsets)
+    out += f"trailer\n<< /Size {len(objects) + 1} /Root 1 0 R >>\nstartxref\n{xref}\n%%EOF\n".encode()
+    return bytes(out)
+
+
+def sample_process(pid: int, tmp_dir: str) -> dict:
+    with open(f"/proc/{pid}/status") as f:
+        status = dict(line.split(":", 1) for line in f if ":" in line)
+    tmp_files, tmp_bytes = 0, 0
+    for root, _, files in os.walk(tmp_dir):
+        for name in files:
+            try:
+                tmp_bytes += os.path.getsize(os.path.join(root, name))
+                tmp_files += 1
+            except OSError:
+                pass
+    return {
+        "time": time.time(),
+        "rss_mb": int(status["VmRSS"].split()[0]) / 1024,
+        "threads": int(status["Threads"]),
+        "fds": len(os.listdir(f"/proc/{pid}/fd")),
+        "tmp_files": tmp_files,
+        "tmp_mb": tmp_bytes / 1e6,
+    }
+
+
+def growth(samples: list, metric: str) -> float:
+    quarter = max(1, len(samples) // 4)
+    first = statistics.median(s[metric] for s in samples[:quarter])
+    last = statistics.median(s[metric] for s in samples[-quarter:])
+    return last - first
+
+
+class TrafficStats:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.counts = {}
+
+    def record(self, endpoint: str, status: int):
+        with self.lock:
+            key = f"{endpoint}:{status}"
+            self.counts[key] = self.counts.get(key, 0) + 1
+
+
+def drive(api_url: str, deadline: float, parse_ratio: float, interviews: list, stats: TrafficStats, seed: int):
+    rng = random.Random(seed)
+    session = requests.Session()
+    pdf = minimal_pdf("Jean Test - Developpeur Python - FastAPI, SQL, Cloud Run")
+    while time.time() < deadline:
+        try:
+            if rng.random() < parse_ratio:
+                response = session.post(
+                    f"{api_url}/parse-cv/", files={"file": ("cv.pdf", pdf, "application/pdf")}, timeout=600
+                )
+                stats.record("parse-cv", response.status_code)
+            else:
+                interview = rng.choice(interviews)
+                cut = rng.randrange(1, len(interview["conversation"]))
+                history = interview["conversation"][:cut]
+                response = session.post(f"{api_url}/simulate-interview/", json={
+                    "cv_document": CV_DOCUMENT,
+                    "job_offer": {"poste": "Développeur Python", "entreprise": "Acme",
+                                  "description": interview["job_description"]},
+                    "conversation_history": history,
+                    "messages": [{"role": "user", "content": "Pouvez-vous préciser la question ?"}],
+                }, timeout=600)
+                stats.record("simulate-interview", response.status_code)
+        except requests.RequestException as e:
+            stats.record(type(e).__name__, 0)
+
+
+def wait_until_ready(url: str, timeout: float):
+    started = time.time()
+    while time.time() - started < timeout:
+        try:
+            if requests.get(url, timeout=5).status_code == 200:
+                return
+        except requests.RequestException:
+            pass
+        time.sleep(1)
+    raise RuntimeError(f"{url} ne répond pas après {timeout:.0f}s")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--duration", default="1h", help="ex. 4h, 30m, 600")
+    parser.add_argument("--warmup", default="5m")
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--parse-ratio", type=float, default=0.3)
+    parser.add_argument("--sample-interval", type=float, default=15)
+    parser.add_argument("--api-port", type=int, default=8090)
+    parser.add_argument("--llm-port", type=int, default=8765)
+    parser.add_argument("--llm-latency-ms", type=float, default=200)
+    parser.add_argument("--llm-slow-rate", type=float, default=0.02)
+    parser.add_argument("--llm-error-rate", type=float, default=0.01)
+    parser.add_argument("--api-url", help="API déjà lancée (nécessite --api-pid)")
+    parser.add_argument("--api-pid", type=int)
+    parser.add_argument("--tmp-dir", default=None)
+    parser.add_argument("--output", default="soak_samples.jsonl")
+    for metric, threshold in DEFAULT_THRESHOLDS.items():
+        parser.add_argument(f"--max-{metric.replace('_', '-')}-growth", type=float, default=threshold)
+    args = parser.parse_args()
+
+    duration, warmup = parse_duration(args.duration), parse_duration(args.warmup)
+    with open(FIXTURES, "r", encoding="utf-8") as f:
+        interviews = json.load(f)
+
+    processes = []
+    tmp_dir = args.tmp_dir or tempfile.mkdtemp(prefix="soak_tmp_")
+    if args.api_url:
+        if not args.api_pid:
+            parser.error("--api-url nécessite --api-pid")
+        api_url, api_pid = args.api_url.rstrip("/"), args.api_pid
+    else:
+        processes.append(subprocess.Popen([
+            sys.executable, os.path.join(ROOT, "scripts", "fake_llm_server.py"), "--port", str(args.llm_port),
+            "--latency-ms", str(args.llm_latency_ms), "--slow-rate", str(args.llm_slow_rate),
+            "--error-rate", str(args.llm_error_rate),
+        ], cwd=ROOT))
+        env = dict(
+            os.environ,
+            OPENAI_BASE_URL=f"http://127.0.0.1:{args.llm_port}/v1",
+            OPENAI_API_KEY="soak-test",
+            GROQ_API_KEY="",
+            TMPDIR=tmp_dir,
+            CREW_STORAGE_DIR=os.path.join(tmp_dir, "crew"),
+        )
+        api = subprocess.Popen([
+            sys.executable, "-m", "uvicorn", "main:app", "--port", str(args.api_port), "--log-level", "warning"
+        ], cwd=ROOT, env=env)
+        processes.append(api)
+        api_url, api_pid = f"http://127.0.0.1:{args.api_port}", api.pid
+
+    try:
+        wait_until_ready(f"{api_url}/", timeout=600)
+        stats = TrafficStats()
+        started = time.time()
+        deadline = started + duration
+        samples = []
+        with ThreadPoolExecutor(max_workers=args.concurrency) as pool, open(args.output, "w") as out:
+            for worker in range(args.concurrency):
+                pool.submit(drive, api_url, deadline, args.parse_ratio, interviews, stats, worker)
+            while time.time() < deadline:
+                time.sleep(args.sample_interval)
+                sample = sample_process(api_pid, tmp_dir)
+                sample["elapsed"] = round(sample["time"] - started, 1)
+                out.write(json.dumps(sample) + "\n")
+                out.flush()
+                if sample["elapsed"] >= warmup:
+                    samples.append(sample)
+                print(
+                    f"[{sample['elapsed']:>7.0f}s] rss={sample['rss_mb']:.0f}Mo fds={sample['fds']} "
+                    f"threads={sample['threads']} tmp={sample['tmp_files']} fichiers/{sample['tmp_mb']:.1f}Mo"
+                )
+    finally:
+        for process in reversed(processes):
+            process.send_signal(signal.SIGINT)
+            try:
+                process.wait(timeout=30)
+            except subprocess.TimeoutExpired:
+                process.kill()
+
+    print(f"\nRequêtes : {stats.counts}")
+    if len(samples) < 8:
+        print("Pas assez d'échantillons après la chauffe pour conclure")
+        sys.exit(2)
+
+    failures = []
+    for metric in DEFAULT_THRESHOLDS:
+        limit = getattr(args, f"max_{metric}_growth")
+        delta = growth(samples, metric)
+        verdict = "OK" if delta <= limit else "FUITE"
+        print(f"{metric:<10} croissance {delta:+10.2f} (seuil {limit}) {verdict}")
+        if delta > limit:
+            failures.append(metric)
+
+    if failures:
+        print(f"Échec : croissance anormale de {', '.join(failures)}")
+        sys.exit(1)
+    print("Aucune tendance à la hausse au-delà des seuils")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,210 @@
+import os
+import math
+import time
+import asyncio
+import logging
+import functools
+import contextvars
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+# Classes d'endpoints (priorité 0 = la plus haute)
+INTERACTIVE = "interactive"
+BATCH = "batch"
+
+
+class AdmissionRejected(Exception):
+    """Requête refusée par le gouverneur (file pleine ou attente trop longue)."""
+
+    def __init__(self, status_code: int, retry_after: int, detail: str):
+        super().__init__(detail)
+        self.status_code = status_code
+        self.retry_after = retry_after
+        self.detail = detail
+
+    def to_http_exception(self):
+        from fastapi import HTTPException
+        return HTTPException(
+            status_code=self.status_code,
+            detail=self.detail,
+            headers={"Retry-After": str(self.retry_after)}
+        )
+
+
+class EndpointLimiter:
+    """Pool de threads dédié et compteurs d'admission pour une classe d'endpoints."""
+
+    def __init__(self, name: str, priority: int, max_concurrency: int, max_queue: int, queue_timeout: float):
+        self.name = name
+        self.priority = priority
+        self.max_concurrency = max(1, max_concurrency)
+        self.max_queue = max(0, max_queue)
+        self.queue_timeout = queue_timeout
+        self.executor = ThreadPoolExecutor(max_workers=self.max_concurrency, thread_name_prefix=f"{name}-worker")
+
+        self.in_flight = 0
+        self.waiting = 0
+        self.admitted = 0
+        self.rejected_queue_full = 0
+        self.rejected_timeout = 0
+        self.avg_service_seconds = 1.0
+
+    def record_duration(self, seconds: float, alpha: float = 0.2):
+        self.avg_service_seconds = (1 - alpha) * self.avg_service_seconds + alpha * seconds
+
+    def retry_after(self) -> int:
+        """Estimation du temps avant qu'un slot se libère."""
+        backlog = (self.waiting + 1) / self.max_concurrency
+        return max(1, math.ceil(self.avg_service_seconds * backlog))
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "priority": self.priority,
+            "in_flight": self.in_flight,
+            "waiting": self.waiting,
+            "max_concurrency": self.max_concurrency,
+            "max_queue": self.max_queue,
+            "utilisation": round(self.in_flight / self.max_concurrency, 3),
+            "admitted": self.admitted,
+            "rejected_queue_full": self.rejected_queue_full,
+            "rejected_timeout": self.rejected_timeout,
+            "avg_service_seconds": round(self.avg_service_seconds, 3),
+        }
+
+
+class ConcurrencyGovernor:
+    """
+    Contrôle d'admission par classe d'endpoints.
+
+    Chaque classe a son propre pool de threads borné : un afflux de /parse-cv/
+    ne peut plus occuper les threads des tours d'entretien ni ceux du
+    threadpool Starlette (/health). Une limite globale borne l'occupation CPU
+    totale, et une classe ne peut pas admettre de nouvelle requête tant qu'une
+    classe plus prioritaire a des requêtes en attente.
+    """
+
+    def __init__(self, limiters: Dict[str, EndpointLimiter], max_total_in_flight: Optional[int] = None):
+        self.limiters = limiters
+        self.max_total_in_flight = max_total_in_flight or sum(l.max_concurrency for l in limiters.values())
+        self._condition: Optional[asyncio.Condition] = None
+
+    @property
+    def total_in_flight(self) -> int:
+        return sum(l.in_flight for l in self.limiters.values())
+
+    def _get_condition(self) -> asyncio.Condition:
+        if self._condition is None:
+            self._condition = asyncio.Condition()
+        return self._condition
+
+    def _can_admit(self, limiter: EndpointLimiter) -> bool:
+        if limiter.in_flight >= limiter.max_concurrency:
+            return False
+        if self.total_in_flight >= self.max_total_in_flight:
+            return False
+        return not any(
+            other.waiting > 0 for other in self.limiters.values() if other.priority < limiter.priority
+        )
+
+    async def _admit(self, limiter: EndpointLimiter):
+        condition = self._get_condition()
+        async with condition:
+            if limiter.waiting == 0 and self._can_admit(limiter):
+                limiter.in_flight += 1
+                limiter.admitted += 1
+                return
+
+            if limiter.waiting >= limiter.max_queue:
+                limiter.rejected_queue_full += 1
+                raise AdmissionRejected(429, limiter.retry_after(), f"Trop de requêtes '{limiter.name}' en attente")
+
+            limiter.waiting += 1
+            try:
+                await asyncio.wait_for(condition.wait_for(lambda: self._can_admit(limiter)), limiter.queue_timeout)
+                limiter.in_flight += 1
+                limiter.admitted += 1
+            except asyncio.TimeoutError:
+                limiter.rejected_timeout += 1
+                raise AdmissionRejected(503, limiter.retry_after(), f"Service saturé pour '{limiter.name}'")
+            finally:
+                limiter.waiting -= 1
+                condition.notify_all()
+
+    async def _release(self, limiter: EndpointLimiter, duration: float):
+        condition = self._get_condition()
+        async with condition:
+            limiter.in_flight -= 1
+            limiter.record_duration(duration)
+            condition.notify_all()
+
+    async def run(self, class_name: str, func: Callable, *args, **kwargs):
+        """
+        Exécute `func` dans le pool de la classe après admission.
+
+        Le slot n'est libéré que lorsque le thread a réellement terminé : un
+        `asyncio.wait_for` expiré côté endpoint ne libère pas une capacité
+        encore occupée.
+        """
+        limiter = self.limiters[class_name]
+        await self._admit(limiter)
+
+        loop = asyncio.get_running_loop()
+        context = contextvars.copy_context()
+        started = time.monotonic()
+
+        def on_done(_):
+            duration = time.monotonic() - started
+            try:
+                asyncio.run_coroutine_threadsafe(self._release(limiter, duration), loop)
+            except RuntimeError:
+                limiter.in_flight -= 1  # boucle fermée (arrêt du serveur)
+
+        try:
+            future = limiter.executor.submit(functools.partial(context.run, func, *args, **kwargs))
+        except Exception:
+            await self._release(limiter, 0.0)
+            raise
+        future.add_done_callback(on_done)
+        return await asyncio.wrap_future(future)
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "total_in_flight": self.total_in_flight,
+            "max_total_in_flight": self.max_total_in_flight,
+            "utilisation": round(self.total_in_flight / self.max_total_in_flight, 3),
+            "classes": {name: limiter.snapshot() for name, limiter in self.limiters.items()},
+        }
+
+    def shutdown(self):
+        for limiter in self.limiters.values():
+            limiter.executor.shutdown(wait=False, cancel_futures=True)
+
+
+def _limiter_from_env(name: str, priority: int, concurrency: int, queue: int, timeout: float) -> EndpointLimiter:
+    prefix = name.upper()
+    return EndpointLimiter(
+        name=name,
+        priority=priority,
+        max_concurrency=int(os.getenv(f"{prefix}_MAX_CONCURRENCY", concurrency)),
+        max_queue=int(os.getenv(f"{prefix}_MAX_QUEUE", queue)),
+        queue_timeout=float(os.getenv(f"{prefix}_QUEUE_TIMEOUT", timeout)),
+    )
+
+
+_governor: Optional[ConcurrencyGovernor] = None
+
+
+def get_governor() -> ConcurrencyGovernor:
+    """Gouverneur partagé, configuré par variables d'environnement."""
+    global _governor
+    if _governor is None:
+        limiters = {
+            INTERACTIVE: _limiter_from_env(INTERACTIVE, 0, concurrency=8, queue=32, timeout=10),
+            BATCH: _limiter_from_env(BATCH, 1, concurrency=2, queue=8, timeout=30),
+        }
+        max_total = os.getenv("MAX_TOTAL_CONCURRENCY")
+        _governor = ConcurrencyGovernor(limiters, int(max_total) if max_total else None)
+        logger.info(f"Gouverneur de concurrence initialisé : {_governor.snapshot()}")
+    return _governor
@@ -29,6 +29,12 @@ def setup_cloud_run_env():
     os.environ.setdefault('HF_HUB_DISABLE_PROGRESS_BARS', '1')
     os.environ.setdefault('TOKENIZERS_PARALLELISM', 'false')
 
+    # Modèles pré-cuits à la construction de l'image : aucun téléchargement au runtime
+    bake_dir = os.environ.get('MODEL_BAKE_DIR', '/app/models')
+    if os.path.exists(os.path.join(bake_dir, 'manifest.json')):
+        os.environ.setdefault('HF_HUB_OFFLINE', '1')
+        os.environ.setdefault('TRANSFORMERS_OFFLINE', '1')
+
 # Appeler la configuration au début
 setup_cloud_run_env()
 
@@ -39,34 +45,9 @@ from langchain_groq import ChatGroq
 from langchain_community.document_loaders import PyPDFLoader
 from langchain_openai import ChatOpenAI
 from typing import Dict, List, Any, Tuple, Optional, Type
+from src.llm_client import LLM_ATTEMPT_TIMEOUT, LLM_MAX_RETRIES
 
-#########################################################################################################
-# formatage du json
-def format_cv(document):
-    def format_section(title, data, indent=0):
-        prefix = "  " * indent
-        lines = [f"{title}:"]
-        if isinstance(data, dict):
-            for k, v in data.items():
-                if isinstance(v, (dict, list)):
-                    lines.append(f"{prefix}- {k.capitalize()}:")
-                    lines.extend(format_section("", v, indent + 1))
-                else:
-                    lines.append(f"{prefix}- {k.capitalize()}: {v}")
-        elif isinstance(data, list):
-            for i, item in enumerate(data):
-                lines.append(f"{prefix}- Élément {i + 1}:")
-                lines.extend(format_section("", item, indent + 1))
-        else:
-            lines.append(f"{prefix}- {data}")
-        return lines
-    sections = []
-    for section_name, content in document.items():
-        title = section_name.replace("_", " ").capitalize()
-        sections.extend(format_section(title, content))
-        sections.append("") 
-    return "\n".join(sections)
-
+from src.cv_document import format_cv  # réexport : formatage du CV déplacé dans src.cv_document
 
 def read_system_prompt(file_path):
     with open(file_path, 'r', encoding='utf-8') as file:
@@ -84,7 +65,12 @@ def load_pdf(pdf_path):
 # modéles 
 
 OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
+OPENAI_BASE_URL = os.getenv("OPENAI_BASE_URL")  # ex. serveur LLM factice pour les tests de latence
+GROQ_API_KEY = os.getenv("GROQ_API_KEY")
 model_openai = "gpt-4o"  
+# Modèle de repli distinct des modèles principaux (gpt-4o / gpt-4o-mini) : un repli identique au primaire est ignoré
+LLM_FALLBACK_MODEL = os.getenv("LLM_FALLBACK_MODEL", "gpt-4.1-nano")
+GROQ_FALLBACK_MODEL = os.getenv("GROQ_FALLBACK_MODEL", "llama-3.1-8b-instant")
 
 def crew_openai():
     """Configuration CrewAI pour Cloud Run"""
@@ -92,7 +78,10 @@ def crew_openai():
         llm = ChatOpenAI(
             model="gpt-4o-mini",
             temperature=0.1,
-            api_key=OPENAI_API_KEY
+            api_key=OPENAI_API_KEY,
+            base_url=OPENAI_BASE_URL,
+            timeout=LLM_ATTEMPT_TIMEOUT,
+            max_retries=LLM_MAX_RETRIES
         )
         return llm
     except Exception as e:
@@ -105,9 +94,43 @@ def chat_openai():
         llm = ChatOpenAI(
             model="gpt-4o",
             temperature=0.6,
-            api_key=OPENAI_API_KEY
+            api_key=OPENAI_API_KEY,
+            base_url=OPENAI_BASE_URL,
+            timeout=LLM_ATTEMPT_TIMEOUT,
+            max_retries=LLM_MAX_RETRIES
         )
         return llm
     except Exception as e:
         print(f"Error initializing Chat OpenAI: {e}")
         raise
+
+def fallback_llm(temperature=0.6, primary_model=None):
+    """
+    Modèle de repli moins coûteux (Groq si configuré), utilisé quand le circuit principal est ouvert.
+    None si le repli serait le modèle principal lui-même (`primary_model`) : basculer vers
+    le point d'accès qui vient d'échouer n'apporterait rien.
+    """
+    model = GROQ_FALLBACK_MODEL if GROQ_API_KEY else LLM_FALLBACK_MODEL
+    if primary_model is not None and model == primary_model:
+        print(f"Fallback model identical to primary ({model}), no fallback configured")
+        return None
+    try:
+        if GROQ_API_KEY:
+            return ChatGroq(
+                model=model,
+                temperature=temperature,
+                api_key=GROQ_API_KEY,
+                timeout=LLM_ATTEMPT_TIMEOUT,
+                max_retries=0
+            )
+        return ChatOpenAI(
+            model=model,
+            temperature=temperature,
+            api_key=OPENAI_API_KEY,
+            base_url=OPENAI_BASE_URL,
+            timeout=LLM_ATTEMPT_TIMEOUT,
+            max_retries=0
+        )
+    except Exception as e:
+        print(f"Error initializing fallback LLM: {e}")
+        return None
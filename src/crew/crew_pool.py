@@ -1,51 +1,316 @@
 import os
 import json
-import tempfile
+import queue
+import hashlib
+import functools
 import logging
+import threading
+from contextlib import contextmanager
 from crewai import Crew, Process
 from langchain_core.tools import tool
 from pydantic import BaseModel, Field
-from typing import Dict, List, Any, Type
-
-# Import des agents et tâches
-from .agents import (
-    report_generator_agent, skills_extractor_agent, experience_extractor_agent, 
-    project_extractor_agent, education_extractor_agent, ProfileBuilderAgent, 
-    informations_personnelle_agent
-)
-from .tasks import (
-    generate_report_task, task_extract_skills, task_extract_experience, 
-    task_extract_projects, task_extract_education, task_build_profile, 
-    task_extract_informations
-)
+from typing import Dict, List, Any, Type, Callable, Optional
+
+from src.llm_client import ResilientLLM, LLMDeadlineExceeded, LLM_MAX_RETRIES
+from src.model_router import get_model_router, chat_model, CV_CREW as CV_TASK, REPORT as REPORT_TASK
+from src.tokens import count_tokens
+from src.memo import SingleFlightCache, stable_hash
+from src.report_payload import encode_analysis_for_report, PAYLOAD_VERSION
+
+# Fabriques d'agents et de tâches
+from .agents import build_report_generator_agent, build_cv_agents
+from .tasks import build_report_task, build_cv_tasks
 
 logger = logging.getLogger(__name__)
 
-def setup_safe_crew_environment():
-    """Configure un environnement sécurisé pour CrewAI sur Cloud Run"""
+CREW_DEADLINE_SECONDS = float(os.getenv("CREW_DEADLINE_SECONDS", "240"))
+CREW_STORAGE_ROOT = os.getenv("CREW_STORAGE_DIR", "/tmp/crew")
+CREW_LEASE_TIMEOUT = float(os.getenv("CREW_LEASE_TIMEOUT", "30"))
+REPORT_CACHE_SIZE = int(os.getenv("REPORT_CACHE_SIZE", "256"))
+REPORT_CACHE_TTL_SECONDS = float(os.getenv("REPORT_CACHE_TTL_SECONDS", "86400"))
+
+CV_CREW = "cv"
+REPORT_CREW = "report"
+
+
+def configure_crew_environment():
+    """
+    Configuration CrewAI faite une seule fois au chargement du module :
+    plus aucune variable d'environnement n'est modifiée pendant une requête.
+    """
+    os.environ.setdefault('CREW_STORAGE_DIR', CREW_STORAGE_ROOT)
+    os.environ['CREW_TELEMETRY'] = 'false'  # Désactiver la télémétrie
     try:
-        # Utiliser un répertoire temporaire sécurisé
-        temp_dir = tempfile.mkdtemp(prefix='crew_', dir='/tmp')
-        
-        # Configuration CrewAI
-        os.environ['CREW_STORAGE_DIR'] = temp_dir
-        os.environ['CREW_TELEMETRY'] = 'false'  # Désactiver la télémétrie
-        
-        logger.info(f"CrewAI configuré avec répertoire temporaire: {temp_dir}")
-        return temp_dir
-        
+        os.makedirs(CREW_STORAGE_ROOT, exist_ok=True)
     except Exception as e:
-        logger.error(f"Erreur configuration CrewAI: {e}")
-        # Fallback vers /tmp si possible
-        fallback_dir = '/tmp/crew_fallback'
+        logger.warning(f"Impossible de créer {CREW_STORAGE_ROOT} : {e}")
+
+
+configure_crew_environment()
+
+
+class CrewLease:
+    """
+    Crew prêté à une requête. Les crews sont construits avec `memory=False` : ils
+    n'écrivent rien par requête sous CREW_STORAGE_DIR, qui reste un réglage global
+    de CrewAI.
+    """
+
+    def __init__(self, crew: Crew):
+        self.crew = crew
+        self.abandoned = False
+
+    def abandon(self):
+        """Le kickoff tourne peut-être encore (deadline dépassée) : le crew ne doit pas être rendu."""
+        self.abandoned = True
+
+
+class CrewPoolExhausted(TimeoutError):
+    """Aucun Crew disponible dans le délai imparti."""
+
+
+class CrewPool:
+    """
+    Pool de Crews pré-construits, chacun avec ses propres agents et tâches.
+
+    Un Crew est prêté à une seule requête à la fois puis rendu au pool. Un Crew
+    dont l'exécution a échoué (ou dépassé sa deadline et tourne peut-être encore)
+    n'est jamais rendu : il est abandonné et remplacé à la demande.
+    """
+
+    def __init__(self, name: str, factory: Callable[[], Crew], size: int, max_size: int):
+        self.name = name
+        self.factory = factory
+        self.size = size
+        self.max_size = max(size, max_size)
+        self._idle: "queue.Queue[Crew]" = queue.Queue()
+        self._lock = threading.Lock()
+        self.total = 0
+        self.leased = 0
+        self.created = 0
+        self.discarded = 0
+        self.waits = 0
+        self.timeouts = 0
+
+    def _build(self) -> Crew:
+        crew = self.factory()
+        with self._lock:
+            self.created += 1
+        return crew
+
+    def warm(self):
+        """Pré-construit les Crews jusqu'à la taille nominale du pool."""
+        while True:
+            with self._lock:
+                if self.total >= self.size:
+                    return
+                self.total += 1
+            try:
+                self._idle.put(self._build())
+            except Exception:
+                with self._lock:
+                    self.total -= 1
+                raise
+
+    def _acquire(self, timeout: float) -> Crew:
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            pass
+
+        with self._lock:
+            can_grow = self.total < self.max_size
+            if can_grow:
+                self.total += 1
+            else:
+                self.waits += 1
+        if can_grow:
+            try:
+                return self._build()
+            except Exception:
+                with self._lock:
+                    self.total -= 1
+                raise
+
+        try:
+            return self._idle.get(timeout=timeout)
+        except queue.Empty:
+            with self._lock:
+                self.timeouts += 1
+            raise CrewPoolExhausted(f"Aucun crew '{self.name}' disponible après {timeout}s")
+
+    @contextmanager
+    def lease(self, timeout: float = CREW_LEASE_TIMEOUT):
+        crew = self._acquire(timeout)
+        with self._lock:
+            self.leased += 1
+        lease = CrewLease(crew)
+        healthy = False
         try:
-            os.makedirs(fallback_dir, exist_ok=True)
-            os.environ['CREW_STORAGE_DIR'] = fallback_dir
-            return fallback_dir
-        except:
-            # Dernière tentative - utiliser le répertoire courant
-            os.environ['CREW_STORAGE_DIR'] = '.'
-            return '.'
+            yield lease
+            healthy = not lease.abandoned
+        finally:
+            with self._lock:
+                self.leased -= 1
+                if not healthy:
+                    self.total -= 1
+                    self.discarded += 1
+            if healthy:
+                self._idle.put(crew)
+
+    def metrics(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "size": self.size,
+                "max_size": self.max_size,
+                "total": self.total,
+                "idle": self._idle.qsize(),
+                "leased": self.leased,
+                "created": self.created,
+                "discarded": self.discarded,
+                "waits": self.waits,
+                "timeouts": self.timeouts,
+            }
+
+
+def _build_report_crew(llm) -> Crew:
+    agent = build_report_generator_agent(llm)
+    return Crew(
+        agents=[agent],
+        tasks=[build_report_task(agent)],
+        process=Process.sequential,
+        memory=False,
+        verbose=False,
+        telemetry=False
+    )
+
+
+def _build_cv_crew(llm) -> Crew:
+    agents = build_cv_agents(llm)
+    return Crew(
+        agents=list(agents.values()),
+        tasks=build_cv_tasks(agents),
+        process=Process.sequential,
+        memory=False,
+        verbose=False,
+        telemetry=False
+    )
+
+
+_pools: Dict[str, CrewPool] = {}
+_pools_lock = threading.Lock()
+
+POOL_FACTORIES = {
+    CV_CREW: _build_cv_crew,
+    REPORT_CREW: _build_report_crew,
+}
+
+# Tâche du routeur de modèles correspondant à chaque crew
+POOL_TASKS = {
+    CV_CREW: CV_TASK,
+    REPORT_CREW: REPORT_TASK,
+}
+
+
+def get_crew_pool(name: str, tier: Optional[str] = None) -> CrewPool:
+    """Un pool par (crew, palier de modèle) : les agents d'un Crew sont liés à leur LLM à la construction."""
+    tier = tier or get_model_router().default_tier(POOL_TASKS[name])
+    key = f"{name}:{tier}"
+    with _pools_lock:
+        if key not in _pools:
+            prefix = f"CREW_POOL_{name.upper()}"
+            factory = POOL_FACTORIES[name]
+            _pools[key] = CrewPool(
+                name=key,
+                factory=lambda: factory(chat_model(tier, 0.1, LLM_MAX_RETRIES)),
+                size=int(os.getenv(f"{prefix}_SIZE", "1")),
+                max_size=int(os.getenv(f"{prefix}_MAX_SIZE", "4")),
+            )
+        return _pools[key]
+
+
+def warm_crew_pools():
+    """Pré-construit les pools du palier par défaut ; les autres paliers sont construits à la demande."""
+    for name in POOL_FACTORIES:
+        try:
+            get_crew_pool(name).warm()
+        except Exception as e:
+            logger.warning(f"Pré-construction du pool de crews '{name}' impossible : {e}")
+
+
+def crew_pool_metrics() -> Dict[str, Any]:
+    with _pools_lock:
+        pools = dict(_pools)
+    metrics = {name: pool.metrics() for name, pool in pools.items()}
+    metrics["report_cache"] = report_cache.stats()
+    return metrics
+
+
+def _kickoff(name: str, lease: CrewLease, inputs: Dict[str, Any], on_primary: Optional[Callable[[bool, float], None]] = None):
+    # Deadline et disjoncteur autour du crew ; les retries se font par appel LLM dans le client
+    try:
+        return ResilientLLM(
+            lease.crew, name=f"crew:{name}", hedge=False,
+            max_retries=0, deadline=CREW_DEADLINE_SECONDS, attempt_timeout=CREW_DEADLINE_SECONDS
+        ).call(lambda crew: crew.kickoff(inputs=inputs), on_primary=on_primary)
+    except LLMDeadlineExceeded:
+        # Le kickoff continue dans son thread : ce crew ne sera plus jamais prêté
+        lease.abandon()
+        raise
+
+
+report_cache = SingleFlightCache("report", max_entries=REPORT_CACHE_SIZE, ttl_seconds=REPORT_CACHE_TTL_SECONDS)
+
+
+@functools.lru_cache(maxsize=1)
+def report_version() -> str:
+    """Empreinte du pipeline de rapport : routage des modèles, prompts de l'agent et de la tâche, format du payload, moteur d'intention."""
+    from src.intent_engines import INTENT_ENGINE
+    agent = build_report_generator_agent()
+    task = build_report_task(agent)
+    parts = [
+        get_model_router().fingerprint(REPORT_TASK), agent.role, agent.goal, agent.backstory,
+        task.description, task.expected_output, str(PAYLOAD_VERSION), INTENT_ENGINE,
+    ]
+    return hashlib.sha256("\x1f".join(parts).encode("utf-8")).hexdigest()[:16]
+
+
+def report_cache_key(conversation_history: list, job_description_text: str):
+    return (stable_hash(conversation_history), stable_hash(job_description_text or ""), report_version())
+
+
+def _generate_report(conversation_history: list, job_description_text: str):
+    """Analyse ML puis rapport du crew ; renvoie (rapport, analyse_complète)."""
+    complete = True
+    # Import avec gestion d'erreur
+    try:
+        from src.deep_learning_analyzer import MultiModelInterviewAnalyzer
+        analyzer = MultiModelInterviewAnalyzer()
+        structured_analysis = analyzer.run_full_analysis(conversation_history, job_description_text)
+        models_status = structured_analysis.get("models_status", {})
+        complete = "error" not in structured_analysis and all(
+            ok for name, ok in models_status.items() if name.endswith("_available")
+        )
+    except Exception as e:
+        logger.error(f"Erreur analyzer ML: {e}")
+        complete = False
+        # Fallback sans analyse ML
+        structured_analysis = {
+            "overall_similarity_score": 0.5,
+            "sentiment_analysis": [],
+            "intent_analysis": [],
+            "raw_transcript": conversation_history,
+            "error": "ML analysis unavailable"
+        }
+
+    payload = encode_analysis_for_report(structured_analysis)
+    router = get_model_router()
+    decision = router.route(REPORT_TASK, count_tokens(payload))
+    with get_crew_pool(REPORT_CREW, decision.tier).lease() as lease, router.observe(decision) as outcome:
+        final_report = _kickoff(REPORT_CREW, lease, {'structured_analysis_data': payload}, outcome.record)
+
+    return str(final_report), complete
+
 
 @tool
 def interview_analyser(conversation_history: list, job_description_text: str) -> str:
@@ -53,46 +318,21 @@ def interview_analyser(conversation_history: list, job_description_text: str) ->
     Analyse l'entretien avec gestion d'erreurs pour Cloud Run
     """
     try:
-        # Configuration sécurisée
-        temp_dir = setup_safe_crew_environment()
-        
-        interview_crew = Crew(
-            agents=[report_generator_agent],
-            tasks=[generate_report_task],
-            process=Process.sequential,
-            verbose=False,
-            telemetry=False
-        )
-        
-        # Import avec gestion d'erreur
-        try:
-            from src.deep_learning_analyzer import MultiModelInterviewAnalyzer
-            analyzer = MultiModelInterviewAnalyzer()
-            structured_analysis = analyzer.run_full_analysis(conversation_history, job_description_text)
-        except Exception as e:
-            logger.error(f"Erreur analyzer ML: {e}")
-            # Fallback sans analyse ML
-            structured_analysis = {
-                "overall_similarity_score": 0.5,
-                "sentiment_analysis": [],
-                "intent_analysis": [],
-                "raw_transcript": conversation_history,
-                "error": "ML analysis unavailable"
-            }
-        
-        final_report = interview_crew.kickoff(inputs={
-            'structured_analysis_data': json.dumps(structured_analysis, indent=2)
-        })
-        
-        # Nettoyage du répertoire temporaire
-        try:
-            import shutil
-            shutil.rmtree(temp_dir, ignore_errors=True)
-        except:
-            pass
-        
-        return str(final_report)
-        
+        # Rapports mémorisés par (transcription, offre, version) ; appels identiques concurrents coalescés.
+        # Un rapport produit sans l'analyse ML complète est partagé mais pas mémorisé.
+        cache_key = report_cache_key(conversation_history, job_description_text)
+
+        def generate():
+            result = _generate_report(conversation_history, job_description_text)
+            if result[1]:
+                # Écriture différée : la réponse n'attend jamais le stockage
+                from src.persistence import get_result_store
+                get_result_store().save_report(cache_key, conversation_history, job_description_text, result[0])
+            return result
+
+        report, _ = report_cache.get_or_compute(cache_key, generate, cacheable=lambda result: result[1])
+        return report
+
     except Exception as e:
         logger.error(f"Erreur critique dans interview_analyser: {e}")
         return f"Erreur lors de l'analyse de l'entretien: {str(e)}"
@@ -100,45 +340,16 @@ def interview_analyser(conversation_history: list, job_description_text: str) ->
 def analyse_cv(cv_content: str) -> dict:
     """Analyse de CV avec configuration sécurisée pour Cloud Run"""
     try:
-        # Configuration sécurisée
-        temp_dir = setup_safe_crew_environment()
-        
         logger.info("Début de l'analyse CV avec CrewAI")
-        
-        crew = Crew(
-            agents=[            
-                informations_personnelle_agent,
-                skills_extractor_agent,
-                experience_extractor_agent,
-                project_extractor_agent,
-                education_extractor_agent,
-                ProfileBuilderAgent       
-            ],
-            tasks=[
-                task_extract_informations,
-                task_extract_skills,
-                task_extract_experience,
-                task_extract_projects,
-                task_extract_education,
-                task_build_profile     
-            ],
-            process=Process.sequential,
-            verbose=False,
-            telemetry=False
-        )
-        
-        result = crew.kickoff(inputs={"cv_content": cv_content})
-        
-        # Nettoyage
-        try:
-            import shutil
-            shutil.rmtree(temp_dir, ignore_errors=True)
-        except:
-            pass
-        
+
+        router = get_model_router()
+        decision = router.route(CV_TASK, count_tokens(cv_content))
+        with get_crew_pool(CV_CREW, decision.tier).lease() as lease, router.observe(decision) as outcome:
+            result = _kickoff(CV_CREW, lease, {"cv_content": cv_content}, outcome.record)
+
         logger.info("Analyse CV terminée avec succès")
         return result
-        
+
     except Exception as e:
         logger.error(f"Erreur dans analyse_cv: {e}")
         # Retour d'urgence
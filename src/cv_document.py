@@ -0,0 +1,179 @@
+import json
+import hashlib
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Tuple
+
+CV_DOCUMENT_CACHE_SIZE = 256
+
+
+def clean_dict_keys(data):
+    if isinstance(data, dict):
+        return {str(key): clean_dict_keys(value) for key, value in data.items()}
+    elif isinstance(data, list):
+        return [clean_dict_keys(element) for element in data]
+    else:
+        return data
+
+
+def format_cv(document):
+    def format_section(title, data, indent=0):
+        prefix = "  " * indent
+        lines = [f"{title}:"]
+        if isinstance(data, dict):
+            for k, v in data.items():
+                if isinstance(v, (dict, list)):
+                    lines.append(f"{prefix}- {k.capitalize()}:")
+                    lines.extend(format_section("", v, indent + 1))
+                else:
+                    lines.append(f"{prefix}- {k.capitalize()}: {v}")
+        elif isinstance(data, list):
+            for i, item in enumerate(data):
+                lines.append(f"{prefix}- Élément {i + 1}:")
+                lines.extend(format_section("", item, indent + 1))
+        else:
+            lines.append(f"{prefix}- {data}")
+        return lines
+    sections = []
+    for section_name, content in document.items():
+        title = section_name.replace("_", " ").capitalize()
+        sections.extend(format_section(title, content))
+        sections.append("")
+    return "\n".join(sections)
+
+
+def _as_text(value: Any) -> str:
+    if isinstance(value, list):
+        return ", ".join(_as_text(v) for v in value if v)
+    if isinstance(value, dict):
+        return ", ".join(_as_text(v) for v in value.values() if v)
+    return str(value) if value is not None else ""
+
+
+def _string_list(values: Any) -> Tuple[str, ...]:
+    if not isinstance(values, list):
+        values = [values] if values else []
+    return tuple(text for text in (_as_text(v).strip() for v in values) if text)
+
+
+def content_hash(candidat: Dict[str, Any]) -> str:
+    """SHA-256 du JSON canonique (clés triées, sans espaces) : stable quel que soit l'ordre des clés."""
+    try:
+        canonical = json.dumps(candidat, sort_keys=True, ensure_ascii=False, separators=(",", ":"), default=str)
+    except TypeError:
+        # Clés non textuelles mélangées : non triables telles quelles
+        canonical = json.dumps(clean_dict_keys(candidat), sort_keys=True, ensure_ascii=False,
+                               separators=(",", ":"), default=str)
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+@dataclass(frozen=True)
+class CVDocument:
+    """
+    CV canonique, construit une fois après le parsing : la structure `candidat`
+    aux clés normalisées, son hash de contenu et les vues dérivées (texte
+    formaté pour le prompt, listes aplaties pour le matching et les caches).
+    Immuable : les consommateurs ne doivent pas modifier `data`.
+    """
+
+    data: Dict[str, Any]
+    content_hash: str
+    formatted: str
+    hard_skills: Tuple[str, ...]
+    soft_skills: Tuple[str, ...]
+    experiences: Tuple[str, ...]
+    projects: Tuple[str, ...]
+    sections: Dict[str, List[str]] = field(repr=False)
+
+    @classmethod
+    def build(cls, candidat: Dict[str, Any], digest: Optional[str] = None) -> "CVDocument":
+        skills = candidat.get("compétences", {}) or {}
+        hard_skills = _string_list(skills.get("hard_skills", []))
+        soft_skills = _string_list(skills.get("soft_skills", []))
+
+        experiences = []
+        for exp in candidat.get("expériences", []) or []:
+            if not isinstance(exp, dict):
+                continue
+            header = f"{exp.get('Poste', '')} chez {exp.get('Entreprise', '')}".strip()
+            experiences.append(f"{header} : {_as_text(exp.get('responsabilités', []))}")
+
+        projects = []
+        projets = candidat.get("projets", {}) or {}
+        for project in (projets.get("professional", []) or []) + (projets.get("personal", []) or []):
+            if not isinstance(project, dict):
+                continue
+            projects.append(
+                f"{project.get('title', '')} ({project.get('role', '')}) : "
+                f"{_as_text(project.get('technologies', []))}. {_as_text(project.get('outcomes', []))}"
+            )
+
+        skills_text = _as_text([_as_text(list(hard_skills)), _as_text(list(soft_skills))])
+        return cls(
+            data=candidat,
+            content_hash=digest or content_hash(candidat),
+            formatted=format_cv(candidat),
+            hard_skills=hard_skills,
+            soft_skills=soft_skills,
+            experiences=tuple(experiences),
+            projects=tuple(projects),
+            sections={
+                "skills": [skills_text] if skills_text.strip(", ") else [],
+                "experiences": list(experiences),
+                "projects": list(projects),
+            },
+        )
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Format de réponse de /parse-cv/ : `candidat` plus le hash de contenu."""
+        return {"candidat": self.data, "content_hash": self.content_hash}
+
+
+class CVDocumentCache:
+    """LRU des documents canoniques par hash : un CV renvoyé à chaque tour n'est formaté qu'une fois."""
+
+    def __init__(self, max_entries: int = CV_DOCUMENT_CACHE_SIZE):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, CVDocument]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get_or_build(self, candidat: Dict[str, Any]) -> CVDocument:
+        digest = content_hash(candidat)
+        with self._lock:
+            document = self._entries.get(digest)
+            if document is not None:
+                self._entries.move_to_end(digest)
+                self.hits += 1
+                return document
+            self.misses += 1
+
+        document = CVDocument.build(clean_dict_keys(candidat), digest)
+        with self._lock:
+            self._entries[digest] = document
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return document
+
+
+cv_document_cache = CVDocumentCache()
+
+
+def canonical_cv(cv_document: Any) -> CVDocument:
+    """
+    Document canonique depuis un CVDocument, une réponse de /parse-cv/
+    (`{"candidat": ...}`) ou directement la structure `candidat`.
+    """
+    if isinstance(cv_document, CVDocument):
+        return cv_document
+    if not isinstance(cv_document, dict):
+        raise ValueError("Document CV invalide fourni.")
+    candidat = cv_document.get("candidat", cv_document)
+    if not isinstance(candidat, dict):
+        raise ValueError("Document CV invalide fourni.")
+    return cv_document_cache.get_or_build(candidat)
@@ -0,0 +1,115 @@
+import os
+import logging
+from typing import Any, Dict, List
+
+from langchain_core.messages import SystemMessage, HumanMessage
+from langchain_core.pydantic_v1 import BaseModel, Field
+
+from src.llm_client import ResilientLLM
+from src.model_router import get_model_router, chat_model, CV_EXTRACTION, MODEL_TIERS
+from src.tokens import count_tokens
+
+logger = logging.getLogger(__name__)
+
+CREW_ENGINE = "crew"
+STRUCTURED_ENGINE = "structured"
+CV_ENGINES = (CREW_ENGINE, STRUCTURED_ENGINE)
+CV_EXTRACTION_ENGINE = os.getenv("CV_EXTRACTION_ENGINE", CREW_ENGINE)
+NOT_SPECIFIED = "Non spécifié"
+
+# Règles des tâches du crew (src/crew/tasks.py) condensées en un seul prompt
+EXTRACTION_INSTRUCTIONS = (
+    "Tu extrais le profil complet d'un candidat à partir du texte de son CV, en une seule fois et selon le schéma fourni.\n"
+    "- Informations personnelles : nom complet normalisé (pas tout en majuscules), e-mail, téléphone, localisation.\n"
+    "- Compétences : uniquement celles mentionnées explicitement, sans rien déduire d'un poste. "
+    "Hard skills = techniques, outils, langages ; soft skills = comportementales. N'en exclus aucune.\n"
+    "- Expériences : toutes les expériences professionnelles. \"Depuis 2023\" donne end_date \"Aujourd'hui\".\n"
+    "- Projets : seulement les projets nommés ou à objectif clair, distincts des responsabilités générales d'un poste ; "
+    "professionnels ou personnels.\n"
+    "- Formations : diplômes, titres et certifications ; ne pas confondre diplôme et institution "
+    "(\"DataIku (core designer)\" : diplôme \"Core Designer\", institution \"DataIku\"). Une compétence n'est pas une formation.\n"
+    f"Ne laisse jamais un champ texte vide : utilise \"{NOT_SPECIFIED}\" si l'information est introuvable. Ne rien inventer."
+)
+
+
+class _Schema(BaseModel):
+    class Config:
+        allow_population_by_field_name = True
+
+
+class InformationsPersonnelles(_Schema):
+    nom: str = Field(description="Nom complet du candidat")
+    email: str = Field(default=NOT_SPECIFIED)
+    numero_de_telephone: str = Field(default=NOT_SPECIFIED)
+    localisation: str = Field(default=NOT_SPECIFIED, description="Ville ou région")
+
+
+class Competences(_Schema):
+    hard_skills: List[str] = Field(default_factory=list, description="Compétences techniques, outils, langages")
+    soft_skills: List[str] = Field(default_factory=list, description="Compétences comportementales")
+
+
+class Experience(_Schema):
+    Poste: str
+    Entreprise: str
+    start_date: str = Field(default=NOT_SPECIFIED)
+    end_date: str = Field(default=NOT_SPECIFIED, description="\"Aujourd'hui\" si le poste est actuel")
+    responsabilites: List[str] = Field(default_factory=list, alias="responsabilités")
+
+
+class Projet(_Schema):
+    title: str
+    role: str = Field(default=NOT_SPECIFIED)
+    technologies: List[str] = Field(default_factory=list)
+    outcomes: List[str] = Field(default_factory=list)
+
+
+class Projets(_Schema):
+    professional: List[Projet] = Field(default_factory=list)
+    personal: List[Projet] = Field(default_factory=list)
+
+
+class Formation(_Schema):
+    degree: str = Field(description="Diplôme, titre ou certification")
+    institution: str = Field(description="École, université ou plateforme")
+    start_date: str = Field(default=NOT_SPECIFIED)
+    end_date: str = Field(default=NOT_SPECIFIED)
+
+
+class Candidat(_Schema):
+    """Profil du candidat, même structure que la sortie du crew d'extraction."""
+
+    informations_personnelles: InformationsPersonnelles
+    competences: Competences = Field(alias="compétences")
+    experiences: List[Experience] = Field(default_factory=list, alias="expériences")
+    projets: Projets = Field(default_factory=Projets)
+    formations: List[Formation] = Field(default_factory=list)
+
+
+def _extractor(tier: str) -> ResilientLLM:
+    from src.config import fallback_llm
+
+    fallback = fallback_llm(temperature=0.0, primary_model=MODEL_TIERS[tier])
+    return ResilientLLM(
+        primary=chat_model(tier, 0.0).with_structured_output(Candidat),
+        fallback=fallback.with_structured_output(Candidat) if fallback is not None else None,
+        name=f"cv_extraction:{MODEL_TIERS[tier]}",
+        hedge=False,
+    )
+
+
+def extraction_messages(cv_content: str) -> list:
+    return [SystemMessage(content=EXTRACTION_INSTRUCTIONS), HumanMessage(content=f"CV\n{cv_content}")]
+
+
+def extract_cv_structured(cv_content: str) -> Dict[str, Any]:
+    """
+    Profil `{"candidat": ...}` en un seul appel LLM contraint par le schéma :
+    le CV n'est envoyé qu'une fois et aucune réponse libre n'est à parser.
+    """
+    messages = extraction_messages(cv_content)
+    router = get_model_router()
+    decision = router.route(CV_EXTRACTION, sum(count_tokens(m.content) for m in messages))
+    with router.observe(decision) as outcome:
+        candidat = _extractor(decision.tier).invoke(messages, on_primary=outcome.record)
+    return {"candidat": candidat.dict(by_alias=True)}
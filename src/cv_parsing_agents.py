@@ -2,20 +2,19 @@ import os
 import json
 import logging
 
-logger = logging.getLogger(__name__)
+from src.cv_document import canonical_cv
+from src.profiling import profile_stage
+from src.cv_extraction import CV_EXTRACTION_ENGINE, STRUCTURED_ENGINE
 
-def clean_dict_keys(data):
-    if isinstance(data, dict):
-        return {str(key): clean_dict_keys(value) for key, value in data.items()}
-    elif isinstance(data, list):
-        return [clean_dict_keys(element) for element in data]
-    else:
-        return data
+logger = logging.getLogger(__name__)
 
 class CvParserAgent:
-    def __init__(self, pdf_path: str):
+    def __init__(self, pdf_path: str, engine: str = CV_EXTRACTION_ENGINE):
         self.pdf_path = pdf_path
+        # "structured" : un seul appel à sortie contrainte ; "crew" : six agents, chemin le plus précis
+        self.engine = engine
 
+    @profile_stage("cv_parsing")
     def process(self) -> dict:
         """
         Version sécurisée pour Cloud Run
@@ -27,6 +26,14 @@ class CvParserAgent:
             from src.config import load_pdf
             cv_text_content = load_pdf(self.pdf_path)
             logger.info(f"Contenu extrait : {len(cv_text_content)} caractères")
+
+            if self.engine == STRUCTURED_ENGINE:
+                try:
+                    from src.cv_extraction import extract_cv_structured
+                    logger.info("Lancement de l'extraction structurée (appel unique)...")
+                    return canonical_cv(extract_cv_structured(cv_text_content)).to_dict()
+                except Exception as structured_error:
+                    logger.warning(f"Extraction structurée en échec, repli sur le crew : {structured_error}")
             
             # Import sécurisé de crew_pool
             try:
@@ -38,44 +45,52 @@ class CvParserAgent:
                 # Fallback en cas d'erreur CrewAI
                 return self._create_fallback_response(cv_text_content)
 
-            # Traitement du résultat
-            if not crew_output:
-                logger.warning("Crew n'a pas retourné de résultat")
-                return self._create_fallback_response(cv_text_content)
-            
-            # Si c'est déjà un dictionnaire (cas d'erreur géré)
-            if isinstance(crew_output, dict):
-                return clean_dict_keys(crew_output)
-            
-            # Si c'est un objet avec .raw
-            if hasattr(crew_output, 'raw') and crew_output.raw:
-                raw_string = crew_output.raw.strip()
-                
-                # Nettoyage du JSON si nécessaire
-                if '```' in raw_string:
-                    try:
-                        json_part = raw_string.split('```json')[1].split('```')[0]
-                        raw_string = json_part.strip()
-                    except:
-                        # Si le parsing échoue, utiliser tel quel
-                        pass
-                
-                try:
-                    profile_data = json.loads(raw_string)
-                    return clean_dict_keys(profile_data)
-                except json.JSONDecodeError as e:
-                    logger.error(f"Erreur JSON : {e}")
-                    logger.error(f"Raw data: {raw_string[:500]}...")
-                    return self._create_fallback_response(cv_text_content)
-            
-            # Si aucun format reconnu
-            logger.warning("Format de sortie crew non reconnu")
-            return self._create_fallback_response(cv_text_content)
+            return self.parse_crew_output(crew_output, cv_text_content)
 
         except Exception as e:
             logger.error(f"Erreur critique dans CvParserAgent : {e}", exc_info=True)
             return self._create_fallback_response("Erreur lors de la lecture du CV")
 
+    def parse_crew_output(self, crew_output, cv_text_content: str) -> dict:
+        """Profil canonique depuis la sortie libre du crew (JSON éventuellement entouré de ```json)."""
+        # Traitement du résultat
+        if not crew_output:
+            logger.warning("Crew n'a pas retourné de résultat")
+            return self._create_fallback_response(cv_text_content)
+        
+        # Si c'est déjà un dictionnaire (cas d'erreur géré)
+        if isinstance(crew_output, dict):
+            if (crew_output.get("candidat") or {}).get("error"):
+                logger.warning(f"Analyse du crew en erreur : {crew_output['candidat']['error']}")
+                return self._create_fallback_response(cv_text_content)
+            return canonical_cv(crew_output).to_dict()
+        
+        # Si c'est un objet avec .raw
+        if hasattr(crew_output, 'raw') and crew_output.raw:
+            raw_string = crew_output.raw.strip()
+            
+            # Nettoyage du JSON si nécessaire
+            if '```' in raw_string:
+                try:
+                    json_part = raw_string.split('```json')[1].split('```')[0]
+                    raw_string = json_part.strip()
+                except:
+                    # Si le parsing échoue, utiliser tel quel
+                    pass
+            
+            try:
+                profile_data = json.loads(raw_string)
+                # Document canonique : clés normalisées, hash et vues dérivées calculés une seule fois
+                return canonical_cv(profile_data).to_dict()
+            except json.JSONDecodeError as e:
+                logger.error(f"Erreur JSON : {e}")
+                logger.error(f"Raw data: {raw_string[:500]}...")
+                return self._create_fallback_response(cv_text_content)
+        
+        # Si aucun format reconnu
+        logger.warning("Format de sortie crew non reconnu")
+        return self._create_fallback_response(cv_text_content)
+
     def _create_fallback_response(self, cv_content: str) -> dict:
         """Crée une réponse de fallback en cas d'erreur"""
         return {
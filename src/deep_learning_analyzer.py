@@ -1,17 +1,140 @@
-import torch
+import os
+import re
 import logging
-from transformers import pipeline
-from sentence_transformers import SentenceTransformer, util
+import threading
+from collections import OrderedDict
+import numpy as np
+
+from src.model_residency import get_residency_manager
+from src.intent_engines import INTENT_LABELS, INTENT_ENGINE, EMBEDDING_ENGINE, EmbeddingIntentClassifier
+from src.text_preprocessing import classify_texts, zero_shot_texts
+from src.profiling import profile_stage
+from src.inference_scheduler import get_inference_scheduler
+from src.memo import SingleFlightCache, stable_hash
 
 logger = logging.getLogger(__name__)
 
+SENTENCE_SPLIT_RE = re.compile(r"(?<=[.!?;])\s+|\n+|\s*[•*]\s+|\s+-\s+")
+MIN_SENTENCE_CHARS = 12
+COVERAGE_MATCH_THRESHOLD = 0.5
+
+
+def split_sentences(text, min_chars=MIN_SENTENCE_CHARS):
+    """Découpe un texte en phrases (ponctuation, retours à la ligne, puces)."""
+    if not text:
+        return []
+    parts = [p.strip(" \t-•*") for p in SENTENCE_SPLIT_RE.split(text)]
+    sentences = [p for p in parts if len(p) >= min_chars]
+    if not sentences and text.strip():
+        sentences = [text.strip()]
+    return sentences
+
+
+class SentenceEmbeddingCache:
+    """
+    Cache LRU des embeddings de phrases (normalisés), partagé entre les tours
+    d'entretien : seules les phrases jamais vues sont encodées, en un seul batch.
+    """
+
+    def __init__(self, max_entries=20000):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def encode(self, model, sentences):
+        with self._lock:
+            missing = [s for s in dict.fromkeys(sentences) if s not in self._entries]
+        if missing:
+            vectors = model.encode(
+                missing, batch_size=64, convert_to_numpy=True,
+                normalize_embeddings=True, show_progress_bar=False
+            ).astype(np.float32)
+            with self._lock:
+                for sentence, vector in zip(missing, vectors):
+                    self._entries[sentence] = vector
+                while len(self._entries) > self.max_entries:
+                    self._entries.popitem(last=False)
+
+        with self._lock:
+            rows = []
+            for sentence in sentences:
+                vector = self._entries.get(sentence)
+                if vector is None:
+                    # Évincé entre-temps par un autre thread : ré-encodage ponctuel
+                    vector = model.encode([sentence], convert_to_numpy=True, normalize_embeddings=True)[0]
+                else:
+                    self._entries.move_to_end(sentence)
+                rows.append(vector)
+        return np.vstack(rows) if rows else np.zeros((0, 0), dtype=np.float32)
+
+    def prime(self, sentences, vectors):
+        """Insère des embeddings déjà calculés (offres du catalogue rechargées depuis le disque)."""
+        with self._lock:
+            for sentence, vector in zip(sentences, vectors):
+                self._entries[sentence] = np.asarray(vector, dtype=np.float32)
+                self._entries.move_to_end(sentence)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+
+sentence_embedding_cache = SentenceEmbeddingCache(
+    max_entries=int(os.getenv("SENTENCE_CACHE_SIZE", "20000"))
+)
+
+# Résultats par réponse (sentiment, intention), indexés par contenu : remplis par la
+# pré-analyse en arrière-plan pendant l'entretien, relus lors du rapport final
+turn_result_cache = SingleFlightCache(
+    "turn_analysis", max_entries=int(os.getenv("TURN_CACHE_SIZE", "20000"))
+)
+
+
+def turn_result_key(kind, answer):
+    return (kind, stable_hash(answer))
+
+
+def cached_per_answer(kind, answers, compute, fallback):
+    """
+    Résultats par réponse : seules les réponses absentes du cache sont calculées,
+    en un seul batch. `compute` renvoie None si le modèle est indisponible ; les
+    réponses manquantes reçoivent alors `fallback`, qui n'est pas mémorisé.
+    """
+    keys = [turn_result_key(kind, answer) for answer in answers]
+    results = [turn_result_cache.get(key) for key in keys]
+    missing = [i for i, result in enumerate(results) if result is None]
+    if not missing:
+        return results
+
+    computed = compute([answers[i] for i in missing])
+    for i, value in zip(missing, computed if computed is not None else [None] * len(missing)):
+        if value is None:
+            results[i] = dict(fallback)
+        else:
+            results[i] = value
+            turn_result_cache.put(keys[i], value)
+    return results
+
+
+_embedding_intent_classifier = None
+_embedding_intent_lock = threading.Lock()
+
 class MultiModelInterviewAnalyzer:
-    def __init__(self):
-        """Initialisation sécurisée pour Cloud Run"""
+    def __init__(self, intent_engine=None, residency=None, scheduler=None):
+        """
+        Initialisation sécurisée pour Cloud Run. Les modèles sont détenus par le
+        gestionnaire de résidence partagé : instancier l'analyseur ne recharge rien
+        si les modèles sont déjà en mémoire.
+        """
+        self.intent_engine = intent_engine or INTENT_ENGINE
+        self.residency = residency or get_residency_manager()
+        self.scheduler = scheduler or get_inference_scheduler()
+        self.model_keys = ["sentiment", "similarity"]
+        if self.intent_engine != EMBEDDING_ENGINE:
+            # En mode embedding, l'intention vient de MiniLM : XLM-R n'est pas chargé
+            self.model_keys.append("intent")
         self.models_loaded = False
-        self.sentiment_analyzer = None
-        self.similarity_model = None
-        self.intent_classifier = None
         
         try:
             self._load_models()
@@ -22,47 +145,56 @@ class MultiModelInterviewAnalyzer:
             # Ne pas faire échouer l'initialisation, permettre le fallback
 
     def _load_models(self):
-        """Chargement sécurisé des modèles"""
-        # Force CPU usage - Cloud Run n'a pas de GPU
-        device = -1  # Force CPU pour transformers
-        
-        try:
-            # Sentiment analyzer avec gestion d'erreur
-            self.sentiment_analyzer = pipeline(
-                "text-classification",
-                model="astrosbd/french_emotion_camembert",
-                return_all_scores=True,
-                device=device,  # Force CPU
-                model_kwargs={"torch_dtype": torch.float32}  # Force float32 pour CPU
-            )
-            logger.info("Sentiment analyzer chargé")
-        except Exception as e:
-            logger.warning(f"Échec du chargement du sentiment analyzer : {e}")
-            self.sentiment_analyzer = None
+        """Chargement (ou réhydratation) des modèles via le gestionnaire de résidence"""
+        for key in self.model_keys:
+            if self.residency.get(key) is None:
+                logger.warning(f"Modèle {key} indisponible, fallback activé")
 
-        try:
-            # Similarity model
-            self.similarity_model = SentenceTransformer(
-                'all-MiniLM-L6-v2',
-                device='cpu'  # Force CPU
-            )
-            logger.info("Similarity model chargé")
-        except Exception as e:
-            logger.warning(f"Échec du chargement du similarity model : {e}")
-            self.similarity_model = None
+    @property
+    def sentiment_analyzer(self):
+        return self.residency.get("sentiment")
 
-        try:
-            # Intent classifier
-            self.intent_classifier = pipeline(
-                "zero-shot-classification",
-                model="joeddav/xlm-roberta-large-xnli",
-                device=device,  # Force CPU
-                model_kwargs={"torch_dtype": torch.float32}
-            )
-            logger.info("Intent classifier chargé")
-        except Exception as e:
-            logger.warning(f"Échec du chargement de l'intent classifier : {e}")
-            self.intent_classifier = None
+    @property
+    def similarity_model(self):
+        return self.residency.get("similarity")
+
+    @property
+    def intent_classifier(self):
+        if self.intent_engine == EMBEDDING_ENGINE:
+            return None
+        return self.residency.get("intent")
+
+    @property
+    def intent_available(self):
+        if self.intent_engine == EMBEDDING_ENGINE:
+            return self.similarity_model is not None
+        return self.intent_classifier is not None
+
+    def embed_answers(self, user_answers):
+        """
+        Embedding d'une réponse = moyenne de ses phrases. Ce sont les phrases déjà
+        encodées pour la couverture des exigences : le cache évite une seconde passe.
+        """
+        sentences, owners = [], []
+        for index, answer in enumerate(user_answers):
+            for sentence in split_sentences(answer):
+                sentences.append(sentence)
+                owners.append(index)
+        pooled = np.zeros((len(user_answers), self.similarity_model.get_sentence_embedding_dimension()), dtype=np.float32)
+        if sentences:
+            np.add.at(pooled, np.asarray(owners), sentence_embedding_cache.encode(self.similarity_model, sentences))
+        norms = np.linalg.norm(pooled, axis=1, keepdims=True)
+        return pooled / np.where(norms == 0, 1.0, norms)
+
+    def _get_embedding_intent_classifier(self):
+        global _embedding_intent_classifier
+        if _embedding_intent_classifier is None:
+            with _embedding_intent_lock:
+                if _embedding_intent_classifier is None:
+                    _embedding_intent_classifier = EmbeddingIntentClassifier.from_encoder(
+                        lambda texts: sentence_embedding_cache.encode(self.similarity_model, texts)
+                    )
+        return _embedding_intent_classifier
 
     def analyze_sentiment(self, messages):
         """Analyse de sentiment avec fallback"""
@@ -70,35 +202,69 @@ class MultiModelInterviewAnalyzer:
         if not user_messages:
             return []
         
-        if not self.sentiment_analyzer:
-            logger.warning("Sentiment analyzer non disponible, retour de données par défaut")
-            return [{"label": "neutral", "score": 0.5} for _ in user_messages]
-        
+        def compute(texts):
+            if not self.sentiment_analyzer:
+                logger.warning("Sentiment analyzer non disponible, retour de données par défaut")
+                return None
+            # Découpage en fenêtres pour les réponses longues, batches triés par longueur
+            return classify_texts(self.sentiment_analyzer, texts)
+
         try:
-            sentiments = self.sentiment_analyzer(user_messages)
-            return sentiments
+            return cached_per_answer("sentiment", user_messages, compute, {"label": "neutral", "score": 0.5})
         except Exception as e:
             logger.error(f"Erreur lors de l'analyse de sentiment : {e}")
             return [{"label": "error", "score": 0.0} for _ in user_messages]
 
-    def compute_semantic_similarity(self, messages, job_requirements):
-        """Calcul de similarité avec fallback"""
+    def compute_requirement_coverage(self, messages, job_requirements):
+        """
+        Couverture des exigences phrase par phrase : matrice de similarité
+        exigences x réponses calculée en une seule opération vectorisée.
+        """
         if not self.similarity_model:
             logger.warning("Similarity model non disponible, retour de score par défaut")
-            return 0.5
-        
+            return {"aggregate_score": 0.5, "coverage_ratio": 0.0, "requirements": []}
+
         try:
-            user_answers = " ".join([msg['content'] for msg in messages if msg['role'] == 'user'])
-            if not user_answers.strip():
-                return 0.0
-            
-            embedding_answers = self.similarity_model.encode(user_answers, convert_to_tensor=True)
-            embedding_requirements = self.similarity_model.encode(job_requirements, convert_to_tensor=True)
-            cosine_score = util.cos_sim(embedding_answers, embedding_requirements)
-            return float(cosine_score.item())
+            answer_sentences, answer_turns = [], []
+            user_turn = 0
+            for msg in messages:
+                if msg['role'] != 'user':
+                    continue
+                for sentence in split_sentences(msg['content']):
+                    answer_sentences.append(sentence)
+                    answer_turns.append(user_turn)
+                user_turn += 1
+            requirement_sentences = split_sentences(job_requirements)
+            if not answer_sentences or not requirement_sentences:
+                return {"aggregate_score": 0.0, "coverage_ratio": 0.0, "requirements": []}
+
+            answers = sentence_embedding_cache.encode(self.similarity_model, answer_sentences)
+            requirements = sentence_embedding_cache.encode(self.similarity_model, requirement_sentences)
+            similarity = requirements @ answers.T
+
+            best = similarity.argmax(axis=1)
+            best_scores = similarity[np.arange(len(requirement_sentences)), best]
+            per_requirement = [
+                {
+                    "requirement": requirement,
+                    "best_answer": answer_sentences[b],
+                    "turn": answer_turns[b],
+                    "score": round(float(score), 3),
+                }
+                for requirement, b, score in zip(requirement_sentences, best, best_scores)
+            ]
+            return {
+                "aggregate_score": float(best_scores.mean()),
+                "coverage_ratio": float((best_scores >= COVERAGE_MATCH_THRESHOLD).mean()),
+                "requirements": per_requirement,
+            }
         except Exception as e:
-            logger.error(f"Erreur lors du calcul de similarité : {e}")
-            return 0.0
+            logger.error(f"Erreur lors du calcul de couverture des exigences : {e}")
+            return {"aggregate_score": 0.0, "coverage_ratio": 0.0, "requirements": []}
+
+    def compute_semantic_similarity(self, messages, job_requirements):
+        """Score global = moyenne des meilleures correspondances par exigence"""
+        return self.compute_requirement_coverage(messages, job_requirements)["aggregate_score"]
 
     def classify_candidate_intent(self, messages):
         """Classification d'intention avec fallback"""
@@ -106,35 +272,27 @@ class MultiModelInterviewAnalyzer:
         if not user_answers:
             return []
         
-        if not self.intent_classifier:
-            logger.warning("Intent classifier non disponible, retour de données par défaut")
-            return [{"labels": ["unknown"], "scores": [0.5]} for _ in user_answers]
-        
+        def compute(texts):
+            if not self.intent_available:
+                logger.warning("Intent classifier non disponible, retour de données par défaut")
+                return None
+            if self.intent_engine == EMBEDDING_ENGINE:
+                classifier = self._get_embedding_intent_classifier()
+                return classifier.classify_vectors(texts, self.embed_answers(texts))
+            # Une seule tokenisation, fenêtres chevauchantes et batches triés par longueur
+            return zero_shot_texts(self.intent_classifier, texts, INTENT_LABELS)
+
         try:
-            candidate_labels = [
-                "parle de son expérience technique",
-                "exprime sa motivation", 
-                "pose une question",
-                "exprime de l'incertitude ou du stress"
-            ]
-            
-            # Traitement batch plus efficace
-            classifications = []
-            for answer in user_answers:
-                try:
-                    result = self.intent_classifier(answer, candidate_labels, multi_label=False)
-                    classifications.append(result)
-                except Exception as e:
-                    logger.warning(f"Erreur classification pour un message : {e}")
-                    classifications.append({"labels": ["error"], "scores": [0.0]})
-            
-            return classifications
+            return cached_per_answer(
+                f"intent:{self.intent_engine}", user_answers, compute, {"labels": ["unknown"], "scores": [0.5]}
+            )
         except Exception as e:
             logger.error(f"Erreur lors de la classification d'intention : {e}")
             return [{"labels": ["error"], "scores": [0.0]} for _ in user_answers]
 
-    def run_full_analysis(self, conversation_history, job_requirements):
-        """Analyse complète avec gestion d'erreurs robuste"""
+    @profile_stage("analysis", torch_trace=True)
+    def run_full_analysis(self, conversation_history, job_requirements, include_transcript=True):
+        """Analyse complète avec gestion d'erreurs robuste. `include_transcript=False` omet la transcription de la sortie."""
         try:
             # Validation des entrées
             if not conversation_history:
@@ -142,23 +300,32 @@ class MultiModelInterviewAnalyzer:
             if not job_requirements:
                 job_requirements = "Aucune exigence spécifiée"
             
-            # Analyses avec fallback
-            sentiment_results = self.analyze_sentiment(conversation_history)
-            similarity_score = self.compute_semantic_similarity(conversation_history, job_requirements)
-            intent_results = self.classify_candidate_intent(conversation_history)
-            
-            analysis_output = {
-                "overall_similarity_score": round(similarity_score, 2),
-                "sentiment_analysis": sentiment_results,
-                "intent_analysis": intent_results,
-                "raw_transcript": conversation_history,
-                "models_status": {
-                    "sentiment_available": self.sentiment_analyzer is not None,
-                    "similarity_available": self.similarity_model is not None,
-                    "intent_available": self.intent_classifier is not None,
-                    "models_loaded": self.models_loaded
+            # Analyses avec fallback ; les modèles ne peuvent pas être évincés pendant l'analyse
+            with self.residency.hold(*self.model_keys):
+                # Les trois modèles tournent en parallèle, chacun sur sa file avec son budget de threads
+                intent_lane = "intent" if "intent" in self.model_keys else "similarity"
+                sentiment_future = self.scheduler.submit("sentiment", self.analyze_sentiment, conversation_history)
+                intent_future = self.scheduler.submit(intent_lane, self.classify_candidate_intent, conversation_history)
+                coverage = self.scheduler.run(
+                    "similarity", self.compute_requirement_coverage, conversation_history, job_requirements
+                )
+                sentiment_results = sentiment_future.result()
+                intent_results = intent_future.result()
+
+                analysis_output = {
+                    "overall_similarity_score": round(coverage["aggregate_score"], 2),
+                    "requirement_coverage": coverage,
+                    "sentiment_analysis": sentiment_results,
+                    "intent_analysis": intent_results,
+                    "raw_transcript": conversation_history if include_transcript else None,
+                    "models_status": {
+                        "sentiment_available": self.sentiment_analyzer is not None,
+                        "similarity_available": self.similarity_model is not None,
+                        "intent_available": self.intent_available,
+                        "intent_engine": self.intent_engine,
+                        "models_loaded": self.models_loaded
+                    }
                 }
-            }
             
             return analysis_output
             
@@ -169,7 +336,7 @@ class MultiModelInterviewAnalyzer:
                 "overall_similarity_score": 0.0,
                 "sentiment_analysis": [],
                 "intent_analysis": [],
-                "raw_transcript": conversation_history,
+                "raw_transcript": conversation_history if include_transcript else None,
                 "error": str(e),
                 "models_status": {"error": True}
             }
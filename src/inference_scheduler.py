@@ -0,0 +1,224 @@
+import os
+import logging
+import threading
+import contextvars
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+logger = logging.getLogger(__name__)
+
+INFERENCE_SCHEDULER_ENABLED = os.getenv("INFERENCE_SCHEDULER", "true").lower() == "true"
+INFERENCE_CONCURRENCY = int(os.getenv("INFERENCE_CONCURRENCY", "4"))
+INFERENCE_INTEROP_THREADS = int(os.getenv("INFERENCE_INTEROP_THREADS", "1"))
+INFERENCE_PIN_CORES = os.getenv("INFERENCE_PIN_CORES", "false").lower() == "true"
+
+# Part relative des cœurs par modèle : XLM-R large coûte à peu près deux fois CamemBERT base
+MODEL_THREAD_WEIGHTS = {"sentiment": 1.0, "similarity": 1.0, "intent": 2.0}
+
+
+def available_cores() -> int:
+    """Cœurs utilisables : affinité du processus, bornée par le quota cgroup (Cloud Run, Docker)."""
+    cores = len(os.sched_getaffinity(0)) if hasattr(os, "sched_getaffinity") else (os.cpu_count() or 1)
+    try:
+        with open("/sys/fs/cgroup/cpu.max") as f:
+            quota, period = f.read().split()
+        if quota != "max":
+            cores = min(cores, max(1, int(int(quota) / int(period))))
+    except (OSError, ValueError):
+        pass
+    return cores
+
+
+def plan_thread_budgets(cores: int, concurrency: int, weights: Dict[str, float]) -> Dict[str, Dict[str, int]]:
+    """
+    Répartit les cœurs entre modèles au prorata de leur poids. Chaque modèle a
+    au plus `concurrency` workers et au moins un cœur par worker. Le nombre de
+    threads intra-op est un réglage global de torch (et de MKL) : il est commun
+    à toutes les files, choisi pour que la somme workers x threads intra-op ne
+    dépasse pas le nombre de cœurs (hors arrondi à 1).
+    """
+    total = sum(weights.values()) or 1.0
+    budgets = {}
+    for model, weight in weights.items():
+        share = max(1, int(cores * weight / total))
+        budgets[model] = {"cores": share, "workers": max(1, min(concurrency, share))}
+    intra_op_threads = max(1, cores // (sum(b["workers"] for b in budgets.values()) or 1))
+    for budget in budgets.values():
+        budget["intra_op_threads"] = intra_op_threads
+    return budgets
+
+
+def _set_torch_threads(threads: int):
+    try:
+        import torch
+        torch.set_num_threads(threads)
+    except Exception as e:
+        logger.debug(f"Threads intra-op non modifiés : {e}")
+
+
+class ModelLane:
+    """
+    Executor dédié à un modèle : la part de cœurs d'un modèle se traduit par
+    son nombre de workers, seule ressource réellement propre à la file (les
+    threads intra-op sont fixés une fois pour tout le processus).
+    """
+
+    def __init__(self, name: str, cores: int, workers: int, cpu_set: Optional[Sequence[int]] = None):
+        self.name = name
+        self.cores = cores
+        self.workers = workers
+        self.cpu_set = set(cpu_set) if cpu_set else None
+        self.active = 0
+        self.queued = 0
+        self.completed = 0
+        self._lock = threading.Lock()
+        self.executor = ThreadPoolExecutor(
+            max_workers=workers, thread_name_prefix=f"infer-{name}", initializer=self._init_worker
+        )
+
+    def _init_worker(self):
+        if self.cpu_set and hasattr(os, "sched_setaffinity"):
+            try:
+                # pid 0 = thread appelant ; les threads OpenMP créés ensuite héritent de l'affinité
+                os.sched_setaffinity(0, self.cpu_set)
+            except OSError as e:
+                logger.warning(f"Épinglage de {self.name} sur {sorted(self.cpu_set)} impossible : {e}")
+
+    def _run(self, context: contextvars.Context, fn: Callable, args, kwargs):
+        with self._lock:
+            self.queued -= 1
+            self.active += 1
+        try:
+            return context.run(fn, *args, **kwargs)
+        finally:
+            with self._lock:
+                self.active -= 1
+                self.completed += 1
+
+    def submit(self, fn: Callable, *args, **kwargs) -> Future:
+        with self._lock:
+            self.queued += 1
+        try:
+            return self.executor.submit(self._run, contextvars.copy_context(), fn, args, kwargs)
+        except BaseException:
+            with self._lock:
+                self.queued -= 1
+            raise
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            active, queued, completed = self.active, self.queued, self.completed
+        return {
+            "cores": self.cores,
+            "workers": self.workers,
+            "active": active,
+            "completed": completed,
+            "queued": queued,
+            "cpu_set": sorted(self.cpu_set) if self.cpu_set else None,
+        }
+
+
+class InferenceScheduler:
+    """
+    Répartit l'inférence des modèles de l'analyseur sur des executors dédiés
+    avec un budget de threads par modèle, pour éviter la sur-souscription des
+    cœurs quand plusieurs analyses tournent en parallèle. Désactivé, ou pour un
+    modèle sans file, l'appel est exécuté dans le thread appelant.
+    """
+
+    def __init__(self, models: Sequence[str] = tuple(MODEL_THREAD_WEIGHTS), cores: Optional[int] = None,
+                 concurrency: int = INFERENCE_CONCURRENCY, pin: bool = False, enabled: bool = True,
+                 intra_op_threads: Optional[int] = None):
+        self.enabled = enabled
+        self.cores = cores or available_cores()
+        self.concurrency = concurrency
+        self.lanes: Dict[str, ModelLane] = {}
+        self.intra_op_threads: Optional[int] = None
+        if not enabled:
+            return
+
+        weights = {m: MODEL_THREAD_WEIGHTS.get(m, 1.0) for m in models}
+        self.budgets = plan_thread_budgets(self.cores, concurrency, weights)
+        if intra_op_threads:
+            for budget in self.budgets.values():
+                budget["intra_op_threads"] = intra_op_threads
+        self.intra_op_threads = next(iter(self.budgets.values()))["intra_op_threads"] if self.budgets else None
+        cpu_sets = self._cpu_sets() if pin else {}
+        for model, budget in self.budgets.items():
+            self.lanes[model] = ModelLane(model, budget["cores"], budget["workers"], cpu_sets.get(model))
+        self.apply_thread_settings()
+        logger.info(f"Ordonnanceur d'inférence : {self.cores} cœurs, budgets {self.budgets}, épinglage={pin}")
+
+    def apply_thread_settings(self):
+        """
+        Fixe les threads intra-op une fois pour tout le processus : torch.set_num_threads
+        n'est pas propre au thread appelant, un réglage par appel serait écrasé par
+        les autres files.
+        """
+        if self.enabled and self.intra_op_threads:
+            _set_torch_threads(self.intra_op_threads)
+
+    def _cpu_sets(self) -> Dict[str, List[int]]:
+        if not hasattr(os, "sched_getaffinity"):
+            return {}
+        cpus = sorted(os.sched_getaffinity(0))
+        sets, start = {}, 0
+        for model, budget in self.budgets.items():
+            chunk = cpus[start:start + budget["cores"]] or cpus[-budget["cores"]:]
+            sets[model] = chunk
+            start += budget["cores"]
+        return sets
+
+    def submit(self, model: str, fn: Callable, *args, **kwargs) -> Future:
+        lane = self.lanes.get(model)
+        if lane is not None:
+            return lane.submit(fn, *args, **kwargs)
+        future = Future()
+        try:
+            future.set_result(fn(*args, **kwargs))
+        except BaseException as e:
+            future.set_exception(e)
+        return future
+
+    def run(self, model: str, fn: Callable, *args, **kwargs):
+        return self.submit(model, fn, *args, **kwargs).result()
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "enabled": self.enabled,
+            "cores": self.cores,
+            "concurrency": self.concurrency,
+            "intra_op_threads": self.intra_op_threads,
+            "lanes": {name: lane.snapshot() for name, lane in self.lanes.items()},
+        }
+
+    def shutdown(self):
+        for lane in self.lanes.values():
+            lane.executor.shutdown(wait=False)
+
+
+_scheduler: Optional[InferenceScheduler] = None
+_scheduler_lock = threading.Lock()
+
+
+def configure_interop_threads(threads: int = INFERENCE_INTEROP_THREADS):
+    """Réglage global de torch, possible une seule fois avant le premier calcul parallèle."""
+    try:
+        import torch
+        torch.set_num_interop_threads(threads)
+    except Exception as e:
+        logger.debug(f"Threads inter-op non modifiés : {e}")
+
+
+def get_inference_scheduler() -> InferenceScheduler:
+    global _scheduler
+    if _scheduler is None:
+        with _scheduler_lock:
+            if _scheduler is None:
+                from src.intent_engines import INTENT_ENGINE, EMBEDDING_ENGINE
+                models = [m for m in MODEL_THREAD_WEIGHTS if not (m == "intent" and INTENT_ENGINE == EMBEDDING_ENGINE)]
+                configure_interop_threads()
+                _scheduler = InferenceScheduler(
+                    models=models, pin=INFERENCE_PIN_CORES, enabled=INFERENCE_SCHEDULER_ENABLED
+                )
+    return _scheduler
@@ -0,0 +1,134 @@
+import os
+import logging
+from typing import Callable, Dict, List, Optional, Sequence
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+ZERO_SHOT_ENGINE = "zero-shot"
+EMBEDDING_ENGINE = "embedding"
+INTENT_ENGINE = os.getenv("INTENT_ENGINE", ZERO_SHOT_ENGINE)
+INTENT_HEAD_PATH = os.getenv("INTENT_HEAD_PATH")
+
+INTENT_LABELS = [
+    "parle de son expérience technique",
+    "exprime sa motivation",
+    "pose une question",
+    "exprime de l'incertitude ou du stress"
+]
+
+# Exemples de référence par label : leur embedding moyen sert de prototype
+LABEL_PROTOTYPES: Dict[str, List[str]] = {
+    INTENT_LABELS[0]: [
+        "J'ai développé une API REST en Python avec FastAPI et PostgreSQL.",
+        "Sur ce projet j'ai conçu l'architecture et mis en place les tests automatisés.",
+        "Nous déployions les services avec Docker et Kubernetes sur le cloud.",
+        "J'ai entraîné un modèle de classification avec PyTorch.",
+        "I built a data pipeline and optimised the SQL queries.",
+    ],
+    INTENT_LABELS[1]: [
+        "Ce poste me motive beaucoup, j'ai envie de rejoindre votre équipe.",
+        "Ce qui me plaît, c'est l'impact du produit et les défis techniques.",
+        "Je suis passionné par ce domaine et j'ai envie d'apprendre.",
+        "I'm really excited about this opportunity.",
+    ],
+    INTENT_LABELS[2]: [
+        "Est-ce que l'équipe travaille en télétravail ?",
+        "Pouvez-vous m'en dire plus sur l'organisation de l'équipe ?",
+        "Quelles sont les prochaines étapes du processus ?",
+        "What does a typical day look like?",
+    ],
+    INTENT_LABELS[3]: [
+        "Je ne suis pas sûr de bien comprendre la question.",
+        "Honnêtement je n'ai pas beaucoup d'expérience là-dessus, ça m'inquiète un peu.",
+        "Euh, je ne sais pas trop, je suis un peu stressé.",
+        "I'm not really sure, I haven't done that before.",
+    ],
+}
+
+DEFAULT_TEMPERATURE = 0.05
+
+
+def _softmax(logits: np.ndarray) -> np.ndarray:
+    logits = logits - logits.max(axis=1, keepdims=True)
+    exp = np.exp(logits)
+    return exp / exp.sum(axis=1, keepdims=True)
+
+
+class EmbeddingIntentClassifier:
+    """
+    Classification d'intention sur les embeddings MiniLM déjà calculés pour la
+    similarité : cosinus avec des prototypes de labels, ou tête linéaire
+    entraînée (fichier .npz avec W, b, labels) si disponible.
+    """
+
+    def __init__(self, prototypes: np.ndarray, labels: Sequence[str] = INTENT_LABELS,
+                 head: Optional[Dict[str, np.ndarray]] = None, temperature: float = DEFAULT_TEMPERATURE):
+        self.labels = list(labels)
+        self.prototypes = prototypes
+        self.head = head
+        self.temperature = temperature
+
+    @classmethod
+    def from_encoder(cls, encode: Callable[[List[str]], np.ndarray], labels: Sequence[str] = INTENT_LABELS,
+                     head_path: Optional[str] = INTENT_HEAD_PATH, **kwargs) -> "EmbeddingIntentClassifier":
+        """`encode` renvoie des embeddings normalisés (une ligne par texte)."""
+        rows = []
+        for label in labels:
+            vectors = encode([label] + LABEL_PROTOTYPES.get(label, []))
+            centroid = vectors.mean(axis=0)
+            rows.append(centroid / (np.linalg.norm(centroid) or 1.0))
+        return cls(np.vstack(rows).astype(np.float32), labels, load_linear_head(head_path, labels), **kwargs)
+
+    def scores(self, vectors: np.ndarray) -> np.ndarray:
+        if self.head is not None:
+            return _softmax(vectors @ self.head["W"].T + self.head["b"])
+        return _softmax((vectors @ self.prototypes.T) / self.temperature)
+
+    def classify_vectors(self, texts: Sequence[str], vectors: np.ndarray) -> List[Dict]:
+        """Même format de sortie que le pipeline zero-shot."""
+        if len(texts) == 0:
+            return []
+        results = []
+        for text, row in zip(texts, self.scores(vectors)):
+            order = np.argsort(-row)
+            results.append({
+                "sequence": text,
+                "labels": [self.labels[i] for i in order],
+                "scores": [float(row[i]) for i in order],
+            })
+        return results
+
+
+def load_linear_head(path: Optional[str], labels: Sequence[str]) -> Optional[Dict[str, np.ndarray]]:
+    if not path or not os.path.exists(path):
+        return None
+    try:
+        data = np.load(path, allow_pickle=False)
+        if list(data["labels"]) != list(labels):
+            logger.warning(f"Tête d'intention ignorée : labels différents dans {path}")
+            return None
+        return {"W": data["W"].astype(np.float32), "b": data["b"].astype(np.float32)}
+    except Exception as e:
+        logger.warning(f"Impossible de charger la tête d'intention {path} : {e}")
+        return None
+
+
+def train_linear_head(vectors: np.ndarray, targets: Sequence[int], n_labels: int,
+                      epochs: int = 300, lr: float = 0.5, l2: float = 1e-3) -> Dict[str, np.ndarray]:
+    """Régression logistique multinomiale (descente de gradient) sur des embeddings normalisés."""
+    n, dim = vectors.shape
+    W = np.zeros((n_labels, dim), dtype=np.float32)
+    b = np.zeros(n_labels, dtype=np.float32)
+    onehot = np.eye(n_labels, dtype=np.float32)[np.asarray(targets)]
+    for _ in range(epochs):
+        probs = _softmax(vectors @ W.T + b)
+        grad = (probs - onehot) / n
+        W -= lr * (grad.T @ vectors + l2 * W)
+        b -= lr * grad.sum(axis=0)
+    return {"W": W, "b": b}
+
+
+def save_linear_head(path: str, head: Dict[str, np.ndarray], labels: Sequence[str]):
+    np.savez(path, W=head["W"], b=head["b"], labels=np.asarray(list(labels)))
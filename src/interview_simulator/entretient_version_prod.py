@@ -1,6 +1,8 @@
 import os
 import sys
 import json
+import logging
+import threading
 from typing import Dict, List, Any, Annotated
 from typing_extensions import TypedDict
 
@@ -9,57 +11,114 @@ from langchain_groq import ChatGroq
 from langgraph.graph import StateGraph, START, END
 from langgraph.graph.message import add_messages
 from langgraph.prebuilt import ToolNode 
-from langchain_openai import ChatOpenAI
 
-from src.config import read_system_prompt, format_cv
+from src.config import read_system_prompt, fallback_llm
+from src.cv_document import canonical_cv
+from src.job_offer import canonical_offer
 from src.crew.crew_pool import interview_analyser 
+from src.llm_client import ResilientLLM
+from src.profiling import profile_stage
+from src.tokens import count_tokens
+from src.memo import SingleFlightCache
+from src.model_router import get_model_router, chat_model, INTERVIEW_TURN
+from src.interview_simulator.interview_plan import INTERVIEW_PLAN_ENABLED, get_interview_plan, render_plan
 
 
+logger = logging.getLogger(__name__)
+
 class State(TypedDict):
     messages: Annotated[list, add_messages]
 
+INTERVIEW_TEMPERATURE = 0.6
+INTERVIEW_TIER_CACHE_SIZE = int(os.getenv("INTERVIEW_TIER_CACHE_SIZE", "4096"))
+INTERVIEW_TIER_TTL_SECONDS = float(os.getenv("INTERVIEW_TIER_TTL_SECONDS", "7200"))
+
+_routed_llms: Dict[str, ResilientLLM] = {}
+_routed_llms_lock = threading.Lock()
+
+# Palier retenu par entretien (CV, offre) : l'interlocuteur ne change pas d'un tour à l'autre
+interview_tiers = SingleFlightCache("interview_tier", max_entries=INTERVIEW_TIER_CACHE_SIZE, ttl_seconds=INTERVIEW_TIER_TTL_SECONDS)
+
+
+def _interview_llm(tier: str, tools) -> ResilientLLM:
+    """Client avec outils par palier de modèle, partagé entre les entretiens (sans état par requête)."""
+    with _routed_llms_lock:
+        if tier not in _routed_llms:
+            llm = chat_model(tier, INTERVIEW_TEMPERATURE)
+            fallback = fallback_llm(temperature=INTERVIEW_TEMPERATURE, primary_model=llm.model_name)
+            _routed_llms[tier] = ResilientLLM(
+                primary=llm.bind_tools(tools),
+                fallback=fallback.bind_tools(tools) if fallback is not None else None,
+                name=f"interview:{llm.model_name}",
+            )
+        return _routed_llms[tier]
+
 class InterviewProcessor:
-    def __init__(self, cv_document: Dict[str, Any], job_offer: Dict[str, Any], conversation_history: List[Dict[str, Any]]):
+    def __init__(self, cv_document: Dict[str, Any], job_offer: Any, conversation_history: List[Dict[str, Any]]):
         if not cv_document or 'candidat' not in cv_document:
             raise ValueError("Document CV invalide fourni.")
         if not job_offer:
             raise ValueError("Données de l'offre d'emploi non fournies.")
 
-        self.job_offer = job_offer
-        self.cv_data = cv_document['candidat']
+        # Offre du catalogue (pré-calculée) ou dict du client, normalisé ici
+        self.offer = canonical_offer(job_offer)
+        self.job_offer = self.offer.data
+        self.cv = canonical_cv(cv_document)
+        self.cv_data = self.cv.data
         self.conversation_history = conversation_history
         self.tools = [interview_analyser]
-        self.llm = self._get_llm()
-        self.llm_with_tools = self.llm.bind_tools(self.tools)
+        self.router = get_model_router()
+        self.tier_key = (self.cv.content_hash, self.offer.content_hash)
 
         self.system_prompt_template = self._load_prompt_template()
+        # Construit au premier run (dans le thread de travail) : le plan peut nécessiter un appel LLM
+        self.system_prompt = None
         self.graph = self._build_graph()
 
-    def _get_llm(self) -> ChatOpenAI:
-        openai_api_key = os.getenv("OPENAI_API_KEY")
-        return ChatOpenAI(
-        temperature=0.6, 
-        model_name="gpt-4o-mini", 
-        api_key=openai_api_key
-    )
-
     def _load_prompt_template(self) -> str:
         return read_system_prompt('prompts/rag_prompt.txt')
 
+    def _build_system_prompt(self) -> str:
+        entreprise = self.offer.entreprise
+        poste = self.offer.poste
+        plan = get_interview_plan(self.cv, self.offer) if INTERVIEW_PLAN_ENABLED else None
+        if plan is not None:
+            # Plan compact calculé une fois par (CV, offre) à la place du CV et de la description bruts
+            prompt = read_system_prompt('prompts/rag_prompt_plan.txt').format(
+                entreprise=entreprise, poste=poste, plan=render_plan(plan)
+            )
+        else:
+            # CV pré-formaté par le document canonique : rien n'est recalculé à chaque appel du nœud
+            prompt = self.system_prompt_template.format(
+                entreprise=entreprise,
+                poste=poste,
+                description=self.offer.description or 'la description du poste',
+                cv=self.cv.formatted
+            )
+        logger.info(f"Prompt système ({'plan' if plan is not None else 'complet'}) : {count_tokens(prompt)} tokens")
+        return prompt
+
+    def _pin_tool_arguments(self, response):
+        # La description n'est plus dans le prompt en mode plan : l'outil reçoit toujours celle de l'offre
+        for tool_call in getattr(response, 'tool_calls', None) or []:
+            if tool_call.get('name') == interview_analyser.name:
+                tool_call['args']['job_description_text'] = self.offer.description
+        return response
+
     def _chatbot_node(self, state: State) -> dict:
         if state["messages"] and isinstance(state["messages"][-1], ToolMessage):
             tool_message = state["messages"][-1]
             return {"messages": [AIMessage(content=tool_message.content)]}
         messages = state["messages"]
-        formatted_cv_str = format_cv(self.cv_data)
-        system_prompt = self.system_prompt_template.format(
-            entreprise=self.job_offer.get('entreprise', 'notre entreprise'),
-            poste=self.job_offer.get('poste', 'ce poste'),
-            description=self.job_offer.get('description', 'la description du poste'),
-            cv=formatted_cv_str
-        )
-        llm_messages = [SystemMessage(content=system_prompt)] + messages
-        response = self.llm_with_tools.invoke(llm_messages)
+        llm_messages = [SystemMessage(content=self.system_prompt)] + messages
+        input_tokens = sum(count_tokens(str(getattr(m, 'content', '') or '')) for m in llm_messages)
+        # Palier épinglé pour tout l'entretien ; il ne change que si le contexte n'y tient plus
+        decision = self.router.route(INTERVIEW_TURN, input_tokens, pinned=interview_tiers.get(self.tier_key))
+        interview_tiers.put(self.tier_key, decision.tier)
+        # Retries et deadlines gérés par ResilientLLM ; le routeur ne retient que l'issue du palier choisi
+        with self.router.observe(decision) as outcome:
+            response = _interview_llm(decision.tier, self.tools).invoke(llm_messages, on_primary=outcome.record)
+        response = self._pin_tool_arguments(response)
         return {"messages": [response]}
 
     def _route_after_chatbot(self, state: State) -> str:
@@ -85,6 +144,9 @@ class InterviewProcessor:
         graph_builder.add_edge("call_tool", "chatbot")
         return graph_builder.compile()
 
+    @profile_stage("interview")
     def run(self, messages: List[Dict[str, Any]]) -> Dict[str, Any]:
+        if self.system_prompt is None:
+            self.system_prompt = self._build_system_prompt()
         initial_state = self.conversation_history + messages
         return self.graph.invoke({"messages": initial_state})
\ No newline at end of file
@@ -0,0 +1,114 @@
+import os
+import logging
+from typing import Any, Dict, List, Optional, Union
+
+from langchain_core.messages import SystemMessage, HumanMessage
+from langchain_core.pydantic_v1 import BaseModel, Field
+
+from src.cv_document import CVDocument
+from src.job_offer import JobOffer, canonical_offer
+from src.memo import SingleFlightCache
+from src.llm_client import ResilientLLM
+
+logger = logging.getLogger(__name__)
+
+PLAN_VERSION = 1
+PLAN_MODEL = os.getenv("INTERVIEW_PLAN_MODEL", "gpt-4o-mini")
+INTERVIEW_PLAN_ENABLED = os.getenv("INTERVIEW_PLAN_ENABLED", "true").lower() == "true"
+INTERVIEW_PLAN_CACHE_SIZE = int(os.getenv("INTERVIEW_PLAN_CACHE_SIZE", "512"))
+INTERVIEW_PLAN_TTL_SECONDS = float(os.getenv("INTERVIEW_PLAN_TTL_SECONDS", "86400"))
+# Durée pendant laquelle un échec du planificateur est mémorisé : les tours suivants passent
+# directement au prompt complet au lieu d'attendre à nouveau la deadline du planificateur
+INTERVIEW_PLAN_FAILURE_TTL_SECONDS = float(os.getenv("INTERVIEW_PLAN_FAILURE_TTL_SECONDS", "60"))
+MAX_QUESTIONS = 8
+
+PLANNER_INSTRUCTIONS = (
+    "Tu prépares un entretien de recrutement. À partir de l'offre et du CV, produis un plan compact : "
+    "le nom du candidat, une présentation de l'entreprise et de la mission en deux phrases, "
+    "les exigences clés du poste, les faits du CV utiles à l'entretien (expériences professionnelles et projets "
+    "bien distingués, avec leur niveau réel : un simple dashboard PowerBI n'est pas une expérience solide), "
+    f"puis au plus {MAX_QUESTIONS} questions ordonnées, chacune rattachée à une exigence et à un élément du CV. "
+    "Sois factuel et concis : chaque fait et chaque question tient en une phrase."
+)
+
+
+class PlannedQuestion(BaseModel):
+    topic: str = Field(description="Exigence du poste évaluée")
+    question: str = Field(description="Question à poser, formulée naturellement")
+    cv_reference: str = Field(default="", description="Élément du CV sur lequel s'appuie la question")
+
+
+class InterviewPlan(BaseModel):
+    candidate_name: str = Field(description="Nom du candidat tel qu'indiqué dans le CV")
+    company_pitch: str = Field(description="Présentation de l'entreprise et de la mission (2 phrases)")
+    key_requirements: List[str] = Field(description="Exigences clés du poste")
+    cv_facts: List[str] = Field(description="Faits du CV utiles à l'entretien, une phrase chacun")
+    questions: List[PlannedQuestion] = Field(description="Questions ordonnées")
+
+
+plan_cache = SingleFlightCache("interview_plan", max_entries=INTERVIEW_PLAN_CACHE_SIZE, ttl_seconds=INTERVIEW_PLAN_TTL_SECONDS)
+plan_failures = SingleFlightCache(
+    "interview_plan_failures", max_entries=INTERVIEW_PLAN_CACHE_SIZE, ttl_seconds=INTERVIEW_PLAN_FAILURE_TTL_SECONDS
+)
+
+
+def plan_cache_key(cv: CVDocument, job_offer: Union[JobOffer, Dict[str, Any]]):
+    return (cv.content_hash, canonical_offer(job_offer).content_hash, PLAN_VERSION, PLAN_MODEL)
+
+
+def _planner() -> ResilientLLM:
+    from langchain_openai import ChatOpenAI
+    from src.config import fallback_llm, OPENAI_BASE_URL
+    from src.llm_client import LLM_ATTEMPT_TIMEOUT
+
+    llm = ChatOpenAI(
+        model=PLAN_MODEL,
+        temperature=0.2,
+        api_key=os.getenv("OPENAI_API_KEY"),
+        base_url=OPENAI_BASE_URL,
+        timeout=LLM_ATTEMPT_TIMEOUT,
+        max_retries=0
+    )
+    fallback = fallback_llm(temperature=0.2, primary_model=PLAN_MODEL)
+    return ResilientLLM(
+        primary=llm.with_structured_output(InterviewPlan),
+        fallback=fallback.with_structured_output(InterviewPlan) if fallback is not None else None,
+        name=f"interview_plan:{PLAN_MODEL}",
+        hedge=False,
+    )
+
+
+def generate_plan(cv: CVDocument, job_offer: Union[JobOffer, Dict[str, Any]]) -> InterviewPlan:
+    offer = canonical_offer(job_offer)
+    plan = _planner().invoke([
+        SystemMessage(content=PLANNER_INSTRUCTIONS),
+        HumanMessage(content=f"OFFRE\n{offer.prompt_fragment}\n\nCV\n{cv.formatted}"),
+    ])
+    plan.questions = plan.questions[:MAX_QUESTIONS]
+    return plan
+
+
+def get_interview_plan(cv: CVDocument, job_offer: Union[JobOffer, Dict[str, Any]]) -> Optional[InterviewPlan]:
+    """Plan calculé une fois par (CV, offre) ; None si la génération échoue ou a échoué récemment (prompt complet en repli)."""
+    key = plan_cache_key(cv, job_offer)
+    if plan_failures.get(key) is not None:
+        return None
+    try:
+        return plan_cache.get_or_compute(key, lambda: generate_plan(cv, job_offer))
+    except Exception as e:
+        plan_failures.put(key, str(e) or type(e).__name__)
+        logger.warning(f"Plan d'entretien indisponible, prompt complet utilisé : {e}")
+        return None
+
+
+def render_plan(plan: InterviewPlan) -> str:
+    """Texte compact injecté dans le prompt à la place du CV et de la description bruts."""
+    lines = [f"Candidat : {plan.candidate_name}", f"Entreprise et mission : {plan.company_pitch}", "Exigences clés :"]
+    lines.extend(f"- {requirement}" for requirement in plan.key_requirements)
+    lines.append("Faits du CV :")
+    lines.extend(f"- {fact}" for fact in plan.cv_facts)
+    lines.append("Questions prévues, dans l'ordre :")
+    for index, question in enumerate(plan.questions, start=1):
+        reference = f" (CV : {question.cv_reference})" if question.cv_reference else ""
+        lines.append(f"{index}. [{question.topic}] {question.question}{reference}")
+    return "\n".join(lines)
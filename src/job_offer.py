@@ -0,0 +1,231 @@
+import os
+import re
+import json
+import logging
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass, field, replace
+from typing import Any, Dict, Optional, Tuple
+
+import numpy as np
+
+from src.memo import stable_hash
+
+logger = logging.getLogger(__name__)
+
+JOB_OFFER_CATALOG_SIZE = int(os.getenv("JOB_OFFER_CATALOG_SIZE", "1024"))
+JOB_OFFER_STORAGE_DIR = os.getenv("JOB_OFFER_STORAGE_DIR", "/tmp/job_offers")
+
+DEFAULT_ENTREPRISE = "notre entreprise"
+DEFAULT_POSTE = "ce poste"
+
+_INLINE_SPACES_RE = re.compile(r"[ \t\u00a0]+")
+_BLANK_LINES_RE = re.compile(r"\n{3,}")
+
+
+def normalize_description(text: Any) -> str:
+    """Espaces et lignes vides homogènes : la même offre donne toujours le même texte (et les mêmes phrases)."""
+    if not isinstance(text, str):
+        return ""
+    lines = [_INLINE_SPACES_RE.sub(" ", line).strip() for line in text.replace("\r\n", "\n").split("\n")]
+    return _BLANK_LINES_RE.sub("\n\n", "\n".join(lines)).strip()
+
+
+@dataclass(frozen=True)
+class JobOffer:
+    """
+    Offre canonique : champs normalisés, hash de contenu et artefacts dérivés
+    (phrases d'exigences, fragment de prompt, embeddings des exigences).
+    Construite une fois à l'enregistrement dans le catalogue ; les tours
+    d'entretien et le matching ne font ensuite que des lectures.
+    """
+
+    offer_id: Optional[str]
+    data: Dict[str, Any]
+    content_hash: str
+    entreprise: str
+    poste: str
+    description: str
+    requirement_sentences: Tuple[str, ...]
+    prompt_fragment: str
+    requirement_embeddings: Optional[np.ndarray] = field(default=None, repr=False, compare=False)
+
+    @classmethod
+    def build(cls, job_offer: Dict[str, Any], offer_id: Optional[str] = None) -> "JobOffer":
+        from src.deep_learning_analyzer import split_sentences
+
+        if not isinstance(job_offer, dict) or not job_offer:
+            raise ValueError("Données de l'offre d'emploi non fournies.")
+        entreprise = str(job_offer.get("entreprise") or DEFAULT_ENTREPRISE).strip()
+        poste = str(job_offer.get("poste") or DEFAULT_POSTE).strip()
+        description = normalize_description(job_offer.get("description"))
+        data = {**job_offer, "entreprise": entreprise, "poste": poste, "description": description}
+        return cls(
+            offer_id=offer_id,
+            data=data,
+            content_hash=stable_hash(data),
+            entreprise=entreprise,
+            poste=poste,
+            description=description,
+            requirement_sentences=tuple(split_sentences(description)),
+            prompt_fragment=f"Entreprise : {entreprise}\nPoste : {poste}\nDescription : {description}",
+        )
+
+    def with_embeddings(self, embeddings: np.ndarray) -> "JobOffer":
+        return replace(self, requirement_embeddings=embeddings)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "offer_id": self.offer_id,
+            "content_hash": self.content_hash,
+            "entreprise": self.entreprise,
+            "poste": self.poste,
+            "requirements": len(self.requirement_sentences),
+            "embedded": self.requirement_embeddings is not None,
+        }
+
+
+def prime_requirement_embeddings(offer: JobOffer):
+    """Les phrases d'exigences sont celles que recalculerait la couverture : elle les trouve en cache."""
+    if offer.requirement_embeddings is None:
+        return
+    from src.deep_learning_analyzer import sentence_embedding_cache
+    sentence_embedding_cache.prime(offer.requirement_sentences, offer.requirement_embeddings)
+
+
+def encode_requirements(offer: JobOffer) -> JobOffer:
+    from src.model_residency import get_residency_manager
+    from src.deep_learning_analyzer import sentence_embedding_cache
+
+    if not offer.requirement_sentences:
+        return offer
+    model = get_residency_manager().get("similarity")
+    if model is None:
+        logger.warning(f"Modèle de similarité indisponible, offre {offer.offer_id} enregistrée sans embeddings")
+        return offer
+    return offer.with_embeddings(sentence_embedding_cache.encode(model, list(offer.requirement_sentences)))
+
+
+class JobOfferCatalog:
+    """
+    Catalogue des offres enregistrées, référencées par identifiant. LRU borné
+    en mémoire, adossé à un répertoire (un JSON et un .npy par offre) : une
+    offre évincée ou enregistrée par une instance précédente est relue du disque.
+    """
+
+    def __init__(self, max_entries: int = JOB_OFFER_CATALOG_SIZE, storage_dir: Optional[str] = JOB_OFFER_STORAGE_DIR):
+        self.max_entries = max_entries
+        self.storage_dir = storage_dir
+        self._entries: "OrderedDict[str, JobOffer]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.disk_loads = 0
+        self.misses = 0
+        if storage_dir:
+            os.makedirs(storage_dir, exist_ok=True)
+
+    def __len__(self):
+        return len(self._entries)
+
+    def _paths(self, offer_id: str) -> Tuple[str, str]:
+        stem = os.path.join(self.storage_dir, stable_hash(offer_id)[:32])
+        return stem + ".json", stem + ".npy"
+
+    def _remember(self, offer: JobOffer):
+        with self._lock:
+            self._entries[offer.offer_id] = offer
+            self._entries.move_to_end(offer.offer_id)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def _save(self, offer: JobOffer):
+        json_path, npy_path = self._paths(offer.offer_id)
+        if offer.requirement_embeddings is not None:
+            with open(npy_path + ".tmp", "wb") as f:
+                np.save(f, offer.requirement_embeddings)
+            os.replace(npy_path + ".tmp", npy_path)
+        elif os.path.exists(npy_path):
+            os.unlink(npy_path)
+        with open(json_path + ".tmp", "w", encoding="utf-8") as f:
+            json.dump({"offer_id": offer.offer_id, "content_hash": offer.content_hash, "job_offer": offer.data},
+                      f, ensure_ascii=False)
+        os.replace(json_path + ".tmp", json_path)
+
+    def _load(self, offer_id: str) -> Optional[JobOffer]:
+        json_path, npy_path = self._paths(offer_id)
+        if not os.path.exists(json_path):
+            return None
+        with open(json_path, "r", encoding="utf-8") as f:
+            stored = json.load(f)
+        offer = JobOffer.build(stored["job_offer"], offer_id=stored["offer_id"])
+        if offer.content_hash != stored["content_hash"]:
+            # Normalisation modifiée depuis l'enregistrement : les embeddings ne correspondent plus
+            logger.warning(f"Offre {offer_id} : contenu normalisé différent, embeddings recalculés")
+            offer = encode_requirements(offer)
+            self._save(offer)
+            return offer
+        if os.path.exists(npy_path):
+            offer = offer.with_embeddings(np.load(npy_path))
+        return offer
+
+    def register(self, offer_id: str, job_offer: Dict[str, Any]) -> JobOffer:
+        """Normalise, encode les exigences et persiste l'offre ; ré-enregistrer un id le remplace."""
+        offer = JobOffer.build(job_offer, offer_id=offer_id)
+        with self._lock:
+            current = self._entries.get(offer_id)
+        if current is not None and current.content_hash == offer.content_hash and current.requirement_embeddings is not None:
+            return current
+        offer = encode_requirements(offer)
+        if self.storage_dir:
+            self._save(offer)
+        self._remember(offer)
+        logger.info(f"Offre {offer_id} enregistrée : {len(offer.requirement_sentences)} exigences")
+        return offer
+
+    def get(self, offer_id: str) -> JobOffer:
+        """Offre enregistrée ; KeyError si l'identifiant est inconnu."""
+        with self._lock:
+            offer = self._entries.get(offer_id)
+            if offer is not None:
+                self._entries.move_to_end(offer_id)
+                self.hits += 1
+        if offer is None and self.storage_dir:
+            offer = self._load(offer_id)
+            if offer is not None:
+                self.disk_loads += 1
+                self._remember(offer)
+        if offer is None:
+            self.misses += 1
+            raise KeyError(offer_id)
+        prime_requirement_embeddings(offer)
+        return offer
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "storage_dir": self.storage_dir,
+            "hits": self.hits,
+            "disk_loads": self.disk_loads,
+            "misses": self.misses,
+        }
+
+
+_catalog: Optional[JobOfferCatalog] = None
+_catalog_lock = threading.Lock()
+
+
+def get_job_offer_catalog() -> JobOfferCatalog:
+    global _catalog
+    if _catalog is None:
+        with _catalog_lock:
+            if _catalog is None:
+                _catalog = JobOfferCatalog()
+    return _catalog
+
+
+def canonical_offer(job_offer: Any) -> JobOffer:
+    """Offre canonique depuis un JobOffer du catalogue ou un dict envoyé par le client (non enregistré)."""
+    if isinstance(job_offer, JobOffer):
+        return job_offer
+    return JobOffer.build(job_offer)
@@ -0,0 +1,273 @@
+import os
+import time
+import random
+import logging
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from typing import Any, Callable, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+LLM_DEADLINE_SECONDS = float(os.getenv("LLM_DEADLINE_SECONDS", "90"))
+LLM_ATTEMPT_TIMEOUT = float(os.getenv("LLM_ATTEMPT_TIMEOUT", "45"))
+LLM_MAX_RETRIES = int(os.getenv("LLM_MAX_RETRIES", "2"))
+LLM_HEDGING_ENABLED = os.getenv("LLM_HEDGING_ENABLED", "true").lower() == "true"
+LLM_HEDGE_MIN_DELAY = float(os.getenv("LLM_HEDGE_MIN_DELAY", "2.0"))
+LLM_HEDGE_PERCENTILE = float(os.getenv("LLM_HEDGE_PERCENTILE", "95"))
+BREAKER_FAILURE_THRESHOLD = int(os.getenv("LLM_BREAKER_FAILURES", "5"))
+BREAKER_RESET_SECONDS = float(os.getenv("LLM_BREAKER_RESET_SECONDS", "30"))
+
+# Nombre minimal de latences observées avant d'activer le hedging
+MIN_SAMPLES_FOR_HEDGING = 20
+
+TRANSIENT_STATUS_CODES = {408, 409, 429, 500, 502, 503, 504}
+TRANSIENT_ERROR_NAMES = {
+    "APITimeoutError", "APIConnectionError", "RateLimitError",
+    "InternalServerError", "ServiceUnavailableError", "Timeout", "ReadTimeout", "ConnectTimeout",
+}
+
+_executor = ThreadPoolExecutor(
+    max_workers=int(os.getenv("LLM_EXECUTOR_WORKERS", "16")),
+    thread_name_prefix="llm-call"
+)
+
+
+class LLMDeadlineExceeded(TimeoutError):
+    """L'appel n'a pas abouti avant sa deadline, retries compris."""
+
+
+class CircuitOpenError(RuntimeError):
+    """Le circuit du modèle principal est ouvert et aucun fallback n'est configuré."""
+
+
+def is_transient(error: BaseException) -> bool:
+    if isinstance(error, (TimeoutError, ConnectionError)):
+        return True
+    if type(error).__name__ in TRANSIENT_ERROR_NAMES:
+        return True
+    return getattr(error, "status_code", None) in TRANSIENT_STATUS_CODES
+
+
+class LatencyTracker:
+    """Fenêtre glissante des latences réussies d'un modèle."""
+
+    def __init__(self, window: int = 200):
+        self._samples = deque(maxlen=window)
+        self._lock = threading.Lock()
+
+    def record(self, seconds: float):
+        with self._lock:
+            self._samples.append(seconds)
+
+    def percentile(self, p: float) -> Optional[float]:
+        with self._lock:
+            samples = sorted(self._samples)
+        if len(samples) < MIN_SAMPLES_FOR_HEDGING:
+            return None
+        index = min(len(samples) - 1, int(round(p / 100 * (len(samples) - 1))))
+        return samples[index]
+
+
+class CircuitBreaker:
+    """Ouvert après N échecs transitoires consécutifs, ré-essai unique (half-open) après le délai."""
+
+    def __init__(self, failure_threshold: int = BREAKER_FAILURE_THRESHOLD, reset_seconds: float = BREAKER_RESET_SECONDS):
+        self.failure_threshold = failure_threshold
+        self.reset_seconds = reset_seconds
+        self.failures = 0
+        self.opened_at: Optional[float] = None
+        self._half_open_probe = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self) -> str:
+        if self.opened_at is None:
+            return "closed"
+        if time.monotonic() - self.opened_at >= self.reset_seconds:
+            return "half_open"
+        return "open"
+
+    def allow(self) -> bool:
+        with self._lock:
+            state = self.state
+            if state == "closed":
+                return True
+            if state == "half_open" and not self._half_open_probe:
+                self._half_open_probe = True
+                return True
+            return False
+
+    def record_success(self):
+        with self._lock:
+            self.failures = 0
+            self.opened_at = None
+            self._half_open_probe = False
+
+    def release_probe(self):
+        """Libère la sonde half-open sans conclure (erreur non transitoire) : un prochain appel sondera à nouveau."""
+        with self._lock:
+            self._half_open_probe = False
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            if self._half_open_probe or self.failures >= self.failure_threshold:
+                if self.opened_at is None or self._half_open_probe:
+                    logger.warning(f"Circuit LLM ouvert après {self.failures} échecs")
+                self.opened_at = time.monotonic()
+                self._half_open_probe = False
+
+
+_trackers: Dict[str, LatencyTracker] = {}
+_breakers: Dict[str, CircuitBreaker] = {}
+_registry_lock = threading.Lock()
+
+
+def _shared_state(name: str):
+    """Latences et disjoncteurs partagés par nom de modèle, entre toutes les requêtes."""
+    with _registry_lock:
+        if name not in _trackers:
+            _trackers[name] = LatencyTracker()
+            _breakers[name] = CircuitBreaker()
+        return _trackers[name], _breakers[name]
+
+
+def llm_status() -> Dict[str, Any]:
+    with _registry_lock:
+        names = list(_trackers)
+    return {
+        name: {
+            "breaker": _breakers[name].state,
+            "consecutive_failures": _breakers[name].failures,
+            "p50": _trackers[name].percentile(50),
+            "p95": _trackers[name].percentile(95),
+        }
+        for name in names
+    }
+
+
+class ResilientLLM:
+    """
+    Enveloppe d'appel LLM : deadline par appel, retries avec backoff exponentiel
+    sur les erreurs transitoires, requête dupliquée (hedging) après un délai
+    basé sur le p95 observé, et disjoncteur basculant vers un modèle moins cher.
+
+    `primary` et `fallback` sont des objets exposant `invoke` (modèles LangChain,
+    éventuellement avec `bind_tools`) ; `call` accepte n'importe quelle fonction
+    prenant la cible en argument (ex. `crew.kickoff`).
+    """
+
+    def __init__(self, primary, fallback=None, name: str = "llm", fallback_name: Optional[str] = None,
+                 deadline: float = LLM_DEADLINE_SECONDS, attempt_timeout: float = LLM_ATTEMPT_TIMEOUT,
+                 max_retries: int = LLM_MAX_RETRIES, hedge: bool = LLM_HEDGING_ENABLED,
+                 backoff_base: float = 0.5, backoff_max: float = 8.0):
+        self.primary = primary
+        self.fallback = fallback
+        self.name = name
+        self.fallback_name = fallback_name or f"{name}:fallback"
+        self.deadline = deadline
+        self.attempt_timeout = attempt_timeout
+        self.max_retries = max_retries
+        self.hedge = hedge
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+
+    def invoke(self, messages, on_primary: Optional[Callable[[bool, float], None]] = None, **kwargs):
+        return self.call(lambda target: target.invoke(messages, **kwargs), on_primary=on_primary)
+
+    def call(self, fn: Callable[[Any], Any], on_primary: Optional[Callable[[bool, float], None]] = None):
+        """
+        `on_primary(ok, secondes)` reçoit l'issue du modèle principal seul, même quand
+        le fallback sert ensuite l'appel (circuit ouvert = échec sans tentative).
+        """
+        deadline_at = time.monotonic() + self.deadline
+        tracker, breaker = _shared_state(self.name)
+        report = on_primary or (lambda ok, seconds: None)
+
+        if breaker.allow():
+            started = time.monotonic()
+            concluded = False
+            try:
+                result = self._call_with_retries(fn, self.primary, tracker, deadline_at)
+                breaker.record_success()
+                concluded = True
+                report(True, time.monotonic() - started)
+                return result
+            except Exception as e:
+                report(False, time.monotonic() - started)
+                if not is_transient(e):
+                    raise
+                breaker.record_failure()
+                concluded = True
+                if self.fallback is None:
+                    raise
+                logger.warning(f"Échec transitoire de {self.name} ({e}), bascule vers {self.fallback_name}")
+            finally:
+                if not concluded:
+                    # Erreur non transitoire : ni succès ni échec pour le circuit, mais la sonde
+                    # half-open éventuelle doit être libérée, sinon le circuit ne se referme jamais
+                    breaker.release_probe()
+        else:
+            report(False, 0.0)
+            if self.fallback is None:
+                raise CircuitOpenError(f"Circuit ouvert pour {self.name}")
+            logger.info(f"Circuit ouvert pour {self.name}, utilisation de {self.fallback_name}")
+
+        fallback_tracker, _ = _shared_state(self.fallback_name)
+        # Le fallback dispose au minimum d'une tentative complète
+        fallback_deadline = max(deadline_at, time.monotonic() + self.attempt_timeout)
+        return self._call_with_retries(fn, self.fallback, fallback_tracker, fallback_deadline)
+
+    def _call_with_retries(self, fn, target, tracker: LatencyTracker, deadline_at: float):
+        attempt = 0
+        while True:
+            remaining = deadline_at - time.monotonic()
+            if remaining <= 0:
+                raise LLMDeadlineExceeded(f"Deadline dépassée pour {self.name}")
+            try:
+                started = time.monotonic()
+                result = self._attempt(fn, target, tracker, min(self.attempt_timeout, remaining))
+                tracker.record(time.monotonic() - started)
+                return result
+            except Exception as e:
+                if not is_transient(e) or attempt >= self.max_retries:
+                    raise
+                delay = min(self.backoff_max, self.backoff_base * (2 ** attempt)) * random.uniform(0.5, 1.0)
+                delay = min(delay, max(0.0, deadline_at - time.monotonic()))
+                logger.warning(f"Erreur transitoire {type(e).__name__} sur {self.name}, retry dans {delay:.1f}s")
+                time.sleep(delay)
+                attempt += 1
+
+    def _attempt(self, fn, target, tracker: LatencyTracker, timeout: float):
+        """
+        Une tentative, éventuellement doublée : si aucune réponse n'arrive avant le
+        p95 observé, une seconde requête identique est lancée et la première réponse
+        réussie est retenue. Les appels abandonnés se terminent d'eux-mêmes grâce au
+        timeout configuré sur le client HTTP.
+        """
+        started = time.monotonic()
+        futures = [_executor.submit(fn, target)]
+
+        hedge_delay = tracker.percentile(LLM_HEDGE_PERCENTILE) if self.hedge else None
+        if hedge_delay is not None:
+            hedge_delay = max(hedge_delay, LLM_HEDGE_MIN_DELAY)
+            done, _ = wait(futures, timeout=min(hedge_delay, timeout))
+            if not done and time.monotonic() - started < timeout:
+                logger.info(f"Requête doublée pour {self.name} après {hedge_delay:.1f}s")
+                futures.append(_executor.submit(fn, target))
+
+        last_error = None
+        pending = set(futures)
+        while pending:
+            remaining = timeout - (time.monotonic() - started)
+            if remaining <= 0:
+                break
+            done, pending = wait(pending, timeout=remaining, return_when=FIRST_COMPLETED)
+            for future in done:
+                if future.exception() is None:
+                    return future.result()
+                last_error = future.exception()
+        if last_error is not None and not pending:
+            raise last_error
+        raise LLMDeadlineExceeded(f"Tentative expirée après {timeout:.1f}s pour {self.name}")
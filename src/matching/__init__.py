@@ -0,0 +1,4 @@
+from .embedding_store import EmbeddingMatrixStore
+from .matcher import CandidateJobMatcher, get_matcher
+
+__all__ = ["EmbeddingMatrixStore", "CandidateJobMatcher", "get_matcher"]
@@ -0,0 +1,167 @@
+import os
+import json
+import logging
+import threading
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# Nombre de lignes converties en float32 à la fois pendant une recherche :
+# borne la mémoire temporaire quand la matrice est stockée en float16.
+SEARCH_CHUNK_ROWS = 32768
+
+MATRIX_FILE = "embeddings.npy"
+IDS_FILE = "ids.json"
+
+
+class EmbeddingMatrixStore:
+    """
+    Matrice d'embeddings normalisés (une ligne par identifiant).
+
+    Les vecteurs sont normalisés à l'insertion : la similarité cosinus se réduit
+    donc à un produit scalaire, calculé de façon vectorisée sur toute la matrice.
+    Le stockage peut être en float32 ou float16 (moitié de la mémoire) et peut
+    être rechargé depuis le disque en memory-map.
+    """
+
+    def __init__(self, dim: int, dtype: str = "float32", initial_capacity: int = 1024):
+        self.dim = int(dim)
+        self.dtype = np.dtype(dtype)
+        if self.dtype not in (np.dtype("float32"), np.dtype("float16")):
+            raise ValueError(f"dtype non supporté : {dtype}")
+        self._matrix = np.zeros((max(1, initial_capacity), self.dim), dtype=self.dtype)
+        self._ids: List[str] = []
+        self._index: Dict[str, int] = {}
+        self._lock = threading.RLock()
+
+    def __len__(self) -> int:
+        return len(self._ids)
+
+    def __contains__(self, item_id: str) -> bool:
+        return item_id in self._index
+
+    @property
+    def ids(self) -> List[str]:
+        return list(self._ids)
+
+    @property
+    def nbytes(self) -> int:
+        return len(self._ids) * self.dim * self.dtype.itemsize
+
+    @staticmethod
+    def _normalize(vectors: np.ndarray) -> np.ndarray:
+        vectors = np.asarray(vectors, dtype=np.float32)
+        if vectors.ndim == 1:
+            vectors = vectors[None, :]
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+        return vectors / norms
+
+    def _ensure_writable(self, needed_rows: int):
+        """Agrandit la matrice (doublement) et la rematérialise si elle est en memory-map."""
+        capacity = self._matrix.shape[0]
+        is_mapped = isinstance(self._matrix, np.memmap) or not self._matrix.flags.writeable
+        if needed_rows <= capacity and not is_mapped:
+            return
+        new_capacity = max(needed_rows, capacity * 2 if needed_rows > capacity else capacity)
+        grown = np.zeros((new_capacity, self.dim), dtype=self.dtype)
+        grown[:len(self._ids)] = self._matrix[:len(self._ids)]
+        self._matrix = grown
+
+    def add(self, item_id: str, vector: np.ndarray):
+        self.add_batch([item_id], np.asarray(vector)[None, :] if np.ndim(vector) == 1 else vector)
+
+    def add_batch(self, item_ids: Sequence[str], vectors: np.ndarray):
+        """Insère ou remplace des vecteurs (insertion incrémentale, sans reconstruire l'index)."""
+        vectors = self._normalize(vectors)
+        if vectors.shape != (len(item_ids), self.dim):
+            raise ValueError(f"Dimensions incohérentes : {vectors.shape} pour {len(item_ids)} ids (dim={self.dim})")
+
+        with self._lock:
+            new_ids = [item_id for item_id in dict.fromkeys(item_ids) if item_id not in self._index]
+            self._ensure_writable(len(self._ids) + len(new_ids))
+            for item_id in new_ids:
+                self._index[item_id] = len(self._ids)
+                self._ids.append(item_id)
+            rows = [self._index[item_id] for item_id in item_ids]
+            self._matrix[rows] = vectors.astype(self.dtype)
+
+    def get(self, item_id: str) -> np.ndarray:
+        with self._lock:
+            row = self._index[item_id]
+            return np.asarray(self._matrix[row], dtype=np.float32)
+
+    def search(self, queries: np.ndarray, k: int = 10,
+               exclude: Optional[Iterable[str]] = None) -> List[List[Tuple[str, float]]]:
+        """
+        Retourne, pour chaque requête, les k identifiants les plus proches (cosinus).
+        Accepte un vecteur unique ou une matrice de requêtes.
+        """
+        queries = self._normalize(queries)
+        # Instantané cohérent (lignes, identifiants, lignes exclues) pris sous le verrou : une
+        # insertion concurrente peut agrandir la matrice ou ajouter des ids, jamais renuméroter
+        # les lignes déjà présentes, donc le calcul se fait ensuite hors verrou.
+        with self._lock:
+            n = len(self._ids)
+            matrix = self._matrix[:n]
+            ids = self._ids[:n]
+            excluded_rows = [self._index[item_id] for item_id in exclude or () if item_id in self._index]
+        if n == 0 or k <= 0:
+            return [[] for _ in range(queries.shape[0])]
+
+        scores = np.empty((queries.shape[0], n), dtype=np.float32)
+        for start in range(0, n, SEARCH_CHUNK_ROWS):
+            end = min(start + SEARCH_CHUNK_ROWS, n)
+            block = np.asarray(matrix[start:end], dtype=np.float32)
+            scores[:, start:end] = queries @ block.T
+
+        if excluded_rows:
+            scores[:, excluded_rows] = -np.inf
+
+        k = min(k, n)
+        top = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+        results = []
+        for q, candidates in enumerate(top):
+            ordered = candidates[np.argsort(-scores[q, candidates])]
+            results.append([
+                (ids[row], float(scores[q, row]))
+                for row in ordered if np.isfinite(scores[q, row])
+            ])
+        return results
+
+    def save(self, directory: str):
+        """Écrit la matrice (.npy) et les identifiants de façon atomique."""
+        os.makedirs(directory, exist_ok=True)
+        with self._lock:
+            matrix = np.ascontiguousarray(self._matrix[:len(self._ids)])
+            ids = list(self._ids)
+
+        tmp_matrix = os.path.join(directory, MATRIX_FILE + ".tmp")
+        with open(tmp_matrix, "wb") as f:
+            np.save(f, matrix)
+        tmp_ids = os.path.join(directory, IDS_FILE + ".tmp")
+        with open(tmp_ids, "w", encoding="utf-8") as f:
+            json.dump({"dim": self.dim, "dtype": self.dtype.name, "ids": ids}, f)
+
+        os.replace(tmp_matrix, os.path.join(directory, MATRIX_FILE))
+        os.replace(tmp_ids, os.path.join(directory, IDS_FILE))
+        logger.info(f"Store d'embeddings sauvegardé : {len(ids)} vecteurs dans {directory}")
+
+    @classmethod
+    def load(cls, directory: str, mmap: bool = True) -> "EmbeddingMatrixStore":
+        """
+        Recharge un store sauvegardé. Avec mmap=True la matrice reste sur disque
+        (lecture paresseuse par l'OS) jusqu'à la première insertion.
+        """
+        with open(os.path.join(directory, IDS_FILE), "r", encoding="utf-8") as f:
+            meta = json.load(f)
+        matrix = np.load(os.path.join(directory, MATRIX_FILE), mmap_mode="r" if mmap else None)
+
+        store = cls(dim=meta["dim"], dtype=meta["dtype"], initial_capacity=1)
+        store._matrix = matrix
+        store._ids = list(meta["ids"])
+        store._index = {item_id: row for row, item_id in enumerate(store._ids)}
+        logger.info(f"Store d'embeddings chargé : {len(store)} vecteurs depuis {directory} (mmap={mmap})")
+        return store
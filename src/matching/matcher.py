@@ -0,0 +1,187 @@
+import os
+import re
+import logging
+import threading
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from src.cv_document import canonical_cv
+
+from .embedding_store import EmbeddingMatrixStore
+
+logger = logging.getLogger(__name__)
+
+# Poids relatifs des sections du CV dans le vecteur candidat
+SECTION_WEIGHTS = {
+    "skills": 0.4,
+    "experiences": 0.35,
+    "projects": 0.25,
+}
+
+CANDIDATES_SUBDIR = "candidates"
+OFFERS_SUBDIR = "offers"
+
+
+def extract_cv_sections(cv_document: Dict[str, Any]) -> Dict[str, List[str]]:
+    """Textes à encoder (compétences, expériences, projets), pré-calculés par le document canonique."""
+    return canonical_cv(cv_document).sections
+
+
+def extract_offer_texts(job_offer: Dict[str, Any]) -> List[str]:
+    """Découpe l'offre en paragraphes pour éviter la troncature du modèle (256 tokens)."""
+    texts = [job_offer.get("poste", "")]
+    description = job_offer.get("description", "") or ""
+    texts.extend(p.strip() for p in re.split(r"\n\s*\n|\n(?=[-•*])", description) if p.strip())
+    return [t for t in texts if t]
+
+
+def load_similarity_model():
+    from src.model_residency import get_residency_manager
+    model = get_residency_manager().get("similarity")
+    if model is None:
+        raise RuntimeError("Modèle de similarité indisponible")
+    return model
+
+
+class CandidateJobMatcher:
+    """
+    Classement candidats <-> offres par similarité cosinus vectorisée.
+
+    Chaque CV est résumé par un vecteur (moyenne pondérée de ses sections),
+    chaque offre par la moyenne de ses paragraphes. Les deux index sont des
+    `EmbeddingMatrixStore` compacts, éventuellement persistés sur disque.
+    """
+
+    def __init__(self, encoder=None, dtype: str = "float16", storage_dir: Optional[str] = None):
+        self._encoder = encoder
+        self.dtype = dtype
+        self.storage_dir = storage_dir
+        self.candidates: Optional[EmbeddingMatrixStore] = None
+        self.offers: Optional[EmbeddingMatrixStore] = None
+
+        if storage_dir:
+            for attr, subdir in (("candidates", CANDIDATES_SUBDIR), ("offers", OFFERS_SUBDIR)):
+                path = os.path.join(storage_dir, subdir)
+                if os.path.exists(path):
+                    try:
+                        setattr(self, attr, EmbeddingMatrixStore.load(path, mmap=True))
+                    except Exception as e:
+                        logger.warning(f"Impossible de recharger l'index {subdir} : {e}")
+
+    @property
+    def encoder(self):
+        # Sans encodeur injecté, pas de référence conservée : le gestionnaire de résidence reste maître de l'éviction
+        return self._encoder if self._encoder is not None else load_similarity_model()
+
+    def _encode(self, texts: List[str]) -> np.ndarray:
+        return self.encoder.encode(
+            texts, batch_size=64, convert_to_numpy=True,
+            normalize_embeddings=True, show_progress_bar=False
+        ).astype(np.float32)
+
+    def _store(self, attr: str, dim: int) -> EmbeddingMatrixStore:
+        store = getattr(self, attr)
+        if store is None:
+            store = EmbeddingMatrixStore(dim=dim, dtype=self.dtype)
+            setattr(self, attr, store)
+        return store
+
+    def embed_candidates(self, cv_documents: List[Dict[str, Any]]) -> np.ndarray:
+        """Encode toutes les sections de tous les CV en un seul batch, puis agrège par CV."""
+        texts, weights, owners = [], [], []
+        for i, cv_document in enumerate(cv_documents):
+            sections = extract_cv_sections(cv_document)
+            for section, items in sections.items():
+                for item in items:
+                    texts.append(item)
+                    weights.append(SECTION_WEIGHTS[section] / len(items))
+                    owners.append(i)
+
+        if not texts:
+            raise ValueError("Aucune section exploitable dans les CV fournis")
+        embeddings = self._encode(texts) * np.asarray(weights, dtype=np.float32)[:, None]
+        pooled = np.zeros((len(cv_documents), embeddings.shape[1]), dtype=np.float32)
+        np.add.at(pooled, np.asarray(owners), embeddings)
+        return pooled
+
+    def embed_offers(self, job_offers: List[Dict[str, Any]]) -> np.ndarray:
+        texts, owners = [], []
+        for i, job_offer in enumerate(job_offers):
+            for text in extract_offer_texts(job_offer):
+                texts.append(text)
+                owners.append(i)
+
+        if not texts:
+            raise ValueError("Aucun texte exploitable dans les offres fournies")
+        embeddings = self._encode(texts)
+        owners = np.asarray(owners)
+        pooled = np.zeros((len(job_offers), embeddings.shape[1]), dtype=np.float32)
+        np.add.at(pooled, owners, embeddings)
+        pooled /= np.bincount(owners, minlength=len(job_offers))[:, None].clip(min=1)
+        return pooled
+
+    def index_candidates(self, cv_documents: Dict[str, Dict[str, Any]]) -> int:
+        ids = list(cv_documents)
+        vectors = self.embed_candidates([cv_documents[i] for i in ids])
+        self._store("candidates", vectors.shape[1]).add_batch(ids, vectors)
+        return len(ids)
+
+    def index_offers(self, job_offers: Dict[str, Dict[str, Any]]) -> int:
+        ids = list(job_offers)
+        vectors = self.embed_offers([job_offers[i] for i in ids])
+        self._store("offers", vectors.shape[1]).add_batch(ids, vectors)
+        return len(ids)
+
+    def top_candidates_for_offer(self, offer_id: str, k: int = 10) -> List[Tuple[str, float]]:
+        if self.offers is None or offer_id not in self.offers:
+            raise KeyError(offer_id)
+        if self.candidates is None:
+            return []
+        return self.candidates.search(self.offers.get(offer_id), k=k)[0]
+
+    def top_offers_for_candidate(self, candidate_id: str, k: int = 10) -> List[Tuple[str, float]]:
+        if self.candidates is None or candidate_id not in self.candidates:
+            raise KeyError(candidate_id)
+        if self.offers is None:
+            return []
+        return self.offers.search(self.candidates.get(candidate_id), k=k)[0]
+
+    def rank_candidates(self, job_offer: Dict[str, Any], k: int = 10) -> List[Tuple[str, float]]:
+        """Classe les candidats indexés pour une offre non indexée."""
+        if self.candidates is None:
+            return []
+        return self.candidates.search(self.embed_offers([job_offer]), k=k)[0]
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "candidates": len(self.candidates) if self.candidates is not None else 0,
+            "offers": len(self.offers) if self.offers is not None else 0,
+            "dtype": self.dtype,
+            "bytes": sum(s.nbytes for s in (self.candidates, self.offers) if s is not None),
+        }
+
+    def save(self):
+        if not self.storage_dir:
+            return
+        if self.candidates is not None:
+            self.candidates.save(os.path.join(self.storage_dir, CANDIDATES_SUBDIR))
+        if self.offers is not None:
+            self.offers.save(os.path.join(self.storage_dir, OFFERS_SUBDIR))
+
+
+_matcher: Optional[CandidateJobMatcher] = None
+_matcher_lock = threading.Lock()
+
+
+def get_matcher() -> CandidateJobMatcher:
+    """Instance partagée, configurée par MATCHING_STORAGE_DIR et MATCHING_DTYPE."""
+    global _matcher
+    if _matcher is None:
+        with _matcher_lock:
+            if _matcher is None:
+                _matcher = CandidateJobMatcher(
+                    dtype=os.getenv("MATCHING_DTYPE", "float16"),
+                    storage_dir=os.getenv("MATCHING_STORAGE_DIR"),
+                )
+    return _matcher
@@ -0,0 +1,188 @@
+import os
+import json
+import time
+import hashlib
+import logging
+from typing import Any, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+MODEL_BAKE_DIR = os.getenv("MODEL_BAKE_DIR", "/app/models")
+MANIFEST_FILE = "manifest.json"
+MANIFEST_VERSION = 1
+
+# Source unique des modèles chargés par MultiModelInterviewAnalyzer et par l'étape de bake
+MODEL_SPECS: Dict[str, Dict[str, Any]] = {
+    "sentiment": {
+        "name": "astrosbd/french_emotion_camembert",
+        "kind": "pipeline",
+        "task": "text-classification",
+        "pipeline_kwargs": {"return_all_scores": True},
+    },
+    "similarity": {
+        "name": "all-MiniLM-L6-v2",
+        "kind": "sentence-transformer",
+    },
+    "intent": {
+        "name": "joeddav/xlm-roberta-large-xnli",
+        "kind": "pipeline",
+        "task": "zero-shot-classification",
+    },
+}
+
+_manifest_cache: Dict[str, Optional[Dict[str, Any]]] = {}
+
+
+def load_manifest(bake_dir: str = MODEL_BAKE_DIR) -> Optional[Dict[str, Any]]:
+    if bake_dir not in _manifest_cache:
+        path = os.path.join(bake_dir, MANIFEST_FILE)
+        manifest = None
+        if os.path.exists(path):
+            try:
+                with open(path, "r", encoding="utf-8") as f:
+                    manifest = json.load(f)
+            except Exception as e:
+                logger.warning(f"Manifeste de modèles illisible ({path}) : {e}")
+        _manifest_cache[bake_dir] = manifest
+    return _manifest_cache[bake_dir]
+
+
+def baked_path(key: str, bake_dir: str = MODEL_BAKE_DIR) -> Optional[str]:
+    """Chemin du modèle pré-cuit s'il figure au manifeste, sinon None (chargement depuis le Hub)."""
+    manifest = load_manifest(bake_dir)
+    if not manifest or key not in manifest.get("models", {}):
+        return None
+    entry = manifest["models"][key]
+    if entry.get("name") != MODEL_SPECS[key]["name"]:
+        logger.warning(f"Manifeste obsolète pour {key} : {entry.get('name')} != {MODEL_SPECS[key]['name']}")
+        return None
+    path = os.path.join(bake_dir, entry["path"])
+    return path if os.path.isdir(path) else None
+
+
+def load_model(key: str, bake_dir: str = MODEL_BAKE_DIR):
+    """
+    Charge un modèle du registre. Depuis le répertoire pré-cuit, le chargement est
+    strictement local (aucun appel réseau) et les poids safetensors sont mappés en mémoire.
+    """
+    spec = MODEL_SPECS[key]
+    path = baked_path(key, bake_dir)
+    source = path or spec["name"]
+    local = path is not None
+
+    if spec["kind"] == "sentence-transformer":
+        from sentence_transformers import SentenceTransformer
+        return SentenceTransformer(source, device='cpu')
+
+    import torch
+    from transformers import pipeline, AutoTokenizer, AutoModelForSequenceClassification
+    tokenizer = AutoTokenizer.from_pretrained(source, local_files_only=local)
+    model = AutoModelForSequenceClassification.from_pretrained(
+        source,
+        local_files_only=local,
+        use_safetensors=True if local else None,
+        torch_dtype=torch.float32  # Force float32 pour CPU
+    )
+    model.eval()
+    return pipeline(
+        spec["task"],
+        model=model,
+        tokenizer=tokenizer,
+        device=-1,  # Force CPU
+        **spec.get("pipeline_kwargs", {})
+    )
+
+
+def _sha256(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _file_inventory(directory: str) -> Dict[str, Dict[str, Any]]:
+    inventory = {}
+    for root, _, files in os.walk(directory):
+        for name in sorted(files):
+            full = os.path.join(root, name)
+            inventory[os.path.relpath(full, directory)] = {"bytes": os.path.getsize(full), "sha256": _sha256(full)}
+    return inventory
+
+
+def _bake_one(key: str, target: str):
+    spec = MODEL_SPECS[key]
+    if spec["kind"] == "sentence-transformer":
+        from sentence_transformers import SentenceTransformer
+        model = SentenceTransformer(spec["name"], device='cpu')
+        model.save(target)
+        # Le module Transformer est sauvegardé à la racine : on remplace les poids pickle par safetensors
+        model[0].auto_model.save_pretrained(target, safe_serialization=True)
+        legacy = os.path.join(target, "pytorch_model.bin")
+        if os.path.exists(legacy):
+            os.remove(legacy)
+        return
+
+    from transformers import AutoTokenizer, AutoModelForSequenceClassification
+    AutoTokenizer.from_pretrained(spec["name"]).save_pretrained(target)
+    AutoModelForSequenceClassification.from_pretrained(spec["name"]).save_pretrained(target, safe_serialization=True)
+
+
+def bake_models(bake_dir: str = MODEL_BAKE_DIR) -> Dict[str, Any]:
+    """
+    Télécharge chaque modèle une seule fois, l'écrit en safetensors dans `bake_dir`,
+    mesure son temps de chargement local et écrit le manifeste (hashes, tailles, temps).
+    """
+    import transformers
+    os.makedirs(bake_dir, exist_ok=True)
+    manifest = {
+        "version": MANIFEST_VERSION,
+        "created_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+        "transformers_version": transformers.__version__,
+        "models": {},
+    }
+
+    for key, spec in MODEL_SPECS.items():
+        target = os.path.join(bake_dir, key)
+        logger.info(f"Bake de {spec['name']} -> {target}")
+        _bake_one(key, target)
+        files = _file_inventory(target)
+        manifest["models"][key] = {
+            "name": spec["name"],
+            "kind": spec["kind"],
+            "path": key,
+            "files": files,
+            "bytes": sum(f["bytes"] for f in files.values()),
+        }
+
+    # Temps de chargement mesurés depuis le répertoire cuit, hors réseau
+    with open(os.path.join(bake_dir, MANIFEST_FILE), "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2)
+    _manifest_cache.pop(bake_dir, None)
+    for key in MODEL_SPECS:
+        started = time.perf_counter()
+        load_model(key, bake_dir)
+        manifest["models"][key]["expected_load_seconds"] = round(time.perf_counter() - started, 2)
+
+    with open(os.path.join(bake_dir, MANIFEST_FILE), "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2)
+    _manifest_cache.pop(bake_dir, None)
+    return manifest
+
+
+def verify_manifest(bake_dir: str = MODEL_BAKE_DIR, check_hashes: bool = True) -> bool:
+    manifest = load_manifest(bake_dir)
+    if not manifest:
+        logger.error(f"Aucun manifeste dans {bake_dir}")
+        return False
+    ok = True
+    for key, entry in manifest.get("models", {}).items():
+        for relative, meta in entry.get("files", {}).items():
+            path = os.path.join(bake_dir, entry["path"], relative)
+            if not os.path.exists(path) or os.path.getsize(path) != meta["bytes"]:
+                logger.error(f"Fichier manquant ou tronqué : {path}")
+                ok = False
+            elif check_hashes and _sha256(path) != meta["sha256"]:
+                logger.error(f"Hash invalide : {path}")
+                ok = False
+    return ok
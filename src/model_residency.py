@@ -0,0 +1,243 @@
+import gc
+import os
+import time
+import logging
+import threading
+from collections import deque
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterable, Optional
+
+from src.model_registry import load_model
+
+logger = logging.getLogger(__name__)
+
+MODEL_MEMORY_BUDGET_MB = int(os.getenv("MODEL_MEMORY_BUDGET_MB", "0"))  # 0 = pas de limite
+MODEL_IDLE_SECONDS = float(os.getenv("MODEL_IDLE_SECONDS", "600"))
+MODEL_PINNED = [k.strip() for k in os.getenv("MODEL_PINNED", "similarity").split(",") if k.strip()]
+REAPER_INTERVAL_SECONDS = 30
+LOAD_FAILURE_COOLDOWN_SECONDS = 60
+
+
+def model_bytes(model) -> int:
+    """Taille des poids d'un pipeline transformers ou d'un module torch."""
+    module = getattr(model, "model", model)
+    try:
+        return sum(p.numel() * p.element_size() for p in module.parameters())
+    except Exception:
+        return 0
+
+
+class _Resident:
+    def __init__(self, model, size: int, load_seconds: float):
+        self.model = model
+        self.bytes = size
+        self.load_seconds = load_seconds
+        self.last_used = time.monotonic()
+        self.in_use = 0
+
+
+class ModelResidencyManager:
+    """
+    Garde les modèles de l'analyseur en mémoire tant qu'ils servent.
+
+    Les modèles non épinglés inactifs depuis `idle_seconds` sont évincés, et les
+    moins récemment utilisés le sont aussi dès que le budget mémoire est dépassé.
+    Un modèle en cours d'utilisation n'est jamais évincé. Le rechargement passe
+    par le registre (poids safetensors pré-cuits, mappés en mémoire).
+    """
+
+    def __init__(self, loader: Callable[[str], Any] = load_model, memory_budget_bytes: int = 0,
+                 idle_seconds: float = MODEL_IDLE_SECONDS, pinned: Iterable[str] = ()):
+        self.loader = loader
+        self.memory_budget_bytes = memory_budget_bytes
+        self.idle_seconds = idle_seconds
+        self.pinned = set(pinned)
+        self._residents: Dict[str, _Resident] = {}
+        self._failures: Dict[str, float] = {}
+        self._lock = threading.RLock()
+        self._key_locks: Dict[str, threading.Lock] = {}
+        self.events = deque(maxlen=200)
+        self.loads = 0
+        self.evictions = 0
+        self._reaper: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+
+    def _record(self, event: str, key: str, **details):
+        self.events.append({"time": time.time(), "event": event, "model": key, **details})
+
+    def _key_lock(self, key: str) -> threading.Lock:
+        with self._lock:
+            return self._key_locks.setdefault(key, threading.Lock())
+
+    def is_resident(self, key: str) -> bool:
+        return key in self._residents
+
+    def get(self, key: str):
+        """Retourne le modèle (chargé si besoin), ou None si son chargement échoue."""
+        with self._lock:
+            resident = self._residents.get(key)
+            if resident is not None:
+                resident.last_used = time.monotonic()
+                return resident.model
+
+        with self._key_lock(key):
+            with self._lock:
+                resident = self._residents.get(key)
+                if resident is not None:
+                    return resident.model
+                failed_at = self._failures.get(key)
+                if failed_at and time.monotonic() - failed_at < LOAD_FAILURE_COOLDOWN_SECONDS:
+                    return None
+
+            started = time.perf_counter()
+            try:
+                model = self.loader(key)
+            except Exception as e:
+                logger.warning(f"Échec du chargement du modèle {key} : {e}")
+                with self._lock:
+                    self._failures[key] = time.monotonic()
+                self._record("load_failed", key, error=str(e))
+                return None
+
+            elapsed = time.perf_counter() - started
+            resident = _Resident(model, model_bytes(model), elapsed)
+            with self._lock:
+                self._residents[key] = resident
+                self._failures.pop(key, None)
+                self.loads += 1
+            self._record("load", key, bytes=resident.bytes, seconds=round(elapsed, 3))
+            logger.info(f"Modèle {key} chargé en {elapsed:.1f}s ({resident.bytes / 1e6:.0f} Mo)")
+
+        self.enforce_budget(protect=key)
+        return model
+
+    @contextmanager
+    def hold(self, *keys: str):
+        """Marque les modèles comme utilisés : ils ne peuvent pas être évincés pendant le bloc."""
+        held = []
+        try:
+            for key in keys:
+                if self.get(key) is not None:
+                    with self._lock:
+                        resident = self._residents.get(key)
+                        if resident is not None:
+                            resident.in_use += 1
+                            held.append(resident)
+            yield
+        finally:
+            with self._lock:
+                now = time.monotonic()
+                for resident in held:
+                    resident.in_use -= 1
+                    resident.last_used = now
+
+    def _evict(self, key: str, reason: str):
+        resident = self._residents.pop(key)
+        self.evictions += 1
+        self._record("evict", key, bytes=resident.bytes, reason=reason)
+        logger.info(f"Modèle {key} évincé ({reason}, {resident.bytes / 1e6:.0f} Mo)")
+
+    def _evictable(self, protect: Optional[str] = None):
+        return sorted(
+            (
+                (key, resident) for key, resident in self._residents.items()
+                if key not in self.pinned and key != protect and resident.in_use == 0
+            ),
+            key=lambda item: item[1].last_used
+        )
+
+    def evict_idle(self) -> int:
+        evicted = 0
+        with self._lock:
+            now = time.monotonic()
+            for key, resident in self._evictable():
+                if now - resident.last_used >= self.idle_seconds:
+                    self._evict(key, "idle")
+                    evicted += 1
+        if evicted:
+            gc.collect()
+        return evicted
+
+    def enforce_budget(self, protect: Optional[str] = None) -> int:
+        if not self.memory_budget_bytes:
+            return 0
+        evicted = 0
+        with self._lock:
+            for key, _ in self._evictable(protect):
+                if self.resident_bytes <= self.memory_budget_bytes:
+                    break
+                self._evict(key, "budget")
+                evicted += 1
+        if evicted:
+            gc.collect()
+        return evicted
+
+    def pin(self, key: str):
+        with self._lock:
+            self.pinned.add(key)
+
+    def unpin(self, key: str):
+        with self._lock:
+            self.pinned.discard(key)
+
+    @property
+    def resident_bytes(self) -> int:
+        return sum(r.bytes for r in self._residents.values())
+
+    def start_reaper(self, interval: float = REAPER_INTERVAL_SECONDS):
+        if self._reaper is not None:
+            return
+        self._stop.clear()
+
+        def loop():
+            while not self._stop.wait(interval):
+                try:
+                    self.evict_idle()
+                except Exception as e:
+                    logger.warning(f"Erreur lors de l'éviction des modèles inactifs : {e}")
+
+        self._reaper = threading.Thread(target=loop, name="model-reaper", daemon=True)
+        self._reaper.start()
+
+    def stop_reaper(self):
+        self._stop.set()
+        self._reaper = None
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            now = time.monotonic()
+            return {
+                "resident_bytes": self.resident_bytes,
+                "memory_budget_bytes": self.memory_budget_bytes,
+                "idle_seconds": self.idle_seconds,
+                "pinned": sorted(self.pinned),
+                "loads": self.loads,
+                "evictions": self.evictions,
+                "models": {
+                    key: {
+                        "bytes": r.bytes,
+                        "in_use": r.in_use,
+                        "idle_seconds": round(now - r.last_used, 1),
+                        "load_seconds": round(r.load_seconds, 3),
+                    }
+                    for key, r in self._residents.items()
+                },
+                "recent_events": list(self.events)[-20:],
+            }
+
+
+_manager: Optional[ModelResidencyManager] = None
+_manager_lock = threading.Lock()
+
+
+def get_residency_manager() -> ModelResidencyManager:
+    global _manager
+    if _manager is None:
+        with _manager_lock:
+            if _manager is None:
+                _manager = ModelResidencyManager(
+                    memory_budget_bytes=MODEL_MEMORY_BUDGET_MB * 1024 * 1024,
+                    idle_seconds=MODEL_IDLE_SECONDS,
+                    pinned=MODEL_PINNED,
+                )
+    return _manager
@@ -0,0 +1,276 @@
+import os
+import json
+import time
+import logging
+import threading
+from collections import deque, Counter
+from contextlib import contextmanager
+from dataclasses import dataclass, asdict
+from functools import lru_cache
+from typing import Any, Dict, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+FAST = "fast"
+MINI = "mini"
+LARGE = "large"
+
+MODEL_TIERS = {
+    FAST: os.getenv("ROUTER_FAST_MODEL", "llama-3.1-8b-instant"),  # Groq
+    MINI: os.getenv("ROUTER_MINI_MODEL", "gpt-4o-mini"),
+    LARGE: os.getenv("ROUTER_LARGE_MODEL", "gpt-4o"),
+}
+
+INTERVIEW_TURN = "interview_turn"
+CV_EXTRACTION = "cv_extraction"
+CV_CREW = "cv_crew"
+REPORT = "report"
+
+# Par tâche : paliers par ordre de préférence avec le nombre maximal de tokens en entrée
+# (None = sans limite), et budget de latence au-delà duquel un palier est jugé trop lent.
+# Le palier rapide (Groq) est réservé aux petites entrées sans enjeu de cohérence de ton ;
+# le tour d'entretien ne l'utilise jamais, et son palier est épinglé pour tout l'entretien (`pinned`)
+# afin de garder le même interlocuteur.
+DEFAULT_POLICY: Dict[str, Dict[str, Any]] = {
+    INTERVIEW_TURN: {"tiers": [[MINI, 24000], [LARGE, None]], "latency_budget": 10.0},
+    CV_EXTRACTION: {"tiers": [[FAST, 3000], [MINI, 24000], [LARGE, None]], "latency_budget": 20.0},
+    CV_CREW: {"tiers": [[MINI, 24000], [LARGE, None]], "latency_budget": 180.0},
+    REPORT: {"tiers": [[MINI, 24000], [LARGE, None]], "latency_budget": 60.0},
+}
+
+ROUTER_WINDOW = int(os.getenv("ROUTER_WINDOW", "100"))
+ROUTER_MIN_SAMPLES = int(os.getenv("ROUTER_MIN_SAMPLES", "10"))
+ROUTER_MAX_ERROR_RATE = float(os.getenv("ROUTER_MAX_ERROR_RATE", "0.25"))
+# Une décision sur N est envoyée au palier préféré écarté, pour que ses statistiques se rétablissent
+ROUTER_PROBE_EVERY = int(os.getenv("ROUTER_PROBE_EVERY", "20"))
+
+
+def load_policy() -> Dict[str, Dict[str, Any]]:
+    """Politique par défaut, surchargée tâche par tâche par ROUTER_POLICY (JSON)."""
+    policy = json.loads(json.dumps(DEFAULT_POLICY))
+    override = os.getenv("ROUTER_POLICY")
+    if override:
+        try:
+            for task, rules in json.loads(override).items():
+                policy.setdefault(task, {"tiers": [[MINI, None]], "latency_budget": 30.0}).update(rules)
+        except (ValueError, AttributeError) as e:
+            logger.warning(f"ROUTER_POLICY invalide, politique par défaut conservée : {e}")
+    return policy
+
+
+def tier_available(tier: str) -> bool:
+    if tier == FAST:
+        return bool(os.getenv("GROQ_API_KEY"))
+    return True
+
+
+@dataclass
+class RouteDecision:
+    task: str
+    tier: str
+    model: str
+    input_tokens: int
+    reason: str
+
+
+class Observation:
+    """Issue d'un appel routé ; `record` permet de ne retenir que la tentative sur le palier choisi."""
+
+    def __init__(self, decision: RouteDecision):
+        self.decision = decision
+        self.outcome: Optional[Tuple[bool, float]] = None
+
+    def record(self, ok: bool, seconds: float):
+        self.outcome = (ok, seconds)
+
+
+class OutcomeStats:
+    """Fenêtre glissante des résultats (succès, latence) d'un palier pour une tâche."""
+
+    def __init__(self, window: int = ROUTER_WINDOW):
+        self._outcomes: "deque[Tuple[bool, float]]" = deque(maxlen=window)
+        self.decisions = 0
+
+    def record(self, ok: bool, seconds: float):
+        self._outcomes.append((ok, seconds))
+
+    def summary(self) -> Dict[str, Any]:
+        outcomes = list(self._outcomes)
+        latencies = sorted(seconds for ok, seconds in outcomes if ok)
+        percentile = lambda p: latencies[min(len(latencies) - 1, int(p * len(latencies)))] if latencies else None
+        return {
+            "decisions": self.decisions,
+            "samples": len(outcomes),
+            "error_rate": (sum(not ok for ok, _ in outcomes) / len(outcomes)) if outcomes else 0.0,
+            "p50": percentile(0.5),
+            "p95": percentile(0.95),
+        }
+
+
+class ModelRouter:
+    """
+    Choisit un modèle par appel selon le type de tâche, le nombre de tokens en
+    entrée et les taux d'erreur et latences observés par palier. Chaque décision
+    est journalisée puis complétée par son issue via `observe`, ce qui alimente
+    les statistiques utilisées pour les décisions suivantes et /metrics/router.
+    """
+
+    def __init__(self, policy: Optional[Dict[str, Dict[str, Any]]] = None):
+        self.policy = policy or load_policy()
+        self._stats: Dict[Tuple[str, str], OutcomeStats] = {}
+        self._reasons: Counter = Counter()
+        self._degraded: Counter = Counter()
+        self._recent: "deque[Dict[str, Any]]" = deque(maxlen=50)
+        self._lock = threading.Lock()
+
+    def _stats_for(self, task: str, tier: str) -> OutcomeStats:
+        key = (task, tier)
+        if key not in self._stats:
+            self._stats[key] = OutcomeStats()
+        return self._stats[key]
+
+    def _unhealthy(self, task: str, tier: str) -> Optional[str]:
+        summary = self._stats_for(task, tier).summary()
+        if summary["samples"] < ROUTER_MIN_SAMPLES:
+            return None
+        if summary["error_rate"] > ROUTER_MAX_ERROR_RATE:
+            return f"erreurs {summary['error_rate']:.0%}"
+        budget = self.policy[task].get("latency_budget")
+        if budget and summary["p95"] is not None and summary["p95"] > budget:
+            return f"p95 {summary['p95']:.1f}s"
+        return None
+
+    def default_tier(self, task: str) -> str:
+        """Premier palier disponible de la politique (pré-construction des pools, clients par défaut)."""
+        tiers = [tier for tier, _ in self.policy[task]["tiers"] if tier_available(tier)]
+        return tiers[0] if tiers else MINI
+
+    def route(self, task: str, input_tokens: int, pinned: Optional[str] = None) -> RouteDecision:
+        """
+        `pinned` : palier déjà utilisé par la même conversation. Il est conservé tant que
+        l'entrée y tient, quel que soit son état de santé (les pannes sont couvertes par le
+        fallback de ResilientLLM) ; sinon le routage ne peut que monter vers un palier plus grand.
+        """
+        tiers = [(tier, limit) for tier, limit in self.policy[task]["tiers"] if tier_available(tier)] or [[MINI, None]]
+        fitting = [tier for tier, limit in tiers if limit is None or input_tokens <= limit] or [tiers[-1][0]]
+        order = [tier for tier, _ in tiers]
+        if pinned in order:
+            fitting = [tier for tier in fitting if order.index(tier) >= order.index(pinned)] or [tiers[-1][0]]
+
+        with self._lock:
+            chosen, skipped = None, []
+            if pinned is not None and fitting[0] == pinned:
+                chosen, reason = pinned, "épinglé"
+            else:
+                for tier in fitting:
+                    problem = self._unhealthy(task, tier)
+                    if problem is None:
+                        chosen = tier
+                        break
+                    skipped.append(f"{tier} ({problem})")
+                if chosen is None:
+                    chosen, reason = fitting[-1], "aucun palier sain"
+                elif skipped:
+                    self._degraded[task] += 1
+                    if self._degraded[task] % ROUTER_PROBE_EVERY == 0:
+                        chosen, reason = fitting[0], "sonde"
+                    else:
+                        reason = "dégradation"
+                else:
+                    reason = "préféré" if chosen == tiers[0][0] else "taille de l'entrée"
+
+            decision = RouteDecision(task, chosen, MODEL_TIERS[chosen], input_tokens, reason)
+            self._stats_for(task, chosen).decisions += 1
+            self._reasons[(task, chosen, reason)] += 1
+            self._recent.append({**asdict(decision), "skipped": skipped, "at": time.time()})
+
+        logger.info(
+            f"Routage {task} : {input_tokens} tokens -> {decision.model} ({reason})"
+            + (f", écartés : {', '.join(skipped)}" if skipped else "")
+        )
+        return decision
+
+    @contextmanager
+    def observe(self, decision: RouteDecision):
+        """
+        Mesure l'appel routé. Si l'appelant rapporte l'issue du palier via
+        `Observation.record` (ex. `on_primary` de ResilientLLM), seule celle-ci est
+        retenue : un appel servi par le modèle de repli compte comme un échec du
+        palier. Sinon, toute exception compte comme un échec.
+        """
+        observation = Observation(decision)
+        started = time.monotonic()
+        ok = False
+        try:
+            yield observation
+            ok = True
+        finally:
+            if observation.outcome is not None:
+                ok, seconds = observation.outcome
+            else:
+                seconds = time.monotonic() - started
+            with self._lock:
+                self._stats_for(decision.task, decision.tier).record(ok, seconds)
+            if not ok:
+                logger.warning(f"Échec de l'appel routé {decision.task} sur {decision.model} après {seconds:.1f}s")
+
+    def fingerprint(self, task: str) -> str:
+        """Politique et modèles d'une tâche, pour les clés de cache dépendant du modèle."""
+        return json.dumps([self.policy[task]["tiers"], {tier: MODEL_TIERS[tier] for tier, _ in self.policy[task]["tiers"]}])
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            tasks: Dict[str, Any] = {}
+            for (task, tier), stats in self._stats.items():
+                tasks.setdefault(task, {})[tier] = {"model": MODEL_TIERS[tier], **stats.summary()}
+            reasons = [
+                {"task": task, "tier": tier, "reason": reason, "count": count}
+                for (task, tier, reason), count in self._reasons.most_common()
+            ]
+            recent = list(self._recent)
+        return {
+            "tiers": {tier: {"model": model, "available": tier_available(tier)} for tier, model in MODEL_TIERS.items()},
+            "policy": self.policy,
+            "tasks": tasks,
+            "reasons": reasons,
+            "recent": recent,
+        }
+
+
+@lru_cache(maxsize=16)
+def chat_model(tier: str, temperature: float, max_retries: int = 0):
+    """Client LangChain d'un palier ; les retries sont en général gérés par ResilientLLM."""
+    from langchain_openai import ChatOpenAI
+    from src.config import OPENAI_BASE_URL
+    from src.llm_client import LLM_ATTEMPT_TIMEOUT
+
+    if tier == FAST:
+        from langchain_groq import ChatGroq
+        return ChatGroq(
+            model=MODEL_TIERS[FAST],
+            temperature=temperature,
+            api_key=os.getenv("GROQ_API_KEY"),
+            timeout=LLM_ATTEMPT_TIMEOUT,
+            max_retries=max_retries
+        )
+    return ChatOpenAI(
+        model=MODEL_TIERS[tier],
+        temperature=temperature,
+        api_key=os.getenv("OPENAI_API_KEY"),
+        base_url=OPENAI_BASE_URL,
+        timeout=LLM_ATTEMPT_TIMEOUT,
+        max_retries=max_retries
+    )
+
+
+_router: Optional[ModelRouter] = None
+_router_lock = threading.Lock()
+
+
+def get_model_router() -> ModelRouter:
+    global _router
+    if _router is None:
+        with _router_lock:
+            if _router is None:
+                _router = ModelRouter()
+    return _router
@@ -0,0 +1,5 @@
+from .backends import StorageBackend, SQLiteBackend, MongoBackend
+from .write_behind import WriteBehindBuffer
+from .store import ResultStore, get_result_store
+
+__all__ = ["StorageBackend", "SQLiteBackend", "MongoBackend", "WriteBehindBuffer", "ResultStore", "get_result_store"]
@@ -0,0 +1,132 @@
+import os
+import json
+import time
+import sqlite3
+import logging
+import threading
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# (collection, clé, document) : la clé est dérivée du contenu, réécrire un enregistrement est sans effet
+Record = Tuple[str, str, Dict[str, Any]]
+
+
+class StorageBackend:
+    """Interface commune : écriture idempotente par lots et lectures pour le préchauffage des caches."""
+
+    name = "base"
+
+    def insert_many(self, records: Iterable[Record]) -> int:
+        raise NotImplementedError
+
+    def get(self, collection: str, key: str) -> Optional[Dict[str, Any]]:
+        raise NotImplementedError
+
+    def recent(self, collection: str, limit: int = 100) -> List[Dict[str, Any]]:
+        raise NotImplementedError
+
+    def close(self):
+        pass
+
+
+class SQLiteBackend(StorageBackend):
+    """
+    Backend local (tests, développement, instance unique) : une table par
+    collection, documents sérialisés en JSON. `INSERT OR IGNORE` sur la clé
+    rend les écritures idempotentes.
+    """
+
+    name = "sqlite"
+
+    def __init__(self, path: str):
+        self.path = path
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._lock = threading.Lock()
+        self._tables = set()
+
+    def _table(self, collection: str) -> str:
+        if not collection.isidentifier():
+            raise ValueError(f"Nom de collection invalide : {collection}")
+        if collection not in self._tables:
+            self._conn.execute(
+                f"CREATE TABLE IF NOT EXISTS {collection} "
+                "(key TEXT PRIMARY KEY, created_at REAL NOT NULL, document TEXT NOT NULL)"
+            )
+            self._conn.execute(f"CREATE INDEX IF NOT EXISTS {collection}_created_at ON {collection} (created_at)")
+            self._tables.add(collection)
+        return collection
+
+    def insert_many(self, records: Iterable[Record]) -> int:
+        now = time.time()
+        inserted = 0
+        with self._lock, self._conn:
+            for collection, key, document in records:
+                cursor = self._conn.execute(
+                    f"INSERT OR IGNORE INTO {self._table(collection)} (key, created_at, document) VALUES (?, ?, ?)",
+                    (key, now, json.dumps(document, ensure_ascii=False, default=str)),
+                )
+                inserted += cursor.rowcount
+        return inserted
+
+    def get(self, collection: str, key: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            row = self._conn.execute(
+                f"SELECT document FROM {self._table(collection)} WHERE key = ?", (key,)
+            ).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def recent(self, collection: str, limit: int = 100) -> List[Dict[str, Any]]:
+        with self._lock:
+            rows = self._conn.execute(
+                f"SELECT document FROM {self._table(collection)} ORDER BY created_at DESC LIMIT ?", (limit,)
+            ).fetchall()
+        return [json.loads(row[0]) for row in rows]
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+class MongoBackend(StorageBackend):
+    """
+    Backend MongoDB : `_id` = clé de contenu, insertion par `bulk_write`
+    d'upserts `$setOnInsert` (un enregistrement déjà présent n'est pas modifié).
+    """
+
+    name = "mongo"
+
+    def __init__(self, uri: str, database: str):
+        from pymongo import MongoClient
+        self._client = MongoClient(uri, serverSelectionTimeoutMS=5000, appname="airh-models")
+        self._db = self._client[database]
+
+    def insert_many(self, records: Iterable[Record]) -> int:
+        from pymongo import UpdateOne
+        from datetime import datetime, timezone
+
+        now = datetime.now(timezone.utc)
+        by_collection: Dict[str, list] = {}
+        for collection, key, document in records:
+            by_collection.setdefault(collection, []).append(
+                UpdateOne({"_id": key}, {"$setOnInsert": {"created_at": now, "document": document}}, upsert=True)
+            )
+        inserted = 0
+        for collection, operations in by_collection.items():
+            result = self._db[collection].bulk_write(operations, ordered=False)
+            inserted += result.upserted_count
+        return inserted
+
+    def get(self, collection: str, key: str) -> Optional[Dict[str, Any]]:
+        entry = self._db[collection].find_one({"_id": key}, {"document": 1})
+        return entry["document"] if entry else None
+
+    def recent(self, collection: str, limit: int = 100) -> List[Dict[str, Any]]:
+        cursor = self._db[collection].find({}, {"document": 1}).sort("created_at", -1).limit(limit)
+        return [entry["document"] for entry in cursor]
+
+    def close(self):
+        self._client.close()
@@ -0,0 +1,165 @@
+import os
+import logging
+import threading
+from typing import Any, Dict, List, Optional, Sequence
+
+from src.memo import stable_hash
+
+from .backends import StorageBackend, SQLiteBackend, MongoBackend
+from .write_behind import WriteBehindBuffer
+
+logger = logging.getLogger(__name__)
+
+PERSISTENCE_BACKEND = os.getenv("PERSISTENCE_BACKEND", "auto").lower()  # auto | mongo | sqlite | none
+MONGODB_URI = os.getenv("MONGODB_URI")
+MONGODB_DATABASE = os.getenv("MONGODB_DATABASE", "airh")
+PERSISTENCE_SQLITE_PATH = os.getenv("PERSISTENCE_SQLITE_PATH", "/tmp/airh_results.sqlite3")
+PERSISTENCE_BATCH_SIZE = int(os.getenv("PERSISTENCE_BATCH_SIZE", "100"))
+PERSISTENCE_FLUSH_INTERVAL = float(os.getenv("PERSISTENCE_FLUSH_INTERVAL", "2.0"))
+PERSISTENCE_MAX_PENDING = int(os.getenv("PERSISTENCE_MAX_PENDING", "10000"))
+PERSISTENCE_WARM_LIMIT = int(os.getenv("PERSISTENCE_WARM_LIMIT", "500"))
+
+CVS = "cvs"
+TRANSCRIPTS = "transcripts"
+REPORTS = "reports"
+
+
+def report_key(cache_key: Sequence[Any]) -> str:
+    return stable_hash(list(cache_key))
+
+
+def transcript_key(conversation_history: list, job_description_text: str) -> str:
+    return stable_hash([stable_hash(conversation_history), stable_hash(job_description_text or "")])
+
+
+def is_persistable_cv(parsed_cv: Dict[str, Any]) -> bool:
+    """Un profil sans hash de contenu, en erreur ou en mode repli ne doit pas préchauffer les caches."""
+    candidat = parsed_cv.get("candidat") or {}
+    return bool(parsed_cv.get("content_hash")) and not candidat.get("error") and candidat.get("status") != "fallback_mode"
+
+
+class ResultStore:
+    """
+    Persistance des CV parsés, transcriptions et rapports. Les écritures passent
+    par un tampon d'écriture différée (jamais bloquantes) ; les clés sont des
+    hash de contenu, donc un même résultat n'est stocké qu'une fois. Les
+    lectures servent à préchauffer les caches au démarrage.
+    Sans backend (`PERSISTENCE_BACKEND=none`, ou `auto` sans MONGODB_URI),
+    toutes les opérations sont sans effet.
+    """
+
+    def __init__(self, backend: Optional[StorageBackend] = None, batch_size: int = PERSISTENCE_BATCH_SIZE,
+                 flush_interval: float = PERSISTENCE_FLUSH_INTERVAL, max_pending: int = PERSISTENCE_MAX_PENDING):
+        self.backend = backend
+        self.buffer = WriteBehindBuffer(
+            backend, batch_size=batch_size, flush_interval=flush_interval, max_pending=max_pending
+        ) if backend is not None else None
+
+    @property
+    def enabled(self) -> bool:
+        return self.buffer is not None
+
+    def save_cv(self, parsed_cv: Dict[str, Any]):
+        """Réponse de /parse-cv/ ; les réponses de repli ou d'erreur ne sont pas conservées."""
+        if self.enabled and is_persistable_cv(parsed_cv):
+            self.buffer.put(CVS, parsed_cv["content_hash"], parsed_cv)
+
+    def save_report(self, cache_key: Sequence[Any], conversation_history: list, job_description_text: str, report: str):
+        if not self.enabled:
+            return
+        transcript = transcript_key(conversation_history, job_description_text)
+        self.buffer.put(TRANSCRIPTS, transcript, {
+            "conversation_history": conversation_history,
+            "job_description": job_description_text,
+        })
+        self.buffer.put(REPORTS, report_key(cache_key), {
+            "cache_key": list(cache_key),
+            "transcript_key": transcript,
+            "report": report,
+        })
+
+    def get_cv(self, content_hash: str) -> Optional[Dict[str, Any]]:
+        return self.backend.get(CVS, content_hash) if self.enabled else None
+
+    def get_report(self, cache_key: Sequence[Any]) -> Optional[Dict[str, Any]]:
+        return self.backend.get(REPORTS, report_key(cache_key)) if self.enabled else None
+
+    def recent_cvs(self, limit: int = 100) -> List[Dict[str, Any]]:
+        return self.backend.recent(CVS, limit) if self.enabled else []
+
+    def recent_reports(self, limit: int = 100) -> List[Dict[str, Any]]:
+        return self.backend.recent(REPORTS, limit) if self.enabled else []
+
+    def warm_caches(self, limit: int = PERSISTENCE_WARM_LIMIT) -> Dict[str, int]:
+        """Recharge les CV canoniques et les rapports de la version courante du pipeline."""
+        warmed = {"cvs": 0, "reports": 0}
+        if not self.enabled:
+            return warmed
+        from src.cv_document import canonical_cv
+        from src.crew.crew_pool import report_cache, report_version
+
+        try:
+            for parsed_cv in reversed(self.recent_cvs(limit)):
+                canonical_cv(parsed_cv)
+                warmed["cvs"] += 1
+            version = report_version()
+            for entry in reversed(self.recent_reports(limit)):
+                cache_key = tuple(entry.get("cache_key") or ())
+                # Un rapport produit par un autre modèle ou d'autres prompts n'est pas réutilisé
+                if len(cache_key) == 3 and cache_key[2] == version:
+                    report_cache.put(cache_key, (entry["report"], True))
+                    warmed["reports"] += 1
+        except Exception as e:
+            logger.warning(f"Préchauffage des caches depuis {self.backend.name} incomplet : {e}")
+        logger.info(f"Caches préchauffés depuis {self.backend.name} : {warmed}")
+        return warmed
+
+    def flush(self, timeout: float = 10.0) -> bool:
+        return self.buffer.flush(timeout) if self.enabled else True
+
+    def close(self):
+        if self.enabled:
+            self.buffer.close()
+
+    def stats(self) -> Dict[str, Any]:
+        return self.buffer.stats() if self.enabled else {"backend": None}
+
+
+def build_backend(kind: str = PERSISTENCE_BACKEND) -> Optional[StorageBackend]:
+    """
+    MongoDB si MONGODB_URI est défini (auto | mongo), SQLite uniquement sur
+    demande explicite (sqlite) : la base locale n'a ni borne de taille ni
+    rétention. Dans tous les autres cas la persistance est désactivée.
+    """
+    if kind == "sqlite":
+        return SQLiteBackend(PERSISTENCE_SQLITE_PATH)
+    if kind not in ("auto", "mongo"):
+        return None
+    if not MONGODB_URI:
+        if kind == "mongo":
+            logger.warning("PERSISTENCE_BACKEND=mongo sans MONGODB_URI, persistance désactivée")
+        return None
+    try:
+        return MongoBackend(MONGODB_URI, MONGODB_DATABASE)
+    except Exception as e:
+        # pymongo est optionnel
+        logger.warning(f"Backend MongoDB indisponible, persistance désactivée : {e}")
+        return None
+
+
+_store: Optional[ResultStore] = None
+_store_lock = threading.Lock()
+
+
+def get_result_store() -> ResultStore:
+    global _store
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                backend = None
+                try:
+                    backend = build_backend()
+                except Exception as e:
+                    logger.error(f"Persistance désactivée : {e}")
+                _store = ResultStore(backend)
+    return _store
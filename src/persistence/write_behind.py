@@ -0,0 +1,155 @@
+import time
+import logging
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Optional
+
+from .backends import StorageBackend
+
+logger = logging.getLogger(__name__)
+
+
+class WriteBehindBuffer:
+    """
+    Tampon d'écriture différée : `put` ne fait qu'ajouter l'enregistrement en
+    mémoire, un thread dédié écrit par lots dès que `batch_size` enregistrements
+    sont en attente ou au plus tard toutes les `flush_interval` secondes. Un lot
+    en échec est conservé et réessayé (écritures idempotentes) ; au-delà de
+    `max_pending`, les nouveaux enregistrements sont abandonnés plutôt que de
+    bloquer la requête.
+    """
+
+    def __init__(self, backend: StorageBackend, batch_size: int = 100, flush_interval: float = 2.0,
+                 max_pending: int = 10000, max_backoff: float = 60.0):
+        self.backend = backend
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_pending = max_pending
+        self.max_backoff = max_backoff
+        self._pending: "OrderedDict[tuple, Dict[str, Any]]" = OrderedDict()
+        self._cond = threading.Condition()
+        self._stop = False
+        self._failures = 0
+        self.enqueued = 0
+        self.written = 0
+        self.flushes = 0
+        self.dropped = 0
+        self.errors = 0
+        self.last_error: Optional[str] = None
+        self._worker = threading.Thread(target=self._loop, name="write-behind", daemon=True)
+        self._worker.start()
+
+    def put(self, collection: str, key: str, document: Dict[str, Any]) -> bool:
+        """Non bloquant ; un doublon (même collection et même clé) en attente n'est gardé qu'une fois."""
+        with self._cond:
+            if (collection, key) in self._pending:
+                return True
+            if len(self._pending) >= self.max_pending:
+                self.dropped += 1
+                return False
+            self._pending[(collection, key)] = document
+            self.enqueued += 1
+            if len(self._pending) >= self.batch_size:
+                self._cond.notify()
+        return True
+
+    def _take_batch(self):
+        batch = []
+        while self._pending and len(batch) < self.batch_size:
+            (collection, key), document = self._pending.popitem(last=False)
+            batch.append((collection, key, document))
+        return batch
+
+    def _requeue(self, batch):
+        # En tête de file : l'ordre d'écriture est conservé au prochain essai
+        for collection, key, document in reversed(batch):
+            if (collection, key) not in self._pending:
+                self._pending[(collection, key)] = document
+                self._pending.move_to_end((collection, key), last=False)
+
+    def _write(self, batch) -> bool:
+        try:
+            self.backend.insert_many(batch)
+            self.written += len(batch)
+            self.flushes += 1
+            self._failures = 0
+            return True
+        except Exception as e:
+            self.errors += 1
+            self._failures += 1
+            self.last_error = str(e)
+            logger.warning(f"Écriture différée ({self.backend.name}) en échec, {len(batch)} enregistrements conservés : {e}")
+            return False
+
+    def _backoff(self) -> float:
+        # Exposant borné : au-delà, le délai est de toute façon plafonné par max_backoff
+        return min(self.max_backoff, self.flush_interval * (2 ** min(self._failures, 16)))
+
+    def _wait(self):
+        """Sous self._cond. Après un échec, le délai de backoff est toujours respecté, même file pleine."""
+        deadline = time.monotonic() + (self._backoff() if self._failures else self.flush_interval)
+        while not self._stop and (self._failures or len(self._pending) < self.batch_size):
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            self._cond.wait(remaining)
+
+    def _loop(self):
+        while True:
+            try:
+                with self._cond:
+                    if not self._stop:
+                        self._wait()
+                    stopping = self._stop
+                    batch = self._take_batch()
+                if batch and not self._write(batch):
+                    with self._cond:
+                        self._requeue(batch)
+                    if stopping:
+                        return
+                if stopping and not batch:
+                    return
+            except Exception as e:
+                # Le worker ne doit jamais mourir : sans lui plus rien n'est persisté
+                self.errors += 1
+                self.last_error = str(e)
+                logger.exception(f"Erreur inattendue du worker d'écriture différée : {e}")
+                time.sleep(self.flush_interval)
+
+    def flush(self, timeout: float = 10.0) -> bool:
+        """Écrit tout ce qui est en attente (arrêt de l'application, tests)."""
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            with self._cond:
+                batch = self._take_batch()
+            if not batch:
+                return True
+            if not self._write(batch):
+                with self._cond:
+                    self._requeue(batch)
+                return False
+        return False
+
+    def close(self, timeout: float = 10.0):
+        with self._cond:
+            self._stop = True
+            self._cond.notify()
+        self._worker.join(timeout=timeout)
+        self.flush(timeout=timeout)
+        if self._pending:
+            logger.warning(f"{len(self._pending)} enregistrements non persistés à l'arrêt")
+        self.backend.close()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._cond:
+            pending = len(self._pending)
+        return {
+            "backend": self.backend.name,
+            "pending": pending,
+            "enqueued": self.enqueued,
+            "written": self.written,
+            "flushes": self.flushes,
+            "dropped": self.dropped,
+            "errors": self.errors,
+            "last_error": self.last_error,
+        }
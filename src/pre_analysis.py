@@ -0,0 +1,185 @@
+import os
+import time
+import queue
+import logging
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional
+
+from src.memo import stable_hash
+
+logger = logging.getLogger(__name__)
+
+PRE_ANALYSIS_ENABLED = os.getenv("PRE_ANALYSIS_ENABLED", "true").lower() == "true"
+PRE_ANALYSIS_QUEUE_SIZE = int(os.getenv("PRE_ANALYSIS_QUEUE_SIZE", "256"))
+PRE_ANALYSIS_MAX_SESSIONS = int(os.getenv("PRE_ANALYSIS_MAX_SESSIONS", "2048"))
+
+
+def session_id_for(cv_hash: str, offer_hash: str) -> str:
+    """Identifiant de session implicite quand le client n'en fournit pas : un entretien = un (CV, offre)."""
+    return stable_hash([cv_hash, offer_hash])[:16]
+
+
+def user_answers(messages: List[Dict[str, Any]]) -> List[str]:
+    return [m["content"] for m in messages if m.get("role") == "user" and isinstance(m.get("content"), str)]
+
+
+class PreAnalysisQueue:
+    """
+    Pré-analyse des réponses du candidat pendant l'entretien. Chaque tour soumet
+    ses nouvelles réponses ; un worker unique calcule sentiment, intention et
+    embeddings, mémorisés par contenu dans les caches de l'analyseur. Le rapport
+    final relit ces résultats et n'analyse en ligne que les réponses manquantes.
+    File bornée : en cas de saturation, le tour est ignoré (le rapport le rattrapera).
+    """
+
+    def __init__(self, max_queue: int = PRE_ANALYSIS_QUEUE_SIZE, max_sessions: int = PRE_ANALYSIS_MAX_SESSIONS):
+        self.max_sessions = max_sessions
+        self._queue: "queue.Queue" = queue.Queue(maxsize=max_queue)
+        self._sessions: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._worker: Optional[threading.Thread] = None
+        self.submitted = 0
+        self.skipped = 0
+        self.dropped = 0
+        self.analysed = 0
+        self.failed = 0
+
+    def start(self):
+        if self._worker is None or not self._worker.is_alive():
+            self._stop.clear()
+            self._worker = threading.Thread(target=self._loop, name="pre-analysis", daemon=True)
+            self._worker.start()
+
+    def stop(self, timeout: float = 5.0):
+        self._stop.set()
+        if self._worker is not None:
+            self._worker.join(timeout=timeout)
+
+    def _session(self, session_id: str) -> Dict[str, Any]:
+        session = self._sessions.get(session_id)
+        if session is None:
+            session = self._sessions[session_id] = {"answers": set(), "analysed": set(), "updated_at": 0.0}
+            while len(self._sessions) > self.max_sessions:
+                self._sessions.popitem(last=False)
+        self._sessions.move_to_end(session_id)
+        session["updated_at"] = time.time()
+        return session
+
+    @staticmethod
+    def _is_cached(answer: str) -> bool:
+        from src.deep_learning_analyzer import turn_result_cache, turn_result_key
+        from src.intent_engines import INTENT_ENGINE
+        return (turn_result_cache.get(turn_result_key("sentiment", answer)) is not None
+                and turn_result_cache.get(turn_result_key(f"intent:{INTENT_ENGINE}", answer)) is not None)
+
+    def submit(self, session_id: str, answers: List[str], job_description: str = ""):
+        """Appelé après la réponse HTTP du tour ; ne bloque jamais."""
+        self.start()
+        with self._lock:
+            session = self._session(session_id)
+            fresh = {}
+            for answer in answers:
+                digest = stable_hash(answer)
+                if digest in session["answers"] or digest in fresh:
+                    continue
+                if self._is_cached(answer):
+                    session["answers"].add(digest)
+                    session["analysed"].add(digest)
+                    self.skipped += 1
+                else:
+                    fresh[digest] = answer
+            if not fresh:
+                return
+            try:
+                self._queue.put_nowait((session_id, list(fresh.values()), job_description))
+            except queue.Full:
+                # Réponses non marquées : le tour suivant les soumettra de nouveau
+                self.dropped += 1
+                logger.warning(f"Pré-analyse saturée, tour ignoré pour la session {session_id}")
+                return
+            session["answers"].update(fresh)
+            self.submitted += 1
+
+    def _release(self, session_id: str, answers: List[str]):
+        """Réponses à soumettre de nouveau au prochain tour (analyse en échec)."""
+        with self._lock:
+            session = self._sessions.get(session_id)
+            if session is not None:
+                session["answers"].difference_update(stable_hash(answer) for answer in answers)
+
+    def _loop(self):
+        from src.deep_learning_analyzer import MultiModelInterviewAnalyzer
+
+        while not self._stop.is_set():
+            try:
+                session_id, answers, job_description = self._queue.get(timeout=0.5)
+            except queue.Empty:
+                continue
+            try:
+                # Remplit les caches par réponse (sentiment, intention) et les embeddings de phrases,
+                # y compris ceux de la description utilisés par la couverture des exigences
+                result = MultiModelInterviewAnalyzer().run_full_analysis(
+                    [{"role": "user", "content": answer} for answer in answers],
+                    job_description, include_transcript=False
+                )
+                if "error" in result:
+                    raise RuntimeError(result["error"])
+                # Les résultats de repli (modèle indisponible) ne sont pas mis en cache : seules
+                # les réponses effectivement mémorisées comptent comme analysées
+                done = [answer for answer in answers if self._is_cached(answer)]
+                missing = [answer for answer in answers if answer not in done]
+                with self._lock:
+                    session = self._sessions.get(session_id)
+                    if session is not None:
+                        session["analysed"].update(stable_hash(answer) for answer in done)
+                self.analysed += len(done)
+                if missing:
+                    self.failed += 1
+                    self._release(session_id, missing)
+            except Exception as e:
+                self.failed += 1
+                self._release(session_id, answers)
+                logger.error(f"Erreur de pré-analyse pour la session {session_id} : {e}")
+            finally:
+                self._queue.task_done()
+
+    def session_status(self, session_id: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            session = self._sessions.get(session_id)
+            if session is None:
+                return None
+            return {
+                "answers": len(session["answers"]),
+                "analysed": len(session["analysed"]),
+                "updated_at": session["updated_at"],
+            }
+
+    def snapshot(self) -> Dict[str, Any]:
+        from src.deep_learning_analyzer import turn_result_cache
+        return {
+            "enabled": PRE_ANALYSIS_ENABLED,
+            "running": self._worker is not None and self._worker.is_alive(),
+            "queued": self._queue.qsize(),
+            "sessions": len(self._sessions),
+            "submitted": self.submitted,
+            "skipped_answers": self.skipped,
+            "dropped": self.dropped,
+            "analysed_answers": self.analysed,
+            "failed": self.failed,
+            "turn_cache": turn_result_cache.stats(),
+        }
+
+
+_pre_analysis: Optional[PreAnalysisQueue] = None
+_pre_analysis_lock = threading.Lock()
+
+
+def get_pre_analysis_queue() -> PreAnalysisQueue:
+    global _pre_analysis
+    if _pre_analysis is None:
+        with _pre_analysis_lock:
+            if _pre_analysis is None:
+                _pre_analysis = PreAnalysisQueue()
+    return _pre_analysis
@@ -0,0 +1,278 @@
+import os
+import io
+import hmac
+import time
+import uuid
+import shutil
+import pstats
+import cProfile
+import logging
+import functools
+import threading
+import contextvars
+from contextlib import contextmanager
+from typing import Any, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+PROFILE_TOKEN = os.getenv("PROFILE_TOKEN")  # non défini : profilage désactivé
+PROFILE_DIR = os.getenv("PROFILE_DIR", "/tmp/profiles")
+PROFILE_MAX_SESSIONS = int(os.getenv("PROFILE_MAX_SESSIONS", "20"))
+PROFILE_MAX_BYTES = int(os.getenv("PROFILE_MAX_MB", "200")) * 1024 * 1024
+PROFILE_HEADER = "x-profile-token"
+PROFILE_ID_HEADER = "x-profile-id"
+SUMMARY_TOP_N = 40
+
+
+class ProfileSession:
+    """Profil d'une requête : un fichier cProfile (+ trace torch éventuelle) par étape instrumentée."""
+
+    def __init__(self, label: str, base_dir: str = PROFILE_DIR):
+        self.id = f"{time.strftime('%Y%m%d-%H%M%S')}-{uuid.uuid4().hex[:8]}"
+        self.label = label
+        self.directory = os.path.join(base_dir, self.id)
+        self.started = time.perf_counter()
+        self.stages: List[Dict[str, Any]] = []
+        self._threads = set()
+        self._lock = threading.Lock()
+        os.makedirs(self.directory, exist_ok=True)
+
+    def _claim_thread(self) -> bool:
+        ident = threading.get_ident()
+        with self._lock:
+            if ident in self._threads:
+                return False
+            self._threads.add(ident)
+            return True
+
+    def _release_thread(self):
+        with self._lock:
+            self._threads.discard(threading.get_ident())
+
+    def _stage_path(self, stage: str, suffix: str) -> str:
+        with self._lock:
+            index = sum(1 for s in self.stages if s["stage"] == stage)
+        return os.path.join(self.directory, f"{stage}-{index}{suffix}")
+
+    def write_stage(self, stage: str, profiler: Optional[cProfile.Profile], seconds: float,
+                    torch_trace: Optional[str]):
+        path = None
+        if profiler is not None:
+            path = self._stage_path(stage, ".prof")
+            profiler.dump_stats(path)
+            summary = io.StringIO()
+            pstats.Stats(profiler, stream=summary).sort_stats("cumulative").print_stats(SUMMARY_TOP_N)
+            with open(path[:-len(".prof")] + ".txt", "w", encoding="utf-8") as f:
+                f.write(summary.getvalue())
+        with self._lock:
+            self.stages.append({
+                "stage": stage,
+                "seconds": round(seconds, 3),
+                "profile": os.path.basename(path) if path else None,
+                "torch_trace": os.path.basename(torch_trace) if torch_trace else None,
+            })
+
+
+_active_session: contextvars.ContextVar[Optional[ProfileSession]] = contextvars.ContextVar(
+    "active_profile_session", default=None
+)
+# Un seul profil à la fois : le surcoût reste borné même si plusieurs requêtes le demandent
+_profiling_slot = threading.Semaphore(1)
+_armed_lock = threading.Lock()
+_armed: Dict[str, int] = {}
+
+
+def profiling_enabled() -> bool:
+    return bool(PROFILE_TOKEN)
+
+
+def check_token(token: Optional[str]) -> bool:
+    # En octets : compare_digest refuse les str non ASCII (TypeError, donc une 500 pour un en-tête arbitraire)
+    return bool(PROFILE_TOKEN) and token is not None and hmac.compare_digest(
+        token.encode("utf-8"), PROFILE_TOKEN.encode("utf-8")
+    )
+
+
+def arm(path_prefix: str, count: int = 1):
+    """Profile les `count` prochaines requêtes dont le chemin commence par `path_prefix`."""
+    with _armed_lock:
+        _armed[path_prefix] = _armed.get(path_prefix, 0) + count
+
+
+def _take_armed(path: str) -> bool:
+    if not _armed:
+        return False
+    with _armed_lock:
+        for prefix, remaining in _armed.items():
+            if path.startswith(prefix):
+                if remaining <= 1:
+                    del _armed[prefix]
+                else:
+                    _armed[prefix] = remaining - 1
+                return True
+    return False
+
+
+@contextmanager
+def profiled(stage: str, torch_trace: bool = False):
+    """
+    Profile le bloc si la requête courante est profilée, sinon ne fait rien
+    (une lecture de contextvar). `torch_trace` ajoute une trace du profiler
+    torch (format Chrome) pour les appels de modèles.
+    """
+    session = _active_session.get()
+    if session is None:
+        yield
+        return
+
+    # cProfile est par thread : une étape imbriquée dans le même thread est déjà couverte
+    owns_thread = session._claim_thread()
+    if not owns_thread and not torch_trace:
+        yield
+        return
+
+    torch_profiler, trace_path = None, None
+    if torch_trace:
+        try:
+            from torch.profiler import profile, ProfilerActivity
+            torch_profiler = profile(activities=[ProfilerActivity.CPU], record_shapes=True)
+            torch_profiler.__enter__()
+        except Exception as e:
+            logger.warning(f"Profiler torch indisponible : {e}")
+            torch_profiler = None
+
+    profiler = cProfile.Profile() if owns_thread else None
+    started = time.perf_counter()
+    if profiler is not None:
+        profiler.enable()
+    try:
+        yield
+    finally:
+        if profiler is not None:
+            profiler.disable()
+        elapsed = time.perf_counter() - started
+        try:
+            if torch_profiler is not None:
+                torch_profiler.__exit__(None, None, None)
+                trace_path = session._stage_path(stage, "-torch.json")
+                torch_profiler.export_chrome_trace(trace_path)
+            session.write_stage(stage, profiler, elapsed, trace_path)
+        except Exception as e:
+            logger.warning(f"Écriture du profil {stage} impossible : {e}")
+        finally:
+            if owns_thread:
+                session._release_thread()
+
+
+def profile_stage(stage: str, torch_trace: bool = False):
+    """Décorateur équivalent à `profiled` pour une méthode entière."""
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if _active_session.get() is None:
+                return func(*args, **kwargs)
+            with profiled(stage, torch_trace=torch_trace):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def start_session(label: str):
+    """Ouvre une session pour la requête courante, ou None si un profil est déjà en cours."""
+    if not _profiling_slot.acquire(blocking=False):
+        logger.warning(f"Profilage ignoré pour {label} : un autre profil est en cours")
+        return None, None
+    try:
+        session = ProfileSession(label)
+    except Exception as e:
+        _profiling_slot.release()
+        logger.warning(f"Impossible de créer le répertoire de profil : {e}")
+        return None, None
+    return session, _active_session.set(session)
+
+
+def end_session(session: ProfileSession, token):
+    _active_session.reset(token)
+    _profiling_slot.release()
+    logger.info(
+        f"Profil {session.id} ({session.label}) : {len(session.stages)} étape(s), "
+        f"{time.perf_counter() - session.started:.2f}s -> {session.directory}"
+    )
+    try:
+        enforce_retention()
+    except Exception as e:
+        logger.warning(f"Nettoyage des profils impossible : {e}")
+
+
+def _directory_bytes(path: str) -> int:
+    return sum(os.path.getsize(os.path.join(root, name)) for root, _, files in os.walk(path) for name in files)
+
+
+def enforce_retention(base_dir: str = PROFILE_DIR, max_sessions: int = PROFILE_MAX_SESSIONS,
+                      max_bytes: int = PROFILE_MAX_BYTES) -> int:
+    """Supprime les sessions les plus anciennes au-delà du nombre ou de la taille maximale."""
+    if not os.path.isdir(base_dir):
+        return 0
+    sessions = sorted(
+        (entry for entry in os.scandir(base_dir) if entry.is_dir()),
+        key=lambda entry: entry.name, reverse=True
+    )
+    removed, total = 0, 0
+    for index, entry in enumerate(sessions):
+        total += _directory_bytes(entry.path)
+        if index >= max_sessions or total > max_bytes:
+            shutil.rmtree(entry.path, ignore_errors=True)
+            removed += 1
+    return removed
+
+
+def list_sessions(base_dir: str = PROFILE_DIR) -> List[Dict[str, Any]]:
+    if not os.path.isdir(base_dir):
+        return []
+    return [
+        {
+            "id": entry.name,
+            "files": sorted(os.listdir(entry.path)),
+            "bytes": _directory_bytes(entry.path),
+        }
+        for entry in sorted(os.scandir(base_dir), key=lambda entry: entry.name, reverse=True)
+        if entry.is_dir()
+    ]
+
+
+class ProfilingMiddleware:
+    """
+    Middleware ASGI : profile une requête portant l'en-tête X-Profile-Token
+    valide, ou armée via l'endpoint d'administration. Les autres requêtes
+    passent sans autre coût qu'un test.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not profiling_enabled():
+            return await self.app(scope, receive, send)
+
+        requested = any(
+            name == PROFILE_HEADER.encode() and check_token(value.decode("latin-1"))
+            for name, value in scope.get("headers", [])
+        )
+        if not requested and not _take_armed(scope.get("path", "")):
+            return await self.app(scope, receive, send)
+
+        session, token = start_session(f"{scope.get('method', '')} {scope.get('path', '')}")
+        if session is None:
+            return await self.app(scope, receive, send)
+
+        async def send_with_id(message):
+            if message["type"] == "http.response.start":
+                headers = list(message.get("headers", []))
+                headers.append((PROFILE_ID_HEADER.encode(), session.id.encode()))
+                message = {**message, "headers": headers}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_id)
+        finally:
+            end_session(session, token)
@@ -0,0 +1,105 @@
+import json
+import logging
+from collections import Counter
+from typing import Any, Dict, List
+
+logger = logging.getLogger(__name__)
+
+PAYLOAD_VERSION = 1
+DEFAULT_TOP_K = 2
+QUOTE_MAX_CHARS = 240
+MAX_COVERAGE_ITEMS = 12
+# Intentions pour lesquelles le rapport doit pouvoir citer la réponse
+QUOTED_INTENT_MARKERS = ("stress", "incertitude", "question")
+
+
+def dumps_compact(data: Any) -> str:
+    """JSON minifié, sans échappement des accents (\\u00e9 coûte plusieurs tokens)."""
+    return json.dumps(data, ensure_ascii=False, separators=(",", ":"))
+
+
+def _truncate(text: str, limit: int = QUOTE_MAX_CHARS) -> str:
+    text = " ".join(str(text).split())
+    return text if len(text) <= limit else text[:limit - 1].rstrip() + "…"
+
+
+def _top_sentiments(entry, top_k: int) -> List[List[Any]]:
+    """Accepte la sortie `return_all_scores` (liste) comme les fallbacks (dict unique)."""
+    scores = entry if isinstance(entry, list) else [entry] if isinstance(entry, dict) else []
+    scores = [s for s in scores if isinstance(s, dict) and "label" in s]
+    scores.sort(key=lambda s: s.get("score", 0.0), reverse=True)
+    return [[s["label"], round(float(s.get("score", 0.0)), 2)] for s in scores[:top_k]]
+
+
+def _top_intents(entry, top_k: int) -> List[List[Any]]:
+    if not isinstance(entry, dict):
+        return []
+    pairs = list(zip(entry.get("labels", []), entry.get("scores", [])))
+    return [[label, round(float(score), 2)] for label, score in pairs[:top_k]]
+
+
+def build_compact_analysis(analysis: Dict[str, Any], top_k: int = DEFAULT_TOP_K) -> Dict[str, Any]:
+    """
+    Réduit la sortie de `run_full_analysis` à ce dont le rapport a besoin :
+    top-k labels par tour, statistiques agrégées, et citations uniquement pour
+    les tours qui le justifient (référencés par leur index de réponse).
+    """
+    transcript = analysis.get("raw_transcript") or []
+    answers = [m.get("content", "") for m in transcript if isinstance(m, dict) and m.get("role") == "user"]
+    sentiments = analysis.get("sentiment_analysis") or []
+    intents = analysis.get("intent_analysis") or []
+
+    turns, quotes = [], {}
+    sentiment_totals, intent_counts = Counter(), Counter()
+    for index, answer in enumerate(answers):
+        turn_sentiments = _top_sentiments(sentiments[index], top_k) if index < len(sentiments) else []
+        turn_intents = _top_intents(intents[index], top_k) if index < len(intents) else []
+        turns.append({"tour": index, "mots": len(answer.split()), "sentiment": turn_sentiments, "intention": turn_intents})
+
+        if turn_sentiments:
+            sentiment_totals[turn_sentiments[0][0]] += 1
+        if turn_intents:
+            top_intent = turn_intents[0][0]
+            intent_counts[top_intent] += 1
+            if any(marker in top_intent for marker in QUOTED_INTENT_MARKERS):
+                quotes[str(index)] = _truncate(answer)
+
+    coverage = analysis.get("requirement_coverage") or {}
+    requirements = sorted(coverage.get("requirements", []), key=lambda r: r.get("score", 0.0))
+    coverage_items = []
+    for item in requirements[:MAX_COVERAGE_ITEMS]:
+        coverage_items.append({
+            "exigence": _truncate(item.get("requirement", ""), 120),
+            "tour": item.get("turn"),
+            "score": item.get("score"),
+            "extrait": _truncate(item.get("best_answer", ""), 160),
+        })
+
+    compact = {
+        "version": PAYLOAD_VERSION,
+        "score_similarite": analysis.get("overall_similarity_score"),
+        "couverture": {
+            "taux": round(float(coverage.get("coverage_ratio", 0.0)), 2),
+            "exigences_les_moins_couvertes": coverage_items,
+        } if coverage else None,
+        "nb_reponses": len(answers),
+        "sentiment_dominant_par_tour": dict(sentiment_totals.most_common()),
+        "intention_dominante_par_tour": dict(intent_counts.most_common()),
+        "tours": turns,
+        "citations": quotes,
+    }
+    if analysis.get("error"):
+        compact["erreur"] = analysis["error"]
+    models_status = analysis.get("models_status") or {}
+    unavailable = [name for name, ok in models_status.items() if name.endswith("_available") and not ok]
+    if unavailable:
+        compact["modeles_indisponibles"] = unavailable
+    return {k: v for k, v in compact.items() if v is not None}
+
+
+def encode_analysis_for_report(analysis: Dict[str, Any], top_k: int = DEFAULT_TOP_K) -> str:
+    try:
+        return dumps_compact(build_compact_analysis(analysis, top_k=top_k))
+    except Exception as e:
+        logger.error(f"Encodage compact de l'analyse impossible, envoi brut : {e}")
+        return dumps_compact(analysis)
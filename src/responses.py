@@ -0,0 +1,146 @@
+import json
+from dataclasses import dataclass, asdict, is_dataclass
+from typing import Any, Dict, List, Optional
+
+from fastapi.responses import JSONResponse
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+ORJSON_OPTIONS = (orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS) if orjson else 0
+
+
+def _default(value: Any):
+    """Repli pour json.dumps : dataclasses et types numpy."""
+    if is_dataclass(value):
+        return asdict(value)
+    if hasattr(value, "tolist"):
+        return value.tolist()
+    raise TypeError(f"Type non sérialisable : {type(value).__name__}")
+
+
+def dumps_bytes(content: Any) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(content, option=ORJSON_OPTIONS)
+    return json.dumps(content, ensure_ascii=False, separators=(",", ":"), default=_default).encode("utf-8")
+
+
+class FastJSONResponse(JSONResponse):
+    """
+    Réponse JSON sérialisée par orjson (dataclasses et tableaux numpy natifs).
+    Retournée directement par un endpoint, elle évite aussi le passage par
+    `jsonable_encoder`. Sans orjson, repli sur json minifié.
+    """
+
+    media_type = "application/json"
+
+    def render(self, content: Any) -> bytes:
+        return dumps_bytes(content)
+
+
+@dataclass(slots=True)
+class LabelScore:
+    label: str
+    score: float
+
+
+def _sentiment_scores(entry) -> List[LabelScore]:
+    """Accepte la sortie `return_all_scores` (liste) comme les fallbacks (dict unique)."""
+    scores = entry if isinstance(entry, list) else [entry] if isinstance(entry, dict) else []
+    scores = [s for s in scores if isinstance(s, dict) and "label" in s]
+    scores.sort(key=lambda s: s.get("score", 0.0), reverse=True)
+    return [LabelScore(s["label"], round(float(s.get("score", 0.0)), 4)) for s in scores]
+
+
+def _intent_scores(entry) -> List[LabelScore]:
+    if not isinstance(entry, dict):
+        return []
+    return [
+        LabelScore(label, round(float(score), 4))
+        for label, score in zip(entry.get("labels", []), entry.get("scores", []))
+    ]
+
+
+@dataclass(slots=True)
+class TurnAnalysis:
+    turn: int
+    sentiment: Optional[LabelScore]
+    intent: Optional[LabelScore]
+
+
+@dataclass(slots=True)
+class TurnScores:
+    turn: int
+    sentiment: List[LabelScore]
+    intent: List[LabelScore]
+
+
+@dataclass(slots=True)
+class RequirementMatch:
+    requirement: str
+    turn: int
+    score: float
+    best_answer: Optional[str] = None
+
+
+@dataclass(slots=True)
+class AnalysisResult:
+    overall_similarity_score: float
+    coverage_ratio: float
+    turns: List[TurnAnalysis]
+    requirements: List[RequirementMatch]
+    models_status: Dict[str, Any]
+    raw_scores: Optional[List[TurnScores]] = None
+    transcript: Optional[List[Dict[str, Any]]] = None
+    error: Optional[str] = None
+
+    @classmethod
+    def from_analysis(cls, analysis: Dict[str, Any], include_transcript: bool = False,
+                      include_raw_scores: bool = False) -> "AnalysisResult":
+        """
+        Construit la réponse allégée depuis la sortie de `run_full_analysis` :
+        label dominant par tour, listes de scores complètes et transcription
+        seulement sur demande.
+        """
+        sentiments = analysis.get("sentiment_analysis") or []
+        intents = analysis.get("intent_analysis") or []
+        turns, raw_scores = [], []
+        for index in range(max(len(sentiments), len(intents))):
+            sentiment_scores = _sentiment_scores(sentiments[index]) if index < len(sentiments) else []
+            intent_scores = _intent_scores(intents[index]) if index < len(intents) else []
+            turns.append(TurnAnalysis(
+                turn=index,
+                sentiment=sentiment_scores[0] if sentiment_scores else None,
+                intent=intent_scores[0] if intent_scores else None,
+            ))
+            if include_raw_scores:
+                raw_scores.append(TurnScores(index, sentiment_scores, intent_scores))
+
+        coverage = analysis.get("requirement_coverage") or {}
+        requirements = [
+            RequirementMatch(
+                requirement=item.get("requirement", ""),
+                turn=item.get("turn"),
+                score=item.get("score"),
+                best_answer=item.get("best_answer") if include_transcript else None,
+            )
+            for item in coverage.get("requirements", [])
+        ]
+
+        return cls(
+            overall_similarity_score=analysis.get("overall_similarity_score", 0.0),
+            coverage_ratio=round(float(coverage.get("coverage_ratio", 0.0)), 3),
+            turns=turns,
+            requirements=requirements,
+            models_status=analysis.get("models_status") or {},
+            raw_scores=raw_scores if include_raw_scores else None,
+            transcript=analysis.get("raw_transcript") if include_transcript else None,
+            error=analysis.get("error"),
+        )
+
+
+@dataclass(slots=True)
+class InterviewTurnResponse:
+    response: str
@@ -0,0 +1,166 @@
+import logging
+from dataclasses import dataclass
+from typing import Dict, List, Sequence
+
+import torch
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_STRIDE = 64
+DEFAULT_BATCH_SIZE = 16
+MAX_MODEL_LENGTH = 512
+DEFAULT_HYPOTHESIS_TEMPLATE = "This example is {}."
+
+
+@dataclass
+class Chunk:
+    message_index: int
+    input_ids: List[int]
+    weight: int
+
+
+def padding_waste(lengths: Sequence[int], batch_size: int, bucketed: bool) -> Dict[str, float]:
+    """Tokens de padding générés pour des séquences batchées dans l'ordre d'arrivée ou triées par longueur."""
+    ordered = sorted(lengths) if bucketed else list(lengths)
+    real = sum(ordered)
+    padded = 0
+    for start in range(0, len(ordered), batch_size):
+        batch = ordered[start:start + batch_size]
+        padded += max(batch) * len(batch)
+    return {
+        "real_tokens": real,
+        "padded_tokens": padded,
+        "waste_ratio": round(1 - real / padded, 4) if padded else 0.0,
+    }
+
+
+class ChunkedTextPreprocessor:
+    """
+    Tokenise une seule fois, découpe les textes longs en fenêtres chevauchantes
+    qui tiennent dans la longueur max du modèle, et regroupe les fenêtres en
+    batches de longueurs proches pour limiter le padding.
+    """
+
+    def __init__(self, tokenizer, max_length: int = None, stride: int = DEFAULT_STRIDE,
+                 batch_size: int = DEFAULT_BATCH_SIZE):
+        self.tokenizer = tokenizer
+        model_max = getattr(tokenizer, "model_max_length", MAX_MODEL_LENGTH) or MAX_MODEL_LENGTH
+        self.max_length = min(max_length or model_max, MAX_MODEL_LENGTH)
+        self.stride = stride
+        self.batch_size = batch_size
+
+    def tokenize(self, texts: Sequence[str]) -> List[List[int]]:
+        return self.tokenizer(list(texts), add_special_tokens=False)["input_ids"]
+
+    def split(self, token_ids: List[int], budget: int) -> List[List[int]]:
+        if len(token_ids) <= budget:
+            return [token_ids]
+        step = max(1, budget - min(self.stride, budget // 2))
+        windows = []
+        for start in range(0, len(token_ids), step):
+            windows.append(token_ids[start:start + budget])
+            if start + budget >= len(token_ids):
+                break
+        return windows
+
+    def chunk(self, texts: Sequence[str], reserved_tokens: int = 0, pair: bool = False) -> List[Chunk]:
+        budget = self.max_length - self.tokenizer.num_special_tokens_to_add(pair=pair) - reserved_tokens
+        if budget <= 0:
+            raise ValueError("Longueur maximale insuffisante pour les tokens réservés")
+        chunks = []
+        for index, token_ids in enumerate(self.tokenize(texts)):
+            for window in self.split(token_ids, budget):
+                chunks.append(Chunk(message_index=index, input_ids=window, weight=max(1, len(window))))
+        return chunks
+
+    def batches(self, sequences: List[List[int]]) -> List[List[int]]:
+        """Indices des séquences regroupés par longueur croissante."""
+        order = sorted(range(len(sequences)), key=lambda i: len(sequences[i]))
+        return [order[start:start + self.batch_size] for start in range(0, len(order), self.batch_size)]
+
+    def pad(self, sequences: List[List[int]]) -> Dict[str, torch.Tensor]:
+        width = max(len(s) for s in sequences)
+        pad_id = self.tokenizer.pad_token_id or 0
+        input_ids = torch.full((len(sequences), width), pad_id, dtype=torch.long)
+        attention_mask = torch.zeros((len(sequences), width), dtype=torch.long)
+        for row, sequence in enumerate(sequences):
+            input_ids[row, :len(sequence)] = torch.tensor(sequence, dtype=torch.long)
+            attention_mask[row, :len(sequence)] = 1
+        return {"input_ids": input_ids, "attention_mask": attention_mask}
+
+    def run(self, model, sequences: List[List[int]]) -> torch.Tensor:
+        """Logits pour toutes les séquences, dans l'ordre d'entrée."""
+        logits = [None] * len(sequences)
+        with torch.inference_mode():
+            for batch in self.batches(sequences):
+                output = model(**self.pad([sequences[i] for i in batch])).logits
+                for row, i in enumerate(batch):
+                    logits[i] = output[row]
+        return torch.stack(logits)
+
+    @staticmethod
+    def aggregate(chunks: List[Chunk], scores: torch.Tensor, n_messages: int) -> torch.Tensor:
+        """Moyenne des scores des fenêtres, pondérée par leur nombre de tokens."""
+        totals = torch.zeros((n_messages, scores.shape[-1]), dtype=scores.dtype)
+        weights = torch.zeros((n_messages, 1), dtype=scores.dtype)
+        for chunk, row in zip(chunks, scores):
+            totals[chunk.message_index] += row * chunk.weight
+            weights[chunk.message_index] += chunk.weight
+        return totals / weights.clamp(min=1)
+
+
+def classify_texts(classifier, texts: Sequence[str], **kwargs) -> List[List[Dict[str, float]]]:
+    """
+    Équivalent chunké de `pipeline("text-classification", return_all_scores=True)(texts)`.
+    """
+    preprocessor = ChunkedTextPreprocessor(classifier.tokenizer, **kwargs)
+    tokenizer, model = classifier.tokenizer, classifier.model
+    chunks = preprocessor.chunk(texts)
+    sequences = [tokenizer.build_inputs_with_special_tokens(c.input_ids) for c in chunks]
+
+    logits = preprocessor.run(model, sequences)
+    if getattr(model.config, "problem_type", None) == "multi_label_classification":
+        scores = logits.sigmoid()
+    else:
+        scores = logits.softmax(dim=-1)
+    per_message = preprocessor.aggregate(chunks, scores, len(texts))
+
+    id2label = model.config.id2label
+    return [
+        [{"label": id2label[i], "score": float(row[i])} for i in range(row.shape[0])]
+        for row in per_message
+    ]
+
+
+def zero_shot_texts(classifier, texts: Sequence[str], candidate_labels: Sequence[str],
+                    hypothesis_template: str = DEFAULT_HYPOTHESIS_TEMPLATE, **kwargs) -> List[Dict]:
+    """
+    Équivalent chunké de `pipeline("zero-shot-classification")(text, labels, multi_label=False)`.
+    Chaque fenêtre est appariée à chaque hypothèse ; les scores d'implication sont
+    normalisés sur les labels puis agrégés par message.
+    """
+    preprocessor = ChunkedTextPreprocessor(classifier.tokenizer, **kwargs)
+    tokenizer, model = classifier.tokenizer, classifier.model
+    hypotheses = preprocessor.tokenize([hypothesis_template.format(label) for label in candidate_labels])
+    chunks = preprocessor.chunk(texts, reserved_tokens=max(len(h) for h in hypotheses), pair=True)
+
+    sequences = [
+        tokenizer.build_inputs_with_special_tokens(chunk.input_ids, hypothesis)
+        for chunk in chunks for hypothesis in hypotheses
+    ]
+    entailment_id = next(
+        (i for label, i in model.config.label2id.items() if label.lower().startswith("entail")), -1
+    )
+    logits = preprocessor.run(model, sequences)[:, entailment_id]
+    scores = logits.view(len(chunks), len(candidate_labels)).softmax(dim=-1)
+    per_message = preprocessor.aggregate(chunks, scores, len(texts))
+
+    results = []
+    for text, row in zip(texts, per_message):
+        order = row.argsort(descending=True).tolist()
+        results.append({
+            "sequence": text,
+            "labels": [candidate_labels[i] for i in order],
+            "scores": [float(row[i]) for i in order],
+        })
+    return results
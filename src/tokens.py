@@ -0,0 +1,29 @@
+import logging
+from functools import lru_cache
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_ENCODING_MODEL = "gpt-4o-mini"
+
+
+@lru_cache(maxsize=8)
+def _get_encoding(model: str):
+    try:
+        import tiktoken
+        try:
+            return tiktoken.encoding_for_model(model)
+        except KeyError:
+            return tiktoken.get_encoding("o200k_base")
+    except Exception as e:
+        logger.warning(f"tiktoken indisponible, estimation approximative des tokens : {e}")
+        return None
+
+
+def count_tokens(text: str, model: str = DEFAULT_ENCODING_MODEL) -> int:
+    """Nombre de tokens d'un texte pour un modèle OpenAI (≈ 4 caractères/token sans tiktoken)."""
+    if not text:
+        return 0
+    encoding = _get_encoding(model)
+    if encoding is None:
+        return max(1, len(text) // 4)
+    return len(encoding.encode(text, disallowed_special=()))
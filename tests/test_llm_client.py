@@ -0,0 +1,42 @@
+from src.llm_client import CircuitBreaker, ResilientLLM, _shared_state
+
+
+class Target:
+    def __init__(self, error=None):
+        self.error = error
+
+    def invoke(self, messages):
+        if self.error is not None:
+            raise self.error
+        return "ok"
+
+
+def test_non_transient_half_open_probe_releases_the_breaker():
+    name = "test:half-open-probe"
+    _, breaker = _shared_state(name)
+    breaker.reset_seconds = 0.0
+    for _ in range(breaker.failure_threshold):
+        breaker.record_failure()
+    assert breaker.state == "half_open"
+
+    llm = ResilientLLM(Target(ValueError("sortie structurée invalide")), name=name, max_retries=0, hedge=False)
+    try:
+        llm.invoke([])
+    except ValueError:
+        pass
+    # La sonde en échec non transitoire ne doit pas bloquer le circuit indéfiniment
+    assert breaker.allow()
+    breaker.release_probe()
+
+    llm.primary = Target()
+    assert llm.invoke([]) == "ok"
+    assert breaker.state == "closed"
+
+
+def test_breaker_opens_after_consecutive_failures():
+    breaker = CircuitBreaker(failure_threshold=2, reset_seconds=60.0)
+    breaker.record_failure()
+    assert breaker.allow()
+    breaker.record_failure()
+    assert breaker.state == "open"
+    assert not breaker.allow()
@@ -0,0 +1,14 @@
+from src import profiling
+
+
+def test_check_token_accepts_non_ascii_header_values(monkeypatch):
+    monkeypatch.setattr(profiling, "PROFILE_TOKEN", "secret")
+    assert profiling.check_token("secret")
+    assert not profiling.check_token("sécret")
+    assert not profiling.check_token("")
+    assert not profiling.check_token(None)
+
+
+def test_check_token_is_disabled_without_configured_token(monkeypatch):
+    monkeypatch.setattr(profiling, "PROFILE_TOKEN", None)
+    assert not profiling.check_token("secret")
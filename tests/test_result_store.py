@@ -0,0 +1,25 @@
+from src.persistence import ResultStore, SQLiteBackend
+
+
+def test_error_and_fallback_profiles_are_not_persisted(tmp_path):
+    store = ResultStore(SQLiteBackend(str(tmp_path / "results.sqlite3")), flush_interval=60.0)
+    try:
+        store.save_cv({"candidat": {"error": "Erreur lors de l'analyse", "informations_personnelles": {"nom": "Erreur"}},
+                       "content_hash": "hash-erreur"})
+        store.save_cv({"candidat": {"status": "fallback_mode"}, "content_hash": "hash-repli"})
+        store.save_cv({"candidat": {"informations_personnelles": {"nom": "Camille"}}})
+        store.save_cv({"candidat": {"informations_personnelles": {"nom": "Camille"}}, "content_hash": "hash-1"})
+        assert store.flush()
+        assert [cv["content_hash"] for cv in store.recent_cvs()] == ["hash-1"]
+    finally:
+        store.close()
+
+
+def test_auto_backend_without_mongo_uri_disables_persistence(monkeypatch, tmp_path):
+    from src.persistence import store
+    monkeypatch.setattr(store, "MONGODB_URI", None)
+    monkeypatch.setattr(store, "PERSISTENCE_SQLITE_PATH", str(tmp_path / "results.sqlite3"))
+    assert store.build_backend("auto") is None
+    assert store.build_backend("mongo") is None
+    assert store.build_backend("none") is None
+    assert isinstance(store.build_backend("sqlite"), SQLiteBackend)
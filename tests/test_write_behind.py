@@ -0,0 +1,72 @@
+import time
+
+from src.persistence import SQLiteBackend, StorageBackend, WriteBehindBuffer
+
+
+class FlakyBackend(StorageBackend):
+    name = "flaky"
+
+    def __init__(self):
+        self.failing = True
+        self.attempts = 0
+        self.records = {}
+
+    def insert_many(self, records):
+        self.attempts += 1
+        if self.failing:
+            raise ConnectionError("backend indisponible")
+        for collection, key, document in records:
+            self.records.setdefault((collection, key), document)
+        return len(records)
+
+
+def wait_until(condition, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if condition():
+            return True
+        time.sleep(0.01)
+    return False
+
+
+def test_failing_backend_backs_off_and_recovers():
+    backend = FlakyBackend()
+    buffer = WriteBehindBuffer(backend, batch_size=2, flush_interval=0.05, max_backoff=0.2)
+    try:
+        for i in range(10):
+            buffer.put("reports", f"k{i}", {"i": i})
+        time.sleep(0.6)
+        # Backoff respecté même avec des lots pleins en attente : pas de boucle de réessais immédiats
+        assert 1 <= backend.attempts <= 10
+        assert buffer._worker.is_alive()
+        assert buffer.stats()["pending"] == 10
+
+        backend.failing = False
+        assert wait_until(lambda: len(backend.records) == 10)
+        assert buffer.stats()["pending"] == 0
+        assert buffer._worker.is_alive()
+    finally:
+        buffer.close(timeout=2.0)
+
+
+def test_backoff_exponent_is_capped():
+    buffer = WriteBehindBuffer(FlakyBackend(), flush_interval=0.5, max_backoff=60.0)
+    try:
+        buffer._failures = 5000
+        assert buffer._backoff() == 60.0
+    finally:
+        buffer._failures = 0
+        buffer.close(timeout=2.0)
+
+
+def test_sqlite_write_behind_is_idempotent(tmp_path):
+    backend = SQLiteBackend(str(tmp_path / "results.sqlite3"))
+    buffer = WriteBehindBuffer(backend, batch_size=100, flush_interval=60.0)
+    buffer.put("cvs", "hash-1", {"nom": "Camille"})
+    buffer.put("cvs", "hash-1", {"nom": "doublon"})
+    assert buffer.flush()
+    buffer.put("cvs", "hash-1", {"nom": "réécriture"})
+    assert buffer.flush()
+    assert backend.get("cvs", "hash-1") == {"nom": "Camille"}
+    assert backend.recent("cvs") == [{"nom": "Camille"}]
+    buffer.close(timeout=2.0)